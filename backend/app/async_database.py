@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+from config.settings import settings
+from app.database import Database, open_database
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool that runs blocking mysql.connector calls."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_EXECUTOR_WORKERS,
+            thread_name_prefix="db",
+        )
+    return _executor
+
+
+async def run_in_db_executor(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the database executor without blocking the event loop.
+    The caller's context variables (e.g. the request's query stats) are visible in the executor thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, fn, *args, **kwargs))
+
+
+class AsyncDatabase:
+    """
+    Awaitable facade over Database.
+    Exposes the same methods (get_plans, log_workout, get_plan_exercises, ...) as coroutines that run
+    on the database executor. Calls for one request are awaited in sequence, so the underlying
+    connection is never used by two threads at once.
+    """
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._on_commit: List[Callable[[], Awaitable[Any]]] = []
+        self._on_rollback: List[Callable[[], Awaitable[Any]]] = []
+
+    def on_commit(self, callback: Callable[[], Awaitable[Any]], on_rollback: Optional[Callable[[], Awaitable[Any]]] = None):
+        """
+        Await callback() once get_async_database has committed the request's work, or on_rollback() if the
+        request fails or its commit does. Both run before the connection is released, so they may use this
+        AsyncDatabase (and commit their own work). For side effects that must not outlive a lost write.
+        """
+        self._on_commit.append(callback)
+        if on_rollback is not None:
+            self._on_rollback.append(on_rollback)
+
+    async def _run_callbacks(self, callbacks: List[Callable[[], Awaitable[Any]]]):
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Error in callback after the request's transaction: {e}")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(db, *args, **kwargs) on the executor, for service functions that take a Database."""
+        return await run_in_db_executor(fn, self._db, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            # Touching the cursor or connection directly would block the event loop
+            raise AttributeError(f"AsyncDatabase does not expose '{name}'; use run() for direct cursor access")
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await run_in_db_executor(attr, *args, **kwargs)
+
+        return method
+
+
+async def get_async_database():
+    """
+    Request-scoped FastAPI dependency yielding an AsyncDatabase.
+    Same lifecycle as get_database: commit on success, roll back on error, always release the connection.
+    Callbacks registered with AsyncDatabase.on_commit run after the commit (or rollback).
+    """
+    db = AsyncDatabase(await run_in_db_executor(open_database))
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        await db._run_callbacks(db._on_rollback)
+        raise
+    else:
+        await db._run_callbacks(db._on_commit)
+    finally:
+        await db.close()
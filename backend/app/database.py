@@ -1,15 +1,23 @@
 import mysql.connector
 from config.settings import settings
+from app.db_pool import ConnectionPool
+from app.cache import TTLCache
+from app.query_stats import InstrumentedCursor
+from app import stats_cache
+from app.services.exercise_catalog import exercise_catalog
 import logging
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
 import os
+import threading
 import time  # Added for retry delay in get_db_connection
-from datetime import date
+from datetime import date, datetime, timedelta
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def get_db_connection(max_retries=3, retry_delay=5):
+    """Open a new physical connection. Request handlers should lease from get_pool() instead."""
     db_name = os.getenv("TEST_DATABASE", settings.DB_NAME)
     logger.info(f"Connecting to database: {db_name} (host={settings.DB_HOST}, user={settings.DB_USER})")
     for attempt in range(max_retries):
@@ -23,7 +31,7 @@ def get_db_connection(max_retries=3, retry_delay=5):
                 ssl_verify_cert=True,
                 connection_timeout=30
             )
-            # Set session variables after connection
+            # Set session variables after connection (once per physical connection; the pool reuses it)
             cursor = conn.cursor()
             cursor.execute("SET SESSION wait_timeout = 60")
             cursor.execute("SET SESSION interactive_timeout = 60")
@@ -40,11 +48,155 @@ def get_db_connection(max_retries=3, retry_delay=5):
             logger.error(f"Unexpected error during database connection: {e}")
             raise
 
+# Firebase UID -> user_id. The mapping never changes for a synced user, so it is safe to share across requests.
+user_id_cache = TTLCache("user_id", maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_ID_CACHE_TTL)
+# user_id -> Users row. Invalidated on writes in this process; other workers see changes once the TTL expires.
+user_profile_cache = TTLCache("user_profile", maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_PROFILE_CACHE_TTL)
+
+def invalidate_user_cache(user_id: int):
+    """Drop the cached profile row for a user after it changes."""
+    user_profile_cache.pop(user_id)
+
+def _now() -> datetime:
+    """
+    The app server's current time for a new workout log's date_logged, to the second like the DATETIME column.
+    Streaks count days by the app's clock, so logs are dated by it rather than the database's CURRENT_TIMESTAMP.
+    """
+    return datetime.now().replace(microsecond=0)
+
+def day_range(start_date: date, end_date: date):
+    """
+    Half-open bounds [start, end + 1 day) for filtering a DATETIME column by whole days.
+    Unlike DATE(col) BETWEEN start AND end, `col >= %s AND col < %s` can use an index on col.
+    """
+    return start_date, end_date + timedelta(days=1)
+
+# Totals of a set of Workout_Logs per (user, day, category, muscle), scaled by a sign so the same query adds or
+# subtracts logs from Workout_Daily_Rollup. Rows whose count drops to zero are deleted afterwards.
+_ROLLUP_UPSERT = """
+    INSERT INTO Workout_Daily_Rollup
+        (user_id, day, category, primary_muscle, workout_count, total_sets, total_reps, total_volume)
+    SELECT wl.user_id, DATE(wl.date_logged), we.category, we.primary_muscle,
+           %s * COUNT(*), %s * COALESCE(SUM(wl.sets), 0), %s * COALESCE(SUM(wl.reps), 0),
+           %s * COALESCE(SUM(wl.sets * wl.reps * wl.weight), 0)
+    FROM Workout_Logs wl
+    JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
+    WHERE {where}
+    GROUP BY wl.user_id, DATE(wl.date_logged), we.category, we.primary_muscle
+    ON DUPLICATE KEY UPDATE
+        workout_count = workout_count + VALUES(workout_count),
+        total_sets = total_sets + VALUES(total_sets),
+        total_reps = total_reps + VALUES(total_reps),
+        total_volume = total_volume + VALUES(total_volume)
+"""
+
+# Raises Personal_Records with a set of Workout_Logs, oldest first, so a tie keeps the record set first. MySQL
+# applies the assignments left to right: each *_at column is compared against the record before it is raised.
+_RECORDS_UPSERT = """
+    INSERT INTO Personal_Records
+        (user_id, exercise_id, best_weight, best_weight_at, best_e1rm, best_e1rm_at, best_volume, best_volume_at)
+    SELECT wl.user_id, wl.exercise_id, wl.weight, wl.date_logged,
+           IF(wl.reps = 1, wl.weight, wl.weight * (1 + wl.reps / 30e0)), wl.date_logged,
+           COALESCE(wl.sets * wl.reps * wl.weight, 0), wl.date_logged
+    FROM Workout_Logs wl
+    WHERE {where} AND wl.weight > 0 AND wl.reps > 0
+    ORDER BY wl.date_logged, wl.log_id
+    ON DUPLICATE KEY UPDATE
+        best_weight_at = IF(VALUES(best_weight) > best_weight, VALUES(best_weight_at), best_weight_at),
+        best_weight = GREATEST(best_weight, VALUES(best_weight)),
+        best_e1rm_at = IF(VALUES(best_e1rm) > best_e1rm, VALUES(best_e1rm_at), best_e1rm_at),
+        best_e1rm = GREATEST(best_e1rm, VALUES(best_e1rm)),
+        best_volume_at = IF(VALUES(best_volume) > best_volume, VALUES(best_volume_at), best_volume_at),
+        best_volume = GREATEST(best_volume, VALUES(best_volume))
+"""
+
+# Recomputes current_streak, longest_streak and last_streak_update from the logs: each run of consecutive
+# workout days shares day - row_number, so grouping on that gives the runs ("gaps and islands").
+_STREAK_REBUILD = """
+    UPDATE Users u
+    LEFT JOIN (
+        WITH days AS (
+            SELECT DISTINCT user_id, DATE(date_logged) AS day FROM Workout_Logs {where}
+        ), runs AS (
+            SELECT user_id, COUNT(*) AS length, MAX(day) AS last_day
+            FROM (
+                SELECT user_id, day,
+                       DATE_SUB(day, INTERVAL ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) DAY) AS run
+                FROM days
+            ) islands
+            GROUP BY user_id, run
+        )
+        SELECT user_id, length, last_day, longest
+        FROM (
+            SELECT user_id, length, last_day,
+                   MAX(length) OVER (PARTITION BY user_id) AS longest,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS latest
+            FROM runs
+        ) ranked
+        WHERE latest = 1
+    ) s ON s.user_id = u.user_id
+    SET u.current_streak = COALESCE(s.length, 0),
+        u.longest_streak = COALESCE(s.longest, 0),
+        u.last_streak_update = s.last_day
+    {user_filter}
+"""
+
 class Database:
     def __init__(self, connection):
         self.conn = connection
-        # Use dictionary=True to return query results as dictionaries instead of tuples
-        self.cursor = self.conn.cursor(dictionary=True)
+        # Use dictionary=True to return query results as dictionaries instead of tuples.
+        # Statements are timed into the current request's QueryStats (see app/query_stats.py).
+        self.cursor = InstrumentedCursor(self.conn.cursor(dictionary=True))
+        # Unit of work state, see transaction()
+        self._tx_depth = 0
+        self._after_commit: List[Callable[[], Any]] = []
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several write methods into one atomic transaction:
+
+            with db.transaction():
+                plan_id = db.create_plan(...)
+                db.create_plan_days(plan_id, ...)
+
+        Inside the block the methods' own commits are deferred. The outermost block commits once on
+        success, or rolls back everything if it raises. on_commit() callbacks run only after the commit.
+        """
+        outermost = self._tx_depth == 0
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if outermost:
+                self._after_commit.clear()
+                self.rollback()
+            raise
+        self._tx_depth -= 1
+        if outermost:
+            self._commit()
+
+    def on_commit(self, callback: Callable[[], Any]):
+        """Run callback (e.g. a cache invalidation) once the current work is committed; immediately outside transaction()."""
+        if self._tx_depth:
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    def _commit(self):
+        """Commit, unless a transaction() block is open; then its outermost block commits."""
+        if self._tx_depth:
+            return
+        callbacks, self._after_commit = self._after_commit, []
+        self.conn.commit()
+        for callback in callbacks:
+            callback()
+
+    def _rollback(self):
+        """Roll back a failed write, unless a transaction() block is open; then the block rolls back as a whole."""
+        if not self._tx_depth:
+            self.conn.rollback()
 
     def clear_all_tables(self):
         """Clear all data from tables in the correct order to avoid foreign key constraints."""
@@ -53,6 +205,9 @@ class Database:
             self.cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
 
             # Clear tables in reverse order of dependency
+            self.cursor.execute("DELETE FROM Idempotency_Keys")
+            self.cursor.execute("DELETE FROM Workout_Daily_Rollup")
+            self.cursor.execute("DELETE FROM Personal_Records")
             self.cursor.execute("DELETE FROM Workout_Logs")
             self.cursor.execute("DELETE FROM Weight_History")
             self.cursor.execute("DELETE FROM AI_Recommendations")
@@ -71,12 +226,20 @@ class Database:
             self.cursor.execute("ALTER TABLE Plans AUTO_INCREMENT = 1")
             self.cursor.execute("ALTER TABLE Workout_Exercises AUTO_INCREMENT = 1")
             self.cursor.execute("ALTER TABLE Users AUTO_INCREMENT = 1")
+            # Last, since the deletes above are recorded in it by triggers
+            self.cursor.execute("DELETE FROM Change_Log")
+            self.cursor.execute("ALTER TABLE Change_Log AUTO_INCREMENT = 1")
+            self.cursor.execute("DELETE FROM Change_Log_Locks")
 
             # Re-enable foreign key checks
             self.cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
-            self.conn.commit()
+            self._commit()
+            user_id_cache.clear()
+            user_profile_cache.clear()
+            exercise_catalog.invalidate()
+            stats_cache.clear()
         except Exception as e:
-            self.conn.rollback()
+            self._rollback()
             logger.error(f"Failed to clear tables: {e}")
             raise
 
@@ -88,7 +251,7 @@ class Database:
                 "INSERT INTO Users (firebase_uid, email) VALUES (%s, %s) ON DUPLICATE KEY UPDATE email=%s",
                 (firebase_uid, email, email)
             )
-            self.conn.commit()
+            self._commit()
             logger.info(f"Selecting user_id for firebase_uid={firebase_uid}")
             self.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
             result = self.cursor.fetchone()
@@ -97,6 +260,11 @@ class Database:
             # Access user_id as a dictionary key since cursor returns dicts
             user_id = result["user_id"]
             logger.info(f"Retrieved user_id={user_id} for firebase_uid={firebase_uid}")
+
+            def refresh_caches():
+                user_id_cache.set(firebase_uid, user_id)
+                invalidate_user_cache(user_id)
+            self.on_commit(refresh_caches)
             return user_id
         except Exception as e:
             logger.error(f"Error in sync_user: {str(e)}")
@@ -111,31 +279,388 @@ class Database:
                 "fitness_goal=%s, experience_level=%s, bio=%s WHERE user_id=%s",
                 (username, date_of_birth, gender, weight_kg, height_cm, fitness_goal, experience_level, bio, user_id)
             )
-            self.conn.commit()
+            self._commit()
         except Exception as e:
-            self.conn.rollback()
+            self._rollback()
             raise
+        self.on_commit(lambda: invalidate_user_cache(user_id))
 
     def get_user_by_firebase_uid(self, firebase_uid: str):
         """Fetch user details by Firebase UID, returning a dictionary."""
+        user_id = user_id_cache.get(firebase_uid)
+        if user_id is not None:
+            user = user_profile_cache.get(user_id)
+            if user is not None:
+                return dict(user)
         try:
             self.cursor.execute("SELECT * FROM Users WHERE firebase_uid = %s", (firebase_uid,))
-            return self.cursor.fetchone()
+            user = self.cursor.fetchone()
         except mysql.connector.Error as err:
             logger.error(f"Error querying user by firebase_uid: {err}")
             raise
+        if user is not None:
+            user_id_cache.set(firebase_uid, user["user_id"])
+            user_profile_cache.set(user["user_id"], dict(user))
+        return user
+
+    def get_user_id_by_firebase_uid(self, firebase_uid: str) -> Optional[int]:
+        """Resolve a Firebase UID to the internal user_id, or None if the user has not been synced."""
+        user_id = user_id_cache.get(firebase_uid)
+        if user_id is not None:
+            return user_id
+        self.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
+        result = self.cursor.fetchone()
+        if result is None:
+            # Misses are not cached: the user may be synced a moment later
+            return None
+        user_id_cache.set(firebase_uid, result["user_id"])
+        return result["user_id"]
 
     #workouts:
     def log_workout(self, user_id: int, plan_exercise_id: Optional[int], exercise_id: int, sets: int, reps: int, duration_minutes: Optional[float], weight: Optional[float], notes: Optional[str]) -> int:
         """Log a workout for a user, optionally tied to a plan exercise, and return the workout log ID."""
         query = """
-            INSERT INTO Workout_Logs (user_id, plan_exercise_id, exercise_id, sets, reps, duration_minutes, weight, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO Workout_Logs (user_id, date_logged, plan_exercise_id, exercise_id, sets, reps, duration_minutes, weight, notes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        values = (user_id, plan_exercise_id, exercise_id, sets, reps, duration_minutes, weight, notes)
-        self.cursor.execute(query, values)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        logged_at = _now()
+        values = (user_id, logged_at, plan_exercise_id, exercise_id, sets, reps, duration_minutes, weight, notes)
+        try:
+            self.cursor.execute(query, values)
+            log_id = self.cursor.lastrowid
+            self._apply_rollup(user_id, [log_id], 1)
+            self._raise_personal_records(user_id, [log_id])
+            self._advance_streak(user_id, logged_at.date())
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        self.on_commit(lambda: invalidate_user_cache(user_id))
+        self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+        return log_id
+
+    def log_workouts(self, user_id: int, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        Log many workouts for a user in one transaction with one commit; returns the new log IDs in entry
+        order. Each entry has the log_workout arguments other than user_id. Each row is inserted on its own
+        and its ID taken from lastrowid, since a multi-row INSERT does not promise consecutive IDs.
+        """
+        if not entries:
+            return []
+        columns = ["plan_exercise_id", "exercise_id", "sets", "reps", "duration_minutes", "weight", "notes"]
+        logged_at = _now()
+        log_ids = []
+        with self.transaction():
+            for entry in entries:
+                self.cursor.execute(
+                    """
+                    INSERT INTO Workout_Logs (user_id, date_logged, plan_exercise_id, exercise_id, sets, reps, duration_minutes, weight, notes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    (user_id, logged_at, *(entry.get(name) for name in columns))
+                )
+                log_ids.append(self.cursor.lastrowid)
+            self._apply_rollup(user_id, log_ids, 1)
+            self._raise_personal_records(user_id, log_ids)
+            self._advance_streak(user_id, logged_at.date())
+            self.on_commit(lambda: invalidate_user_cache(user_id))
+            self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+        return log_ids
+
+    # Columns GET /workouts/logs can project; exercise_name is the only one that needs the exercise join
+    WORKOUT_LOG_FIELDS = {
+        "log_id": "wl.log_id",
+        "user_id": "wl.user_id",
+        "exercise_id": "wl.exercise_id",
+        "exercise_name": "we.exercise_name",
+        "date_logged": "wl.date_logged",
+        "sets": "wl.sets",
+        "reps": "wl.reps",
+        "duration_minutes": "wl.duration_minutes",
+        "weight": "wl.weight",
+        "notes": "wl.notes",
+    }
+
+    def get_workout_logs(self, user_id: int, limit: int, before: Optional[tuple] = None,
+                         start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         exercise_id: Optional[int] = None, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of a user's workout logs, newest first, ordered by (date_logged, log_id) DESC.
+        `before` is the (date_logged, log_id) of the last row of the previous page. The page walks
+        idx_logs_user_date backwards (InnoDB appends log_id to it), so its cost does not grow with history.
+        """
+        fields = fields or list(self.WORKOUT_LOG_FIELDS)
+        # The cursor columns are always selected
+        columns = dict.fromkeys(["log_id", "date_logged", *fields])
+        select = ", ".join(f"{self.WORKOUT_LOG_FIELDS[name]} AS {name}" for name in columns)
+        join = "JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id" if "exercise_name" in columns else ""
+
+        conditions = ["wl.user_id = %s"]
+        params: List[Any] = [user_id]
+        if start_date is not None:
+            conditions.append("wl.date_logged >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("wl.date_logged < %s")
+            params.append(end_date + timedelta(days=1))
+        if exercise_id is not None:
+            conditions.append("wl.exercise_id = %s")
+            params.append(exercise_id)
+        if before is not None:
+            conditions.append("(wl.date_logged < %s OR (wl.date_logged = %s AND wl.log_id < %s))")
+            params.extend([before[0], before[0], before[1]])
+
+        self.cursor.execute(
+            f"""
+            SELECT {select}
+            FROM Workout_Logs wl
+            {join}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY wl.date_logged DESC, wl.log_id DESC
+            LIMIT %s
+            """,
+            (*params, limit)
+        )
+        return self.cursor.fetchall()
+
+    def workout_log_exists(self, log_id: int, user_id: int) -> bool:
+        """Check that a workout log exists and belongs to the user."""
+        self.cursor.execute(
+            "SELECT log_id FROM Workout_Logs WHERE log_id = %s AND user_id = %s",
+            (log_id, user_id)
+        )
+        return self.cursor.fetchone() is not None
+
+    def update_workout_log(self, log_id: int, user_id: int, updates: Dict[str, Any]):
+        """Apply a partial update to a user's workout log."""
+        allowed = {"sets", "reps", "duration_minutes", "weight", "notes"}
+        unknown = set(updates) - allowed
+        if unknown:
+            raise ValueError(f"Cannot update workout log fields: {', '.join(sorted(unknown))}")
+        update_fields = [f"{key} = %s" for key in updates.keys()]
+        update_values = list(updates.values())
+        update_values.extend([log_id, user_id])
+        query = f"""
+            UPDATE Workout_Logs
+            SET {', '.join(update_fields)}
+            WHERE log_id = %s AND user_id = %s
+        """
+        try:
+            # Swap the log's old totals in the rollup for the new ones
+            self._apply_rollup(user_id, [log_id], -1)
+            self.cursor.execute(query, update_values)
+            self._apply_rollup(user_id, [log_id], 1)
+            if updates.keys() & {"sets", "reps", "weight"}:
+                # The edit may lower a record this log held, so recompute the exercise's records
+                self._recompute_personal_records(user_id, self._log_exercise_id(log_id, user_id))
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+
+    def delete_workout_log(self, log_id: int, user_id: int):
+        """Delete a user's workout log."""
+        try:
+            self._apply_rollup(user_id, [log_id], -1)
+            self.cursor.execute(
+                "SELECT exercise_id, DATE(date_logged) AS day FROM Workout_Logs WHERE log_id = %s AND user_id = %s",
+                (log_id, user_id)
+            )
+            log = self.cursor.fetchone()
+            self.cursor.execute("DELETE FROM Workout_Logs WHERE log_id = %s AND user_id = %s", (log_id, user_id))
+            if log is not None:
+                self._recompute_personal_records(user_id, log["exercise_id"])
+                # Streaks count workout days, so only removing a day's last log can break or shorten a run
+                if self.count_workouts_on(user_id, log["day"]) == 0:
+                    self._recompute_streak(user_id)
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        self.on_commit(lambda: invalidate_user_cache(user_id))
+        self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+
+    def _apply_rollup(self, user_id: int, log_ids: List[int], sign: int):
+        """Add (sign=1) or subtract (sign=-1) a user's logs in Workout_Daily_Rollup. The caller commits."""
+        if not log_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(log_ids))
+        self.cursor.execute(
+            _ROLLUP_UPSERT.format(where=f"wl.user_id = %s AND wl.log_id IN ({placeholders})"),
+            (sign, sign, sign, sign, user_id, *log_ids)
+        )
+        if sign < 0:
+            self.cursor.execute(
+                "DELETE FROM Workout_Daily_Rollup WHERE user_id = %s AND workout_count <= 0",
+                (user_id,)
+            )
+
+    def rebuild_workout_rollup(self, user_id: Optional[int] = None) -> int:
+        """Recompute Workout_Daily_Rollup from the raw logs for one user (or everyone); returns the rows written."""
+        try:
+            if user_id is None:
+                self.cursor.execute("DELETE FROM Workout_Daily_Rollup")
+                self.cursor.execute(_ROLLUP_UPSERT.format(where="TRUE"), (1, 1, 1, 1))
+            else:
+                self.cursor.execute("DELETE FROM Workout_Daily_Rollup WHERE user_id = %s", (user_id,))
+                self.cursor.execute(_ROLLUP_UPSERT.format(where="wl.user_id = %s"), (1, 1, 1, 1, user_id))
+            rows = self.cursor.rowcount
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        if user_id is None:
+            self.on_commit(stats_cache.clear)
+        else:
+            self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+        return rows
+
+    def _log_exercise_id(self, log_id: int, user_id: int) -> Optional[int]:
+        self.cursor.execute("SELECT exercise_id FROM Workout_Logs WHERE log_id = %s AND user_id = %s", (log_id, user_id))
+        row = self.cursor.fetchone()
+        return row["exercise_id"] if row else None
+
+    def _raise_personal_records(self, user_id: int, log_ids: List[int]):
+        """Raise the user's Personal_Records with newly logged workouts. The caller commits."""
+        if not log_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(log_ids))
+        self.cursor.execute(
+            _RECORDS_UPSERT.format(where=f"wl.user_id = %s AND wl.log_id IN ({placeholders})"),
+            (user_id, *log_ids)
+        )
+
+    def _recompute_personal_records(self, user_id: int, exercise_id: int):
+        """Recompute one exercise's records from all of the user's logs of it. The caller commits."""
+        self.cursor.execute(
+            "DELETE FROM Personal_Records WHERE user_id = %s AND exercise_id = %s", (user_id, exercise_id)
+        )
+        self.cursor.execute(
+            _RECORDS_UPSERT.format(where="wl.user_id = %s AND wl.exercise_id = %s"), (user_id, exercise_id)
+        )
+
+    def rebuild_personal_records(self, user_id: int) -> int:
+        """Recompute all of a user's Personal_Records from their logs; returns the number of exercises with records."""
+        try:
+            self.cursor.execute("DELETE FROM Personal_Records WHERE user_id = %s", (user_id,))
+            self.cursor.execute(_RECORDS_UPSERT.format(where="wl.user_id = %s"), (user_id,))
+            self.cursor.execute("SELECT COUNT(*) AS count FROM Personal_Records WHERE user_id = %s", (user_id,))
+            count = self.cursor.fetchone()["count"]
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+        return count
+
+    def get_personal_records(self, user_id: int, exercise_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch the user's stored personal records, optionally for one exercise."""
+        query = """
+            SELECT pr.exercise_id, we.exercise_name, pr.best_weight, pr.best_weight_at, pr.best_e1rm, pr.best_e1rm_at,
+                   pr.best_volume, pr.best_volume_at
+            FROM Personal_Records pr
+            JOIN Workout_Exercises we ON pr.exercise_id = we.exercise_id
+            WHERE pr.user_id = %s
+        """
+        params = [user_id]
+        if exercise_id is not None:
+            query += " AND pr.exercise_id = %s"
+            params.append(exercise_id)
+        self.cursor.execute(query + " ORDER BY we.exercise_name", params)
+        return self.cursor.fetchall()
+
+    def stream_workout_logs(self, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                            exercise_id: Optional[int] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the user's workout logs in date order, with the exercise name, fetching batch_size rows at a time
+        so a long history is never held in memory at once. Consume it fully before running another query.
+        """
+        conditions, params = ["wl.user_id = %s"], [user_id]
+        if start_date is not None:
+            conditions.append("wl.date_logged >= %s")
+            params.append(day_range(start_date, start_date)[0])
+        if end_date is not None:
+            conditions.append("wl.date_logged < %s")
+            params.append(day_range(end_date, end_date)[1])
+        if exercise_id is not None:
+            conditions.append("wl.exercise_id = %s")
+            params.append(exercise_id)
+        self.cursor.execute(
+            f"""
+            SELECT wl.log_id, wl.exercise_id, we.exercise_name, wl.date_logged, wl.sets, wl.reps, wl.weight
+            FROM Workout_Logs wl
+            JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY wl.date_logged, wl.log_id
+            """,
+            params
+        )
+        while True:
+            rows = self.cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def count_workouts_on(self, user_id: int, day: date) -> int:
+        """Count the workouts a user logged on a given day."""
+        self.cursor.execute(
+            "SELECT COUNT(*) AS count FROM Workout_Logs WHERE user_id = %s AND date_logged >= %s AND date_logged < %s",
+            (user_id, *day_range(day, day))
+        )
+        return self.cursor.fetchone()["count"]
+
+    # Weight:
+    def log_weight(self, user_id: int, weight_kg: float, date_logged: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Record a weight entry, update the user's current weight and return the stored entry."""
+        try:
+            # If date_logged is not provided, the database will use CURRENT_TIMESTAMP
+            if date_logged:
+                self.cursor.execute(
+                    "INSERT INTO Weight_History (user_id, date_logged, weight_kg) VALUES (%s, %s, %s)",
+                    (user_id, date_logged, weight_kg)
+                )
+            else:
+                self.cursor.execute(
+                    "INSERT INTO Weight_History (user_id, weight_kg) VALUES (%s, %s)",
+                    (user_id, weight_kg)
+                )
+            # Update the current weight in the Users table
+            self.cursor.execute(
+                "UPDATE Users SET weight_kg = %s, last_updated = CURRENT_TIMESTAMP WHERE user_id = %s",
+                (weight_kg, user_id)
+            )
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        self.on_commit(lambda: invalidate_user_cache(user_id))
+        self.on_commit(lambda: stats_cache.invalidate_user(user_id))
+
+        # Fetch the inserted entry (the latest entry for this user on that date)
+        fetch_date = date_logged.date() if date_logged else date.today()
+        self.cursor.execute(
+            """
+            SELECT DATE(date_logged) AS date, weight_kg AS weight
+            FROM Weight_History
+            WHERE user_id = %s AND date_logged >= %s AND date_logged < %s
+            ORDER BY date_logged DESC
+            LIMIT 1
+            """,
+            (user_id, *day_range(fetch_date, fetch_date))
+        )
+        return self.cursor.fetchone()
+
+    def get_weight_history(self, user_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Fetch the daily average weight within a date range."""
+        self.cursor.execute("""
+            SELECT DATE(date_logged) AS date, AVG(weight_kg) AS weight
+            FROM Weight_History
+            WHERE user_id = %s AND date_logged >= %s AND date_logged < %s
+            GROUP BY DATE(date_logged)
+            ORDER BY DATE(date_logged)
+        """, (user_id, *day_range(start_date, end_date)))
+        return self.cursor.fetchall()
 
     # Plans:
     def get_plans(self, user_id: int) -> List[Dict[str, Any]]:
@@ -165,7 +690,7 @@ class Database:
             VALUES (%s, %s, %s, %s, %s)
         """
         self.cursor.execute(query, (user_id, name, description, days_per_week, preferred_days))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
 
     def update_plan(self, plan_id: int, name: str, description: Optional[str], days_per_week: int, preferred_days: Optional[str]):
@@ -176,13 +701,19 @@ class Database:
             WHERE plan_id = %s
         """
         self.cursor.execute(query, (name, description, days_per_week, preferred_days, plan_id))
-        self.conn.commit()
+        self._commit()
+
+    def set_active_plan(self, user_id: int, plan_id: int):
+        """Mark one plan as active and deactivate all of the user's other plans."""
+        self.cursor.execute("UPDATE Plans SET is_active = FALSE WHERE user_id = %s", (user_id,))
+        self.cursor.execute("UPDATE Plans SET is_active = TRUE WHERE plan_id = %s", (plan_id,))
+        self._commit()
 
     def delete_plan(self, plan_id: int):
         """Delete a plan (cascades to days and exercises)."""
         query = "DELETE FROM Plans WHERE plan_id = %s"
         self.cursor.execute(query, (plan_id,))
-        self.conn.commit()
+        self._commit()
 
     # Methods for Plan Days
     def get_plan_days(self, plan_id: int) -> List[Dict[str, Any]]:
@@ -212,9 +743,26 @@ class Database:
             VALUES (%s, %s, %s)
         """
         self.cursor.execute(query, (plan_id, day_number, description))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
 
+    def create_plan_days(self, plan_id: int, days: List[tuple]) -> Dict[int, int]:
+        """
+        Create many (day_number, description) days for a plan in one batched INSERT.
+        Returns {day_number: plan_day_id}, read back from the table rather than assumed from
+        consecutive auto-increment values.
+        """
+        if not days:
+            return {}
+        self.cursor.executemany(
+            "INSERT INTO Plan_Days (plan_id, day_number, description) VALUES (%s, %s, %s)",
+            [(plan_id, day_number, description) for day_number, description in days]
+        )
+        self.cursor.execute("SELECT plan_day_id, day_number FROM Plan_Days WHERE plan_id = %s", (plan_id,))
+        day_ids = {row["day_number"]: row["plan_day_id"] for row in self.cursor.fetchall()}
+        self._commit()
+        return day_ids
+
     def update_plan_day(self, plan_day_id: int, day_number: int, description: Optional[str]):
         """Update an existing plan day."""
         query = """
@@ -223,13 +771,13 @@ class Database:
             WHERE plan_day_id = %s
         """
         self.cursor.execute(query, (day_number, description, plan_day_id))
-        self.conn.commit()
+        self._commit()
 
     def delete_plan_day(self, plan_day_id: int):
         """Delete a plan day (cascades to exercises)."""
         query = "DELETE FROM Plan_Days WHERE plan_day_id = %s"
         self.cursor.execute(query, (plan_day_id,))
-        self.conn.commit()
+        self._commit()
 
     # Methods for Plan Exercises
     def get_plan_exercises(self, plan_day_id: int) -> List[Dict[str, Any]]:
@@ -247,6 +795,116 @@ class Database:
         self.cursor.execute(query, (plan_day_id,))
         return self.cursor.fetchall()
 
+    def resolve_plan_path(self, firebase_uid: str, plan_id: int, plan_day_id: Optional[int] = None,
+                          plan_exercise_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Check user -> plan -> day -> plan exercise ownership in one query.
+        Returns None for an unknown user, else {user_id, plan_id, plan_day_id, plan_exercise_id, exercise_id}
+        where each level is None unless it exists and belongs to the level above it.
+        """
+        self.cursor.execute(
+            """
+            SELECT u.user_id, p.plan_id, pd.plan_day_id, pe.plan_exercise_id, pe.exercise_id
+            FROM Users u
+            LEFT JOIN Plans p ON p.plan_id = %s AND p.user_id = u.user_id
+            LEFT JOIN Plan_Days pd ON pd.plan_day_id = %s AND pd.plan_id = p.plan_id
+            LEFT JOIN Plan_Exercises pe ON pe.plan_exercise_id = %s AND pe.plan_day_id = pd.plan_day_id
+            WHERE u.firebase_uid = %s
+            """,
+            (plan_id, plan_day_id, plan_exercise_id, firebase_uid)
+        )
+        result = self.cursor.fetchone()
+        if result is not None:
+            user_id_cache.set(firebase_uid, result["user_id"])
+        return result
+
+    def get_owned_plan_exercises(self, user_id: int, plan_exercise_ids: List[int]) -> Dict[int, int]:
+        """{plan_exercise_id: exercise_id} for the given plan exercises that are in one of the user's plans."""
+        if not plan_exercise_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(plan_exercise_ids))
+        self.cursor.execute(
+            f"""
+            SELECT pe.plan_exercise_id, pe.exercise_id
+            FROM Plan_Exercises pe
+            JOIN Plan_Days pd ON pe.plan_day_id = pd.plan_day_id
+            JOIN Plans p ON pd.plan_id = p.plan_id
+            WHERE p.user_id = %s AND pe.plan_exercise_id IN ({placeholders})
+            """,
+            (user_id, *plan_exercise_ids)
+        )
+        return {row["plan_exercise_id"]: row["exercise_id"] for row in self.cursor.fetchall()}
+
+    def get_plan_trees(self, user_id: int, plan_id: Optional[int] = None, include_exercises: bool = True) -> List[Dict[str, Any]]:
+        """
+        Fetch a user's plans (or just plan_id, if it is theirs) with their days, and optionally each day's
+        exercises, from one joined query. Each plan gets a "days" list and each day an "exercises" list.
+        """
+        exercise_columns = """,
+               pe.plan_exercise_id, pe.exercise_id, we.exercise_name, we.category, we.primary_muscle,
+               we.initial_recommended_sets AS recommended_sets,
+               we.initial_recommended_reps AS recommended_reps,
+               we.initial_recommended_time AS recommended_duration""" if include_exercises else ""
+        exercise_joins = """
+            LEFT JOIN Plan_Exercises pe ON pe.plan_day_id = pd.plan_day_id
+            LEFT JOIN Workout_Exercises we ON we.exercise_id = pe.exercise_id""" if include_exercises else ""
+        query = f"""
+            SELECT p.plan_id, p.user_id, p.name, p.description, p.days_per_week, p.preferred_days, p.is_active,
+                   pd.plan_day_id, pd.day_number, pd.description AS day_description{exercise_columns}
+            FROM Plans p
+            LEFT JOIN Plan_Days pd ON pd.plan_id = p.plan_id{exercise_joins}
+            WHERE p.user_id = %s {"AND p.plan_id = %s" if plan_id is not None else ""}
+            ORDER BY p.plan_id, pd.day_number, pd.plan_day_id{", pe.plan_exercise_id" if include_exercises else ""}
+        """
+        self.cursor.execute(query, (user_id,) if plan_id is None else (user_id, plan_id))
+
+        plans: Dict[int, Dict[str, Any]] = {}
+        days: Dict[int, Dict[str, Any]] = {}
+        for row in self.cursor.fetchall():
+            plan = plans.get(row["plan_id"])
+            if plan is None:
+                plan = plans[row["plan_id"]] = {
+                    "plan_id": row["plan_id"],
+                    "user_id": row["user_id"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "days_per_week": row["days_per_week"],
+                    "preferred_days": row["preferred_days"],
+                    "is_active": row["is_active"],
+                    "days": [],
+                }
+            if row["plan_day_id"] is None:
+                continue
+            day = days.get(row["plan_day_id"])
+            if day is None:
+                day = days[row["plan_day_id"]] = {
+                    "plan_day_id": row["plan_day_id"],
+                    "plan_id": row["plan_id"],
+                    "day_number": row["day_number"],
+                    "description": row["day_description"],
+                }
+                if include_exercises:
+                    day["exercises"] = []
+                plan["days"].append(day)
+            if include_exercises and row["plan_exercise_id"] is not None:
+                day["exercises"].append({
+                    "plan_exercise_id": row["plan_exercise_id"],
+                    "plan_day_id": row["plan_day_id"],
+                    "exercise_id": row["exercise_id"],
+                    "exercise_name": row["exercise_name"],
+                    "category": row["category"],
+                    "primary_muscle": row["primary_muscle"],
+                    "recommended_sets": row["recommended_sets"],
+                    "recommended_reps": row["recommended_reps"],
+                    "recommended_duration": row["recommended_duration"],
+                })
+        return list(plans.values())
+
+    def get_plan_tree(self, plan_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch one of the user's plans with its days and exercises in one query, or None if it is not theirs."""
+        trees = self.get_plan_trees(user_id, plan_id=plan_id)
+        return trees[0] if trees else None
+
     def add_exercise_to_day(self, plan_day_id: int, exercise_id: int) -> int:
         """Add an exercise to a specific day and return its ID."""
         query = """
@@ -254,28 +912,51 @@ class Database:
             VALUES (%s, %s)
         """
         self.cursor.execute(query, (plan_day_id, exercise_id))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
 
+    def add_exercises_to_days(self, rows: List[tuple]):
+        """Add many (plan_day_id, exercise_id) pairs in one batched INSERT."""
+        if not rows:
+            return
+        self.cursor.executemany("INSERT INTO Plan_Exercises (plan_day_id, exercise_id) VALUES (%s, %s)", rows)
+        self._commit()
+
     def remove_exercise_from_day(self, plan_exercise_id: int):
         """Remove an exercise from a day."""
         query = "DELETE FROM Plan_Exercises WHERE plan_exercise_id = %s"
         self.cursor.execute(query, (plan_exercise_id,))
-        self.conn.commit()
+        self._commit()
+
+    def get_exercises(self) -> List[Dict[str, Any]]:
+        """Fetch the full exercise catalog (served from the in-process catalog cache; treat rows as read-only)."""
+        return exercise_catalog.snapshot(self).rows
 
     def get_exercise(self, exercise_id: int) -> Optional[Dict[str, Any]]:
-        """Fetch detailed info about an exercise, returning a dictionary or None."""
-        query = """
-        SELECT exercise_id, exercise_name, category, primary_muscle,
-               initial_recommended_sets, initial_recommended_reps, initial_recommended_time
-        FROM Workout_Exercises
-        WHERE exercise_id = %s
-        """
-        self.cursor.execute(query, (exercise_id,))
-        return self.cursor.fetchone()
+        """Fetch detailed info about an exercise from the catalog cache, returning a dictionary or None."""
+        return exercise_catalog.get(self, exercise_id)
+
+    def find_exercise_ids(self, exercise_ids: List[int]) -> set:
+        """The subset of exercise_ids that exist in the catalog, checked with at most one query."""
+        return exercise_catalog.existing_ids(self, exercise_ids)
+
+    def get_exercise_catalog(self):
+        """The current CatalogSnapshot, with the GET /workouts responses pre-serialized."""
+        return exercise_catalog.snapshot(self)
+
+    def commit(self):
+        """Commit the current transaction."""
+        self.conn.commit()
+
+    def rollback(self):
+        """Roll back the current transaction, logging instead of raising if the connection is already broken."""
+        try:
+            self.conn.rollback()
+        except Exception as e:
+            logger.error(f"Error rolling back transaction: {e}")
 
     def close(self):
-        """Close the database cursor and connection safely."""
+        """Close the cursor and return the connection to the pool."""
         try:
             self.cursor.close()
             self.conn.close()
@@ -304,40 +985,94 @@ class Database:
         """, (user_id, weeks))
         return self.cursor.fetchall()
 
+    def get_category_distribution(self, user_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Fetch workout type (category) distribution from the daily rollup."""
+        self.cursor.execute("""
+            SELECT category AS type, CAST(SUM(workout_count) AS SIGNED) AS count
+            FROM Workout_Daily_Rollup
+            WHERE user_id = %s AND day BETWEEN %s AND %s
+            GROUP BY category
+        """, (user_id, start_date, end_date))
+        return self.cursor.fetchall()
+
     def get_muscle_group_distribution(self, user_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
-        """Fetch muscle group distribution from workout logs."""
+        """Fetch muscle group distribution from the daily rollup."""
         self.cursor.execute("""
-            SELECT we.primary_muscle AS muscle_group, COUNT(*) AS count
-            FROM Workout_Logs wl
-            JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
-            WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-            GROUP BY we.primary_muscle
+            SELECT primary_muscle AS muscle_group, CAST(SUM(workout_count) AS SIGNED) AS count
+            FROM Workout_Daily_Rollup
+            WHERE user_id = %s AND day BETWEEN %s AND %s
+            GROUP BY primary_muscle
         """, (user_id, start_date, end_date))
         return self.cursor.fetchall()
 
     def get_workout_frequency(self, user_id: int, start_date: date, end_date: date, granularity: str = "weekly") -> List[Dict[str, Any]]:
-        """Fetch workout frequency trend."""
+        """Fetch workout frequency trend from the daily rollup."""
         if granularity == "weekly":
             self.cursor.execute("""
-                SELECT YEAR(wl.date_logged) AS year, WEEK(wl.date_logged) AS week, COUNT(*) AS count
-                FROM Workout_Logs wl
-                WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-                GROUP BY YEAR(wl.date_logged), WEEK(wl.date_logged)
+                SELECT YEAR(day) AS year, WEEK(day) AS week, CAST(SUM(workout_count) AS SIGNED) AS count
+                FROM Workout_Daily_Rollup
+                WHERE user_id = %s AND day BETWEEN %s AND %s
+                GROUP BY YEAR(day), WEEK(day)
             """, (user_id, start_date, end_date))
         else:  # daily
             self.cursor.execute("""
-                SELECT DATE(wl.date_logged) AS date, COUNT(*) AS count
-                FROM Workout_Logs wl
-                WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-                GROUP BY DATE(wl.date_logged)
+                SELECT day AS date, CAST(SUM(workout_count) AS SIGNED) AS count
+                FROM Workout_Daily_Rollup
+                WHERE user_id = %s AND day BETWEEN %s AND %s
+                GROUP BY day
             """, (user_id, start_date, end_date))
         return self.cursor.fetchall()
     
+    def get_stats_dashboard(self, user_id: int, start_date: date, end_date: date,
+                            granularity: str = "daily") -> Dict[str, List[Dict[str, Any]]]:
+        """
+        The category and muscle group distributions and the workout frequency from the daily rollup, and the
+        daily average weight, read in one statement: each part of the UNION tags its rows with their series.
+        """
+        if granularity == "weekly":
+            frequency = """
+                SELECT 'frequency', NULL, NULL, YEAR(day), WEEK(day), CAST(SUM(workout_count) AS SIGNED), NULL
+                FROM Workout_Daily_Rollup
+                WHERE user_id = %s AND day BETWEEN %s AND %s
+                GROUP BY YEAR(day), WEEK(day)
+            """
+        else:  # daily
+            frequency = """
+                SELECT 'frequency', NULL, day, NULL, NULL, CAST(SUM(workout_count) AS SIGNED), NULL
+                FROM Workout_Daily_Rollup
+                WHERE user_id = %s AND day BETWEEN %s AND %s
+                GROUP BY day
+            """
+        self.cursor.execute(f"""
+            SELECT 'type' AS series, category AS label, NULL AS date, NULL AS year, NULL AS week,
+                   CAST(SUM(workout_count) AS SIGNED) AS count, NULL AS weight
+            FROM Workout_Daily_Rollup
+            WHERE user_id = %s AND day BETWEEN %s AND %s
+            GROUP BY category
+            UNION ALL
+            SELECT 'muscle_group', primary_muscle, NULL, NULL, NULL, CAST(SUM(workout_count) AS SIGNED), NULL
+            FROM Workout_Daily_Rollup
+            WHERE user_id = %s AND day BETWEEN %s AND %s
+            GROUP BY primary_muscle
+            UNION ALL
+            {frequency}
+            UNION ALL
+            SELECT 'weight', NULL, DATE(date_logged), NULL, NULL, NULL, AVG(weight_kg)
+            FROM Weight_History
+            WHERE user_id = %s AND date_logged >= %s AND date_logged < %s
+            GROUP BY DATE(date_logged)
+            ORDER BY series, date, year, week
+        """, (user_id, start_date, end_date) * 3 + (user_id, *day_range(start_date, end_date)))
+        series = {"type": [], "muscle_group": [], "frequency": [], "weight": []}
+        for row in self.cursor.fetchall():
+            series[row["series"]].append(row)
+        return series
+
     # For Streaks:
     def get_user_streak(self, user_id: int) -> dict:
-        """Fetch the user's current streak and last update date."""
+        """Fetch the user's stored streak: the run ending on last_streak_update (their latest workout day) and the longest run."""
         self.cursor.execute(
-            "SELECT current_streak, last_streak_update FROM Users WHERE user_id = %s",
+            "SELECT current_streak, longest_streak, last_streak_update FROM Users WHERE user_id = %s",
             (user_id,)
         )
         result = self.cursor.fetchone()
@@ -345,16 +1080,94 @@ class Database:
             raise ValueError(f"User with user_id {user_id} not found")
         return dict(result)
 
-    def update_user_streak(self, user_id: int, streak: int, last_update: date):
-        """Update the user's streak and last update date."""
-        # Convert last_update to a string in 'YYYY-MM-DD' format
-        last_update_str = last_update.strftime('%Y-%m-%d')
+    def _advance_streak(self, user_id: int, today: date):
+        """
+        Count a workout logged today in the user's streak: it extends a run that ended yesterday, starts a new
+        one after a gap, and changes nothing on a day already counted. today is the new log's day, taken from
+        the app server's clock like its date_logged (see _now()), so a recompute from the logs agrees with it.
+        The caller commits and then invalidates the cached profile.
+        """
+        # MySQL applies SET assignments left to right, so longest_streak sees the new current_streak
         self.cursor.execute(
-            "UPDATE Users SET current_streak = %s, last_streak_update = %s WHERE user_id = %s",
-            (streak, last_update_str, user_id)
+            """
+            UPDATE Users
+            SET current_streak = CASE
+                    WHEN last_streak_update = %s THEN current_streak
+                    WHEN last_streak_update = %s THEN current_streak + 1
+                    ELSE 1
+                END,
+                longest_streak = GREATEST(longest_streak, current_streak),
+                last_streak_update = %s
+            WHERE user_id = %s AND (last_streak_update IS NULL OR last_streak_update <= %s)
+            """,
+            (today, today - timedelta(days=1), today, user_id, today)
         )
-        self.conn.commit()
+
+    def _recompute_streak(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute one user's streaks, or every user's, from their workout days; returns the users updated.
+        The caller commits and then invalidates the cached profiles.
+        """
+        if user_id is None:
+            self.cursor.execute(_STREAK_REBUILD.format(where="", user_filter=""))
+        else:
+            self.cursor.execute(
+                _STREAK_REBUILD.format(where="WHERE user_id = %s", user_filter="WHERE u.user_id = %s"),
+                (user_id, user_id)
+            )
+        return self.cursor.rowcount
+
+    def rebuild_streaks(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute one user's streaks, or every user's in a single statement, from their workout days.
+        Commits unless inside transaction(); returns the number of users updated.
+        """
+        try:
+            updated = self._recompute_streak(user_id)
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        if user_id is None:
+            self.on_commit(user_profile_cache.clear)
+        else:
+            self.on_commit(lambda: invalidate_user_cache(user_id))
+        return updated
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_db_connection,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    idle_timeout=settings.DB_POOL_IDLE_TIMEOUT,
+                    ping_interval=settings.DB_POOL_PING_INTERVAL,
+                )
+    return _pool
+
+def open_database() -> "Database":
+    """Create a Database on a connection leased from the pool. The caller must close() it."""
+    return Database(get_pool().acquire())
 
 def get_database():
-    """Factory function to create a Database instance."""
-    return Database(get_db_connection())
\ No newline at end of file
+    """
+    Request-scoped FastAPI dependency.
+    Commits when the request succeeds, rolls back when it raises, and always returns the connection to the pool.
+    """
+    db = open_database()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
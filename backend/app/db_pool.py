@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available before the checkout timeout."""
+
+
+class PooledConnection:
+    """Thin proxy around a physical connection; close() returns it to the pool instead of closing it."""
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise AttributeError(f"Connection already returned to the pool (accessing '{name}')")
+        return getattr(conn, name)
+
+    def close(self):
+        """Hand the physical connection back to the pool. Safe to call more than once."""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of physical MySQL connections.
+    Connections are created lazily up to max_size, health-checked on checkout and reused LIFO
+    so the most recently used (and therefore most likely alive) connection is handed out first.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10.0, idle_timeout: float = 50.0, ping_interval: float = 10.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, last_used) pairs
+        self._size = 0  # physical connections open or being opened
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def prefill(self):
+        """Open connections until the pool holds at least min_size of them."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def acquire(self) -> PooledConnection:
+        """Lease a healthy connection, opening a new one if the pool is below max_size."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn, last_used = None, None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if conn is None:
+                conn = self._open()
+            elif not self._is_healthy(conn, last_used):
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a physical connection to the pool, rolling back any transaction left open."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding connection that failed to reset on release: {e}")
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._trim_idle()
+            self._cond.notify()
+
+    def close(self):
+        """Close every idle connection. Leased connections are closed when they are released."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self.min_size = 0
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool size, utilization and checkout wait times."""
+        with self._cond:
+            idle = len(self._idle)
+            in_use = self._size - idle
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "utilization": in_use / self.max_size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "wait_time_total_ms": self._wait_total * 1000,
+                "wait_time_avg_ms": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "wait_time_max_ms": self._wait_max * 1000,
+            }
+
+    def _open(self):
+        """Open a physical connection for a slot already reserved in self._size."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        idle_for = time.monotonic() - last_used
+        if idle_for > self.idle_timeout:
+            # The server has most likely reaped it already (see SET SESSION wait_timeout)
+            return False
+        if idle_for > self.ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception as e:
+                logger.info(f"Pooled connection failed health check: {e}")
+                return False
+        return True
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    def _trim_idle(self):
+        """Close idle connections past idle_timeout while staying at or above min_size. Caller holds the lock."""
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._discarded += 1
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -1,10 +1,26 @@
 from fastapi import Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 import os
-from firebase_REMOVED import auth
+from typing import Optional
+from app.firebase_config import firebase_auth
 from config.settings import Settings
+from app.services.token_verifier import SigningKeyCache, TokenVerifier
 
 settings = Settings()
 
+_token_verifier: Optional[TokenVerifier] = None
+
+def get_token_verifier() -> TokenVerifier:
+    """Process-wide verifier for FIREBASE_TOKEN_VERIFICATION=local, created on first use."""
+    global _token_verifier
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier(
+            settings.FIREBASE_PROJECT_ID,
+            key_cache=SigningKeyCache(settings.FIREBASE_CERTS_URL),
+            revocation_ttl=settings.TOKEN_REVOCATION_CACHE_TTL,
+        )
+    return _token_verifier
+
 async def get_current_user(authorization: str = Header(...)):
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid authorization header")
@@ -12,13 +28,17 @@ async def get_current_user(authorization: str = Header(...)):
     try:
         if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
             # For emulator: decode token without strict iss/aud checks
-            decoded_token = auth.verify_id_token(token, check_revoked=False)
+            decoded_token = firebase_auth().verify_id_token(token, check_revoked=False)
             # Optionally, log the decoded token for debugging
             print(f"Decoded emulator token: {decoded_token}")
             return decoded_token
+        elif settings.FIREBASE_TOKEN_VERIFICATION == "local":
+            # Signature checked against cached keys, revocation through a short-TTL cache.
+            # Runs in a thread because a cache miss fetches keys or user state over the network.
+            return await run_in_threadpool(get_token_verifier().verify, token)
         else:
             # For production: enforce strict validation
-            decoded_token = auth.verify_id_token(token, check_revoked=True)
+            decoded_token = firebase_auth().verify_id_token(token, check_revoked=True)
             expected_iss = f"https://securetoken.google.com/{settings.FIREBASE_PROJECT_ID}"
             if decoded_token.get("iss") != expected_iss:
                 raise HTTPException(status_code=401, detail="Invalid issuer")
@@ -1,10 +1,33 @@
 # initialise Firebase
+#
+# Importing this module is cheap: the Admin SDK is imported and the credentials file read only when
+# init_firebase() runs, in the app's startup phase (app/main.py), or on first use when there was none.
 
-import firebase_REMOVED
-from firebase_REMOVED import credentials, auth
+import threading
 from config.settings import settings
 
-# Load Firebase Admin SDK credentials
-cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
-firebase_REMOVED.initialize_app(cred)
+_lock = threading.Lock()
+_app = None
 
+
+def init_firebase():
+    """Initialise the default Firebase app once per process and return it."""
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                import firebase_REMOVED
+                from firebase_REMOVED import credentials
+                try:
+                    _app = firebase_REMOVED.get_app()
+                except ValueError:
+                    # Load Firebase Admin SDK credentials
+                    _app = firebase_REMOVED.initialize_app(credentials.Certificate(settings.FIREBASE_CREDENTIALS))
+    return _app
+
+
+def firebase_auth():
+    """The firebase_REMOVED.auth module, with the app initialised."""
+    init_firebase()
+    from firebase_REMOVED import auth
+    return auth
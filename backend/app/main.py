@@ -1,9 +1,45 @@
-from fastapi import FastAPI
-from app.routes import auth_routes, user_routes, workout_routes, stats_routes, plans_routes
-from app import firebase_config
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager, suppress
+from fastapi import FastAPI, Request, Response
+from app.routes import auth_routes, user_routes, workout_routes, stats_routes, plans_routes, sync_routes
+from app.firebase_config import init_firebase
+from app.database import get_pool
+from app import metrics, query_stats
+from config.settings import settings
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Log how long one step of worker startup took."""
+    started = time.perf_counter()
+    yield
+    logger.info(f"Startup: {name} took {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Expensive setup runs here, once per worker after it has forked, rather than at import time.
+    # benchmarks/startup.py measures the import time and time to first request.
+    with startup_phase("Firebase Admin SDK"):
+        init_firebase()
+    with startup_phase("connection pool"):
+        # Open the minimum number of pooled connections before serving traffic
+        get_pool().prefill()
+    gauge_refresh = metrics.start_gauge_refresh()
+    yield
+    if gauge_refresh is not None:
+        gauge_refresh.cancel()
+        with suppress(asyncio.CancelledError):
+            await gauge_refresh
+    get_pool().close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -12,15 +48,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allows all headers (e.g., Authorization)
+    expose_headers=["X-Next-Cursor"],  # GET /workouts/logs pagination, readable by browser clients
 )
 
+# Added before record_query_stats, so it runs inside it and sees the request's QueryStats
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count each request and time it for the Prometheus request metrics (see app/metrics.py)."""
+    timer = metrics.RequestTimer(request.method)
+    try:
+        response = await call_next(request)
+    except Exception:
+        timer.finish(request.scope, 500)
+        raise
+    timer.finish(request.scope, response.status_code)
+    return response
+
+@app.middleware("http")
+async def record_query_stats(request: Request, call_next):
+    """Count each request's SQL statements and database time; report them in Server-Timing and flag heavy requests."""
+    started = time.perf_counter()
+    stats = query_stats.start_request()
+    response = await call_next(request)
+    if settings.SERVER_TIMING_ENABLED:
+        total = f"total;dur={(time.perf_counter() - started) * 1000:.1f}"
+        response.headers.append("Server-Timing", f"{stats.server_timing()}, {total}")
+    if stats.count > settings.REQUEST_QUERY_WARNING_COUNT:
+        logger.warning(f"{request.method} {request.url.path} ran {stats.summary()}")
+    return response
+
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
 app.include_router(workout_routes.router)
 app.include_router(stats_routes.router, prefix="/stats")
 app.include_router(plans_routes.router, prefix="/plans", tags=["plans"])
+app.include_router(sync_routes.router)
 #app.include_router(exercises_routes.router, prefix="/exercises", tags=["exercises"])
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint; aggregates every worker when PROMETHEUS_MULTIPROC_DIR is set."""
+    metrics.refresh_process_gauges()
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/")
 async def root():
     return {"message": "FitTrack Backend (Testing Mode)"}
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Prometheus metrics, served at GET /metrics.
+
+With several gunicorn workers each process keeps its own values, so set PROMETHEUS_MULTIPROC_DIR to an
+empty directory shared by the workers (the Docker image does): every worker then writes its metrics to
+files there and /metrics, whichever worker answers it, aggregates all of them. gunicorn.conf.py clears
+the directory at startup and drops the live gauges of workers that exit.
+
+Request metrics are labelled by route template (/plans/{plan_id}), never by the raw path. Pool and cache
+figures are copied from the pool's and caches' own counters when /metrics is scraped; they are per-process
+values summed over the workers. A scrape reaches only one worker, so in multiprocess mode every worker also
+copies its own every METRICS_GAUGE_REFRESH_INTERVAL seconds (start_gauge_refresh()).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from config.settings import settings
+from app import dependencies, query_stats
+from app.cache import TTLCache
+from app.database import get_pool, user_id_cache, user_profile_cache
+from app.services.exercise_catalog import exercise_catalog
+from app.stats_cache import get_stats_cache
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum"
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements run per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+PLAN_GENERATION_SECONDS = Histogram(
+    "plan_generation_duration_seconds", "Time to generate and store a workout plan",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled MySQL connections by state", ["state"], multiprocess_mode="livesum"
+)
+DB_POOL_MAX = Gauge("db_pool_max_connections", "Configured pool size limit", multiprocess_mode="livesum")
+# Cumulative per-process counts, exported as gauges because they are copied rather than incremented
+DB_POOL_CHECKOUTS = Gauge("db_pool_checkouts", "Connections leased from the pool", multiprocess_mode="sum")
+DB_POOL_TIMEOUTS = Gauge("db_pool_checkout_timeouts", "Checkouts that timed out", multiprocess_mode="sum")
+DB_POOL_WAIT_SECONDS = Gauge("db_pool_checkout_wait_seconds", "Total time spent waiting for a connection",
+                             multiprocess_mode="sum")
+CACHE_HITS = Gauge("cache_hits", "Cache lookups answered from memory", ["cache"], multiprocess_mode="sum")
+CACHE_MISSES = Gauge("cache_misses", "Cache lookups that went to the source", ["cache"], multiprocess_mode="sum")
+
+
+def route_label(scope) -> str:
+    """The matched route's path template, so label values stay bounded."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _observe_cache(name: str, hits: int, misses: int):
+    CACHE_HITS.labels(name).set(hits)
+    CACHE_MISSES.labels(name).set(misses)
+
+
+def _observe_ttl_cache(cache: Optional[TTLCache]):
+    if cache is not None:
+        _observe_cache(cache.name, cache.hits, cache.misses)
+
+
+def refresh_process_gauges():
+    """Copy this process's pool and cache counters into the gauges."""
+    pool = get_pool().stats()
+    DB_POOL_CONNECTIONS.labels("in_use").set(pool["in_use"])
+    DB_POOL_CONNECTIONS.labels("idle").set(pool["idle"])
+    DB_POOL_MAX.set(pool["max_size"])
+    DB_POOL_CHECKOUTS.set(pool["checkouts"])
+    DB_POOL_TIMEOUTS.set(pool["timeouts"])
+    DB_POOL_WAIT_SECONDS.set(pool["wait_time_total_ms"] / 1000)
+
+    _observe_ttl_cache(user_id_cache)
+    _observe_ttl_cache(user_profile_cache)
+    _observe_cache("exercise_catalog", exercise_catalog.hits, exercise_catalog.reloads)
+    stats_cache = get_stats_cache()
+    if stats_cache is not None:
+        _observe_cache("stats", stats_cache.hits, stats_cache.misses)
+    verifier = dependencies._token_verifier
+    if verifier is not None:
+        _observe_ttl_cache(verifier.revocation_cache)
+
+
+async def _refresh_gauges_every(interval: float):
+    while True:
+        try:
+            refresh_process_gauges()
+        except Exception as e:
+            logger.warning(f"Refreshing the process gauges failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_gauge_refresh() -> Optional[asyncio.Task]:
+    """
+    In multiprocess mode, keep this worker's pool and cache gauges current in the background, since scrapes
+    are answered by whichever worker gets them. Returns the task to cancel at shutdown, or None.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.METRICS_GAUGE_REFRESH_INTERVAL <= 0:
+        return None
+    return asyncio.create_task(_refresh_gauges_every(settings.METRICS_GAUGE_REFRESH_INTERVAL))
+
+
+class RequestTimer:
+    """Tracks one request from arrival to response for the request metrics."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    def finish(self, scope, status: int):
+        route = route_label(scope)
+        REQUESTS_IN_PROGRESS.dec()
+        REQUESTS.labels(self.method, route, str(status)).inc()
+        REQUEST_LATENCY.labels(self.method, route).observe(time.perf_counter() - self.started)
+        stats = query_stats.current_stats()  # started by the query stats middleware around this one
+        DB_QUERIES.labels(route).observe(stats.count if stats is not None else 0)
+
+
+def render() -> tuple:
+    """(body, content type) for GET /metrics, aggregated over every worker in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,64 @@
+"""
+Applies the numbered SQL files in backend/migrations/ that have not been run against the database yet.
+Applied versions are recorded in Schema_Migrations, so running it again is a no-op.
+
+    python -m app.migrations
+"""
+import logging
+import os
+import re
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+_MIGRATION_FILE = re.compile(r"^(\d{4})_.+\.sql$")
+
+
+def pending_files(applied: set, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """Migration file names not in `applied`, in version order."""
+    names = sorted(name for name in os.listdir(directory) if _MIGRATION_FILE.match(name))
+    return [name for name in names if name not in applied]
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration into statements, dropping `--` comments. Statements end with `;` at end of line."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE) if statement.strip()]
+
+
+def apply_migrations(db, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """Run every pending migration on a Database; returns the versions applied."""
+    db.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Schema_Migrations (
+            version VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.cursor.execute("SELECT version FROM Schema_Migrations")
+    applied = {row["version"] for row in db.cursor.fetchall()}
+
+    done = []
+    for name in pending_files(applied, directory):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        logger.info(f"Applying migration {name} ({len(statements)} statements)")
+        # MySQL commits DDL implicitly, so a failing migration is not rolled back; fix it and re-run
+        for statement in statements:
+            db.cursor.execute(statement)
+        db.cursor.execute("INSERT INTO Schema_Migrations (version) VALUES (%s)", (name,))
+        db.conn.commit()
+        done.append(name)
+    return done
+
+
+if __name__ == "__main__":
+    from app.database import open_database
+
+    logging.basicConfig(level=logging.INFO)
+    db = open_database()
+    try:
+        applied = apply_migrations(db)
+        print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none pending'}")
+    finally:
+        db.close()
@@ -99,4 +99,12 @@ class Exercise(BaseModel):
     created_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# Nested plan models (GET /plans/{plan_id}/full and GET /plans?expand=...)
+class PlanDayTree(PlanDay):
+    exercises: Optional[List[PlanExercise]] = None
+
+class PlanTree(Plan):
+    days: Optional[List[PlanDayTree]] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional, Union
 
 # Model for Workout Distribution by Type (Pie Chart)
 class WorkoutDistribution(BaseModel):
@@ -33,4 +33,63 @@ class FrequencyEntry(BaseModel):
 class WeeklyFrequencyEntry(BaseModel):
     year: int
     week: int
-    count: int
\ No newline at end of file
+    count: int
+
+
+# Model for the stats screen: all of its series for one date range
+class DashboardStats(BaseModel):
+    by_type: List[WorkoutDistribution]
+    by_muscle_group: List[MuscleGroupDistribution]
+    weight_history: List[WeightEntry]
+    frequency: List[Union[FrequencyEntry, WeeklyFrequencyEntry]]
+
+
+# Model for the Weight Trend (Line Chart): one point per day with an entry
+class WeightTrendPoint(BaseModel):
+    date: date
+    weight: float
+    trend: float  # exponentially smoothed weight
+    ma_7: float
+    ma_30: float
+    weekly_rate: Optional[float]  # kg per week; None for the first week
+
+class WeightProjectionPoint(BaseModel):
+    date: date
+    weight: float
+
+class WeightTrend(BaseModel):
+    points: List[WeightTrendPoint]
+    slope_kg_per_week: Optional[float]  # None with fewer than two days of entries
+    r_squared: Optional[float]
+    projection: List[WeightProjectionPoint]
+
+
+# Model for Training Volume: tonnage (sets x reps x weight) per exercise and per day
+class ExerciseVolume(BaseModel):
+    exercise_id: int
+    exercise_name: str
+    workouts: int
+    sets: int
+    reps: int
+    volume: float
+    best_e1rm: Optional[float]  # estimated one-rep max; None without weighted logs
+
+class VolumePoint(BaseModel):
+    date: date
+    volume: float
+
+class VolumeStats(BaseModel):
+    total_volume: float
+    by_exercise: List[ExerciseVolume]
+    daily: List[VolumePoint]
+
+# Model for Personal Records per exercise
+class PersonalRecord(BaseModel):
+    exercise_id: int
+    exercise_name: str
+    best_weight: float
+    best_weight_date: date
+    best_e1rm: float
+    best_e1rm_date: date
+    best_volume: float
+    best_volume_date: date
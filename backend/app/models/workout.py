@@ -1,5 +1,8 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Most entries POST /workouts/log/batch accepts in one request
+MAX_BATCH_LOGS = 200
 
 class WorkoutLogCreate(BaseModel):
     sets: Optional[int]
@@ -14,4 +17,13 @@ class WorkoutLogUpdate(BaseModel):
     reps: Optional[int] = None
     duration_minutes: Optional[float] = None
     weight: Optional[float] = None
-    notes: Optional[str] = None
\ No newline at end of file
+    notes: Optional[str] = None
+
+
+class WorkoutLogBatchItem(WorkoutLogCreate):
+    exercise_id: int
+    plan_exercise_id: Optional[int] = None
+
+
+class WorkoutLogBatch(BaseModel):
+    entries: List[WorkoutLogBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_LOGS)
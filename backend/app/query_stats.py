@@ -0,0 +1,118 @@
+"""
+Per-request SQL instrumentation.
+
+Every Database cursor is an InstrumentedCursor, which times each execute()/executemany() and adds it to
+the QueryStats of the current request (a context variable, carried into the database executor threads by
+app/async_database.py). The middleware in app/main.py starts the stats for each request, reports them in a
+Server-Timing header and logs a warning when a request runs more than REQUEST_QUERY_WARNING_COUNT
+statements. Any single statement slower than SLOW_QUERY_MS is logged on its own.
+
+Parameters never reach the logs: they are reduced to their types, e.g. ('<int>', '<str>').
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+def redact_params(params: Any) -> Any:
+    """Replace parameter values with their type names, keeping the shape."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return tuple(f"<{type(value).__name__}>" for value in params)
+    return f"<{type(params).__name__}>"
+
+
+def _one_line(sql: str, limit: int = 500) -> str:
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class QueryStats:
+    """Statement count, total database time and the slowest statement of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql: Optional[str] = None
+        self.slowest_params: Any = None
+        # Concurrent queries of one request run on several executor threads
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, params: Any, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            if seconds > self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_sql = sql
+                self.slowest_params = params
+
+    def server_timing(self) -> str:
+        """The Server-Timing entry for the database time, e.g. `db;dur=12.5;desc="7 queries"`."""
+        return f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} {"query" if self.count == 1 else "queries"}"'
+
+    def summary(self) -> str:
+        slowest = ""
+        if self.slowest_sql is not None:
+            slowest = (f"; slowest {self.slowest_seconds * 1000:.1f} ms: {_one_line(self.slowest_sql)} "
+                       f"params={redact_params(self.slowest_params)}")
+        return f"{self.count} {'query' if self.count == 1 else 'queries'} in {self.total_seconds * 1000:.1f} ms{slowest}"
+
+
+def start_request() -> QueryStats:
+    """Begin collecting stats for the current context (one request)."""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times statements; everything other than execute/executemany is passed through."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._record(operation, params, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            # The parameters of the first row stand for the batch
+            first = seq_params[0] if seq_params else None
+            self._record(operation, first, time.perf_counter() - started)
+
+    def _record(self, operation, params, seconds: float):
+        stats = _current.get()
+        if stats is not None:
+            stats.record(operation, params, seconds)
+        if seconds * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {_one_line(operation)} params={redact_params(params)}")
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -1,31 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
-from app.database import Database, get_database
+from typing import List, Dict, Any, Optional
+from app.async_database import AsyncDatabase, get_async_database
 from app.dependencies import get_current_user
-from app.models.plans import Plan, PlanCreate, PlanUpdate, PlanDay, PlanDayCreate, PlanDayUpdate, PlanExercise, PlanExerciseCreate, Exercise, WorkoutLogCreate, WorkoutLog
+from app.models.plans import Plan, PlanCreate, PlanUpdate, PlanDay, PlanDayCreate, PlanDayUpdate, PlanExercise, PlanExerciseCreate, Exercise, WorkoutLogCreate, WorkoutLog, PlanTree
 from app.models.plan_generator import GeneratePlanRequest, GeneratedPlan
 from app.services.workout_recommender import generate_workout_plan
+from app.services.idempotency import IdempotentRequest, idempotent_request
+from app.metrics import PLAN_GENERATION_SECONDS
 import logging
 from datetime import datetime
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+async def resolve_plan_path(
+    db: AsyncDatabase,
+    uid: str,
+    plan_id: int,
+    day_id: Optional[int] = None,
+    plan_exercise_id: Optional[int] = None,
+    exercise_not_found: str = "Plan exercise not found"
+) -> Dict[str, Any]:
+    """
+    Check that the user owns the plan, the day belongs to the plan and the plan exercise to the day,
+    with one query. Raises the same 404s as checking each level in turn; returns the resolved ids.
+    """
+    owned = await db.resolve_plan_path(uid, plan_id, day_id, plan_exercise_id)
+    if owned is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if owned["plan_id"] is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    if day_id is not None and owned["plan_day_id"] is None:
+        raise HTTPException(status_code=404, detail="Day not found")
+    if plan_exercise_id is not None and owned["plan_exercise_id"] is None:
+        raise HTTPException(status_code=404, detail=exercise_not_found)
+    return owned
+
+
 # Endpoints
-@router.get("", response_model=List[Plan])
+@router.get("", response_model=List[PlanTree], response_model_exclude_unset=True)
 async def read_plans(
+    expand: Optional[str] = None,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
-    """List all plans for the authenticated user."""
-    # Fetch user details using the uid from the decoded token
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    """
+    List all plans for the authenticated user.
+    `expand=days` nests each plan's days, `expand=days,exercises` also each day's exercises (one query either way).
+    """
+    expansions = {part.strip() for part in expand.split(",") if part.strip()} if expand else set()
+    if expansions - {"days", "exercises"}:
+        raise HTTPException(status_code=400, detail="expand accepts 'days' and 'exercises'")
+
+    # Resolve the internal user_id from the uid in the decoded token
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    # Access user_id using dictionary key since database returns dicts
-    user_id = user["user_id"]
 
-    plans = db.get_plans(user_id)
+    if expansions:
+        return await db.get_plan_trees(user_id, include_exercises="exercises" in expansions)
+    plans = await db.get_plans(user_id)
     if not plans:
         return []  # Return empty list if no plans exist
     return plans
@@ -34,38 +68,52 @@ async def read_plans(
 async def read_plan(
     plan_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Get details of a specific plan."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
     return plan
 
+@router.get("/{plan_id}/full", response_model=PlanTree)
+async def read_plan_full(
+    plan_id: int,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """Get a plan with all of its days and each day's exercises, from a single joined query."""
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    plan = await db.get_plan_tree(plan_id, user_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return plan
+
 @router.post("", response_model=Plan, status_code=201)
 async def create_plan(
     plan: PlanCreate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Create a new plan."""
     try:
-        user = db.get_user_by_firebase_uid(current_user["uid"])
-        if not user:
+        user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+        if user_id is None:
             raise HTTPException(status_code=404, detail="User not found")
-        user_id = user["user_id"]
 
         # Validate days_per_week
         if not (1 <= plan.days_per_week <= 7):
             raise HTTPException(status_code=400, detail="days_per_week must be between 1 and 7")
 
         # Create the plan
-        plan_id = db.create_plan(
+        plan_id = await db.create_plan(
             user_id=user_id,
             name=plan.name,
             description=plan.description,
@@ -90,16 +138,15 @@ async def update_plan(
     plan_id: int,
     plan_update: PlanUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Update an existing plan."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate plan ownership
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
 
@@ -108,7 +155,7 @@ async def update_plan(
         raise HTTPException(status_code=400, detail="days_per_week must be between 1 and 7")
 
     # Update the plan
-    db.update_plan(
+    await db.update_plan(
         plan_id=plan_id,
         name=plan_update.name,
         description=plan_update.description,
@@ -116,94 +163,81 @@ async def update_plan(
         preferred_days=plan_update.preferred_days
     )
     # Fetch updated plan to return
-    updated_plan = db.get_plan(plan_id)
+    updated_plan = await db.get_plan(plan_id)
     return updated_plan
 
 @router.delete("/{plan_id}")
 async def delete_plan(
     plan_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Delete a plan."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate plan ownership
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
 
     # Delete the plan (cascades to days and exercises)
-    db.delete_plan(plan_id)
+    await db.delete_plan(plan_id)
     return {"message": "Plan deleted successfully"}
 
 @router.put("/{plan_id}/set-active")
 async def set_plan_active(
     plan_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Set a plan as active, deactivating all other plans for the user."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate plan ownership
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    # Deactivate all plans for the user
-    db.cursor.execute(
-        "UPDATE Plans SET is_active = FALSE WHERE user_id = %s",
-        (user_id,)
-    )
-    # Activate the specified plan
-    db.cursor.execute(
-        "UPDATE Plans SET is_active = TRUE WHERE plan_id = %s",
-        (plan_id,)
-    )
-    db.conn.commit()
+    # Deactivate all other plans for the user and activate the specified plan
+    await db.set_active_plan(user_id, plan_id)
     return {"message": f"Plan {plan_id} set as active"}
 
 @router.get("/{plan_id}/days", response_model=List[PlanDay])
 async def read_plan_days(
     plan_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """List all days for a specific plan."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate plan ownership
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    return db.get_plan_days(plan_id)
+    return await db.get_plan_days(plan_id)
 
 @router.post("/{plan_id}/days", response_model=PlanDay)
 async def create_plan_day(
     plan_id: int,
     day: PlanDayCreate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Add a new day to a plan."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate plan ownership
-    plan = db.get_plan(plan_id)
+    plan = await db.get_plan(plan_id)
     if not plan or plan["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Plan not found")
 
@@ -212,7 +246,7 @@ async def create_plan_day(
         raise HTTPException(status_code=400, detail="day_number must be at least 1")
 
     # Create the day
-    plan_day_id = db.create_plan_day(
+    plan_day_id = await db.create_plan_day(
         plan_id=plan_id,
         day_number=day.day_number,
         description=day.description
@@ -225,36 +259,24 @@ async def update_plan_day(
     day_id: int,
     day_update: PlanDayUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Update an existing plan day."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
-
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
+    # Validate plan and day ownership
+    await resolve_plan_path(db, current_user["uid"], plan_id, day_id)
 
     # Validate day_number
     if day_update.day_number < 1:
         raise HTTPException(status_code=400, detail="day_number must be at least 1")
 
     # Update the day
-    db.update_plan_day(
+    await db.update_plan_day(
         plan_day_id=day_id,
         day_number=day_update.day_number,
         description=day_update.description
     )
     # Fetch updated day to return
-    updated_day = db.get_plan_day(day_id)
+    updated_day = await db.get_plan_day(day_id)
     return updated_day
 
 @router.delete("/{plan_id}/days/{day_id}")
@@ -262,26 +284,14 @@ async def delete_plan_day(
     plan_id: int,
     day_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Delete a plan day."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
-
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
+    # Validate plan and day ownership
+    await resolve_plan_path(db, current_user["uid"], plan_id, day_id)
 
     # Delete the day (cascades to exercises)
-    db.delete_plan_day(day_id)
+    await db.delete_plan_day(day_id)
     return {"message": "Day deleted successfully"}
 
 @router.get("/{plan_id}/days/{day_id}/exercises", response_model=List[PlanExercise])
@@ -289,26 +299,14 @@ async def read_plan_exercises(
     plan_id: int,
     day_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """List all exercises for a specific day."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
+    # Validate plan and day ownership
+    await resolve_plan_path(db, current_user["uid"], plan_id, day_id)
 
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
-
-    exercises = db.get_plan_exercises(day_id)
-    logger.info(f"Raw exercises data: {exercises}")  # Add logging
+    exercises = await db.get_plan_exercises(day_id)
+    logger.debug(f"Fetched {len(exercises)} exercises for plan day {day_id}")
 
     return exercises
 
@@ -318,31 +316,19 @@ async def add_exercise_to_day(
     day_id: int,
     exercise: PlanExerciseCreate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Add an exercise to a specific day."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
-
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
+    # Validate plan and day ownership
+    await resolve_plan_path(db, current_user["uid"], plan_id, day_id)
 
     # Validate exercise exists
-    exercise_details = db.get_exercise(exercise.exercise_id)
+    exercise_details = await db.get_exercise(exercise.exercise_id)
     if not exercise_details:
         raise HTTPException(status_code=404, detail="Exercise not found")
 
     # Add the exercise to the day
-    plan_exercise_id = db.add_exercise_to_day(day_id, exercise.exercise_id)
+    plan_exercise_id = await db.add_exercise_to_day(day_id, exercise.exercise_id)
     return {
         "plan_exercise_id": plan_exercise_id,
         "plan_day_id": day_id,
@@ -361,32 +347,17 @@ async def remove_exercise_from_day(
     day_id: int,
     exercise_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Remove an exercise from a specific day."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
-
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
-
-    # Validate exercise exists in the day
-    exercises = db.get_plan_exercises(day_id)
-    exercise = next((ex for ex in exercises if ex["plan_exercise_id"] == exercise_id), None)
-    if not exercise:
-        raise HTTPException(status_code=404, detail="Exercise not found in this day")
+    # Validate plan, day and exercise ownership
+    await resolve_plan_path(
+        db, current_user["uid"], plan_id, day_id, exercise_id,
+        exercise_not_found="Exercise not found in this day"
+    )
 
     # Remove the exercise
-    db.remove_exercise_from_day(exercise_id)
+    await db.remove_exercise_from_day(exercise_id)
     return {"message": "Exercise removed successfully"}
 
 
@@ -397,29 +368,12 @@ async def log_workout(
     plan_exercise_id: int,
     workout_log: WorkoutLogCreate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Log a workout for a specific plan exercise."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
-
-    # Validate plan ownership
-    plan = db.get_plan(plan_id)
-    if not plan or plan["user_id"] != user_id:
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Validate day ownership
-    day = db.get_plan_day(day_id)
-    if not day or day["plan_id"] != plan_id:
-        raise HTTPException(status_code=404, detail="Day not found")
-
-    # Validate plan exercise exists and belongs to the day
-    exercises = db.get_plan_exercises(day_id)
-    plan_exercise = next((ex for ex in exercises if ex["plan_exercise_id"] == plan_exercise_id), None)
-    if not plan_exercise:
-        raise HTTPException(status_code=404, detail="Plan exercise not found")
+    # Validate plan, day and plan exercise ownership
+    plan_exercise = await resolve_plan_path(db, current_user["uid"], plan_id, day_id, plan_exercise_id)
+    user_id = plan_exercise["user_id"]
 
     # Validate exercise_id matches the plan exercise
     if workout_log.exercise_id != plan_exercise["exercise_id"]:
@@ -434,7 +388,7 @@ async def log_workout(
         raise HTTPException(status_code=400, detail="weight must be non-negative")
 
     # Log the workout
-    workout_log_id = db.log_workout(
+    workout_log_id = await db.log_workout(
         user_id=user_id,
         plan_exercise_id=plan_exercise_id,
         exercise_id=workout_log.exercise_id,
@@ -463,25 +417,31 @@ async def log_workout(
 async def generate_plan(
     request: GeneratePlanRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
-    """Generate a new workout plan based on user inputs and preferences."""
-    user = db.get_user_by_firebase_uid(current_user["uid"])
-    if not user:
+    """
+    Generate a new workout plan based on user inputs and preferences.
+    Retries with the same Idempotency-Key get the first plan back instead of a duplicate.
+    """
+    if idempotency.replay is not None:
+        return idempotency.replay
+    user_id = await db.get_user_id_by_firebase_uid(current_user["uid"])
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Validate days_per_week
     if not (1 <= request.days_per_week <= 7):
         raise HTTPException(status_code=400, detail="days_per_week must be between 1 and 7")
 
     # Generate the plan
-    plan = generate_workout_plan(
-        db=db,
-        user_id=user_id,
-        days_per_week=request.days_per_week,
-        preferences=request.preferences,
-        plan_name=request.plan_name,
-        description=request.description
-    )
-    return plan
\ No newline at end of file
+    with PLAN_GENERATION_SECONDS.time():
+        plan = await db.run(
+            generate_workout_plan,
+            user_id=user_id,
+            days_per_week=request.days_per_week,
+            preferences=request.preferences,
+            plan_name=request.plan_name,
+            description=request.description
+        )
+    return await idempotency.save(GeneratedPlan.model_validate(plan), status_code=201)
\ No newline at end of file
@@ -1,27 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from datetime import date, datetime
-from typing import List
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 from app.dependencies import get_current_user
-from app.database import get_database
+from app.async_database import AsyncDatabase, get_async_database, run_in_db_executor
+from app.stats_cache import get_stats_cache
+from app.services.weight_trend import compute_weight_trend
+from app.services.downsampling import downsample_rows
+from app.services.training_analytics import get_records, get_volume
+from app.services.idempotency import IdempotentRequest, idempotent_request
 from app.models.stats import (
     WorkoutDistribution,
     MuscleGroupDistribution,
     WeightEntry,
     WeightCreate,
     FrequencyEntry,
-    WeeklyFrequencyEntry
+    WeeklyFrequencyEntry,
+    DashboardStats,
+    WeightTrend,
+    VolumeStats,
+    PersonalRecord
 )
 
 router = APIRouter()
 
 # Helper function to fetch user_id from uid
-def get_user_id_from_uid(db, uid: str) -> int:
+async def get_user_id_from_uid(db: AsyncDatabase, uid: str) -> int:
     """Fetch the user_id from the Users table based on the Firebase uid."""
-    db.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (uid,))
-    result = db.cursor.fetchone()
-    if not result:
+    user_id = await db.get_user_id_by_firebase_uid(uid)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return result["user_id"]
+    return user_id
+
+def parse_date_range(start_date: str, end_date: str) -> Tuple[date, date]:
+    """Parse the YYYY-MM-DD start_date and end_date query parameters, rejecting a reversed range."""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    return start, end
+
+async def cached_stats(user_id: int, key: tuple, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    The user's cached response for key, e.g. ("frequency", start_date, end_date, granularity), or the result
+    of compute(), which is cached until the TTL runs out or the user's next write (see app/stats_cache.py).
+    """
+    cache = get_stats_cache()
+    if cache is None:
+        return await compute()
+
+    async def call(method: str, *args):
+        if cache.blocking:
+            return await run_in_db_executor(getattr(cache, method), *args)
+        return getattr(cache, method)(*args)
+
+    token, value = await call("lookup", user_id, key)
+    if value is not None:
+        return value
+    value = jsonable_encoder(await compute())
+    await call("store", user_id, key, token, value)
+    return value
 
 # Endpoint 1: Workout Distribution by Type
 @router.get("/workouts/by-type", response_model=List[WorkoutDistribution])
@@ -29,32 +71,19 @@ async def get_workouts_by_type(
     start_date: str,
     end_date: str,
     current_user: dict = Depends(get_current_user),
-    db=Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Fetch workout distribution by type within a time range."""
-    # Parse the date strings into date objects
-    try:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-    if start_date > end_date:
-        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    start_date, end_date = parse_date_range(start_date, end_date)
     
     # Fetch user_id from the database using the uid from current_user
-    user_id = get_user_id_from_uid(db, current_user["uid"])
-
-    query = """
-        SELECT we.category AS type, COUNT(*) AS count
-        FROM Workout_Logs wl
-        JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
-        WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-        GROUP BY we.category
-    """
-    db.cursor.execute(query, (user_id, start_date, end_date))
-    results = db.cursor.fetchall()
-    return [{"type": row["type"], "count": row["count"]} for row in results]
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        results = await db.get_category_distribution(user_id, start_date, end_date)
+        return [{"type": row["type"], "count": row["count"]} for row in results]
+
+    return await cached_stats(user_id, ("by_type", start_date, end_date), compute)
 
 # Endpoint 2: Workout Distribution by Muscle Group
 @router.get("/workouts/by-muscle-group", response_model=List[MuscleGroupDistribution])
@@ -62,128 +91,92 @@ async def get_workouts_by_muscle_group(
     start_date: str,
     end_date: str,
     current_user: dict = Depends(get_current_user),
-    db=Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """Fetch workout distribution by muscle group within a time range."""
-    # Parse the date strings into date objects
-    try:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-    if start_date > end_date:
-        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    start_date, end_date = parse_date_range(start_date, end_date)
     
     # Fetch user_id from the database using the uid from current_user
-    user_id = get_user_id_from_uid(db, current_user["uid"])
-
-    query = """
-        SELECT we.primary_muscle AS muscle_group, COUNT(*) AS count
-        FROM Workout_Logs wl
-        JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
-        WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-        GROUP BY we.primary_muscle
-    """
-    db.cursor.execute(query, (user_id, start_date, end_date))
-    results = db.cursor.fetchall()
-    return [{"muscle_group": row["muscle_group"], "count": row["count"]} for row in results]
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        results = await db.get_muscle_group_distribution(user_id, start_date, end_date)
+        return [{"muscle_group": row["muscle_group"], "count": row["count"]} for row in results]
+
+    return await cached_stats(user_id, ("by_muscle_group", start_date, end_date), compute)
 
 # Endpoint 3: User Weight Progress (GET)
 @router.get("/weight/history", response_model=List[WeightEntry])
 async def get_weight_history(
     start_date: str,
     end_date: str,
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
     current_user: dict = Depends(get_current_user),
-    db=Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
-    """Fetch user's weight history within a time range."""
-    # Parse the date strings into date objects
-    try:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-    if start_date > end_date:
-        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    """
+    Fetch user's weight history within a time range. With max_points, long ranges are reduced to that many
+    points by LTTB, which keeps the line's peaks and dips.
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
     
     # Fetch user_id from the database using the uid from current_user
-    user_id = get_user_id_from_uid(db, current_user["uid"])
-
-    query = """
-        SELECT DATE(date_logged) AS date, AVG(weight_kg) AS weight
-        FROM Weight_History
-        WHERE user_id = %s AND DATE(date_logged) BETWEEN %s AND %s
-        GROUP BY DATE(date_logged)
-        ORDER BY DATE(date_logged)
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        results = await db.get_weight_history(user_id, start_date, end_date)
+        results = downsample_rows(results, max_points, "weight", x_key="date")
+        return [{"date": row["date"], "weight": row["weight"]} for row in results]
+
+    return await cached_stats(user_id, ("weight_history", start_date, end_date, max_points), compute)
+
+# Endpoint 3b: User Weight Trend (GET)
+@router.get("/weight/trend", response_model=WeightTrend)
+async def get_weight_trend(
+    start_date: str,
+    end_date: str,
+    projection_days: int = Query(28, ge=0, le=365),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    Fetch the smoothed trend, 7 and 30 day moving averages and weekly rate of change of the user's weight
+    within a time range, with a linear projection for projection_days past the last entry.
     """
-    db.cursor.execute(query, (user_id, start_date, end_date))
-    results = db.cursor.fetchall()
-    return [{"date": row["date"], "weight": row["weight"]} for row in results]
+    start_date, end_date = parse_date_range(start_date, end_date)
+
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        results = await db.get_weight_history(user_id, start_date, end_date)
+        return compute_weight_trend(results, projection_days)
+
+    return await cached_stats(user_id, ("weight_trend", start_date, end_date, projection_days), compute)
 
 # Endpoint 4: Log a New Weight Entry (POST)
 @router.post("/weight", response_model=WeightEntry)
 async def log_weight(
     weight_entry: WeightCreate,
     current_user: dict = Depends(get_current_user),
-    db=Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
-    """Log a new weight entry for the user."""
+    """Log a new weight entry for the user. Retries with the same Idempotency-Key are not logged twice."""
+    if idempotency.replay is not None:
+        return idempotency.replay
+
     # Fetch user_id from the database using the uid from current_user
-    user_id = get_user_id_from_uid(db, current_user["uid"])
-
-    # If date_logged is not provided, the database will use CURRENT_TIMESTAMP
-    if weight_entry.date_logged:
-        query = """
-            INSERT INTO Weight_History (user_id, date_logged, weight_kg)
-            VALUES (%s, %s, %s)
-        """
-        values = (user_id, weight_entry.date_logged, weight_entry.weight_kg)
-    else:
-        query = """
-            INSERT INTO Weight_History (user_id, weight_kg)
-            VALUES (%s, %s)
-        """
-        values = (user_id, weight_entry.weight_kg)
-    
-    try:
-        db.cursor.execute(query, values)
-        db.conn.commit()
-    except Exception as e:
-        db.conn.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to log weight: {str(e)}")
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
 
-    # Update the current weight in the Users table
-    update_query = """
-        UPDATE Users
-        SET weight_kg = %s, last_updated = CURRENT_TIMESTAMP
-        WHERE user_id = %s
-    """
     try:
-        db.cursor.execute(update_query, (weight_entry.weight_kg, user_id))
-        db.conn.commit()
+        result = await db.log_weight(user_id, weight_entry.weight_kg, weight_entry.date_logged)
     except Exception as e:
-        db.conn.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to update user weight: {str(e)}")
-
-    # Fetch the inserted entry to return (use the latest entry for this user on that date)
-    fetch_query = """
-        SELECT DATE(date_logged) AS date, weight_kg AS weight
-        FROM Weight_History
-        WHERE user_id = %s AND DATE(date_logged) = %s
-        ORDER BY date_logged DESC
-        LIMIT 1
-    """
-    # If date_logged was provided, use it; otherwise, use today's date (since CURRENT_TIMESTAMP was used)
-    fetch_date = weight_entry.date_logged.date() if weight_entry.date_logged else date.today()
-    db.cursor.execute(fetch_query, (user_id, fetch_date))
-    result = db.cursor.fetchone()
+        raise HTTPException(status_code=500, detail=f"Failed to log weight: {str(e)}")
     
     if not result:
         raise HTTPException(status_code=500, detail="Failed to fetch the logged weight entry")
 
-    return {"date": result["date"], "weight": result["weight"]}
+    return await idempotency.save({"date": result["date"], "weight": result["weight"]})
 
 # Endpoint 5: Workout Frequency Trend
 @router.get("/workouts/frequency")
@@ -191,42 +184,110 @@ async def get_workout_frequency(
     start_date: str,
     end_date: str,
     granularity: str = "daily",
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
     current_user: dict = Depends(get_current_user),
-    db=Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
-    """Fetch workout frequency trend within a time range, with daily or weekly granularity."""
-    # Parse the date strings into date objects
-    try:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-    if start_date > end_date:
-        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    """
+    Fetch workout frequency trend within a time range, with daily or weekly granularity. With max_points,
+    long ranges keep the lowest and highest count of each of max_points // 2 buckets.
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
     if granularity not in ["daily", "weekly"]:
         raise HTTPException(status_code=400, detail="Invalid granularity. Use 'daily' or 'weekly'")
 
     # Fetch user_id from the database using the uid from current_user
-    user_id = get_user_id_from_uid(db, current_user["uid"])
-
-    if granularity == "daily":
-        query = """
-            SELECT DATE(wl.date_logged) AS date, COUNT(*) AS count
-            FROM Workout_Logs wl
-            WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-            GROUP BY DATE(wl.date_logged)
-        """
-        db.cursor.execute(query, (user_id, start_date, end_date))
-        results = db.cursor.fetchall()
-        return [{"date": row["date"], "count": row["count"]} for row in results]
-    else:  # weekly
-        query = """
-            SELECT YEAR(wl.date_logged) AS year, WEEK(wl.date_logged) AS week, COUNT(*) AS count
-            FROM Workout_Logs wl
-            WHERE wl.user_id = %s AND DATE(wl.date_logged) BETWEEN %s AND %s
-            GROUP BY YEAR(wl.date_logged), WEEK(wl.date_logged)
-        """
-        db.cursor.execute(query, (user_id, start_date, end_date))
-        results = db.cursor.fetchall()
-        return [{"year": row["year"], "week": row["week"], "count": row["count"]} for row in results]
\ No newline at end of file
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        results = await db.get_workout_frequency(user_id, start_date, end_date, granularity)
+        results = downsample_rows(results, max_points, "count", method="min_max")
+        if granularity == "daily":
+            return [{"date": row["date"], "count": row["count"]} for row in results]
+        else:  # weekly
+            return [{"year": row["year"], "week": row["week"], "count": row["count"]} for row in results]
+
+    return await cached_stats(user_id, ("frequency", start_date, end_date, granularity, max_points), compute)
+
+# Endpoint 6: Everything the stats screen shows, in one request
+@router.get("/dashboard", response_model=DashboardStats)
+async def get_dashboard(
+    start_date: str,
+    end_date: str,
+    granularity: str = "daily",
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    Fetch the workout distributions by type and muscle group, the weight history and the workout frequency
+    for one date range, all read by a single statement on the request's connection. max_points downsamples
+    the weight history and frequency series as in their own endpoints.
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
+    if granularity not in ["daily", "weekly"]:
+        raise HTTPException(status_code=400, detail="Invalid granularity. Use 'daily' or 'weekly'")
+
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        series = await db.get_stats_dashboard(user_id, start_date, end_date, granularity)
+        weights = downsample_rows(series["weight"], max_points, "weight", x_key="date")
+        frequency_rows = downsample_rows(series["frequency"], max_points, "count", method="min_max")
+        if granularity == "daily":
+            frequency = [{"date": row["date"], "count": row["count"]} for row in frequency_rows]
+        else:  # weekly
+            frequency = [{"year": row["year"], "week": row["week"], "count": row["count"]} for row in frequency_rows]
+        return {
+            "by_type": [{"type": row["label"], "count": row["count"]} for row in series["type"]],
+            "by_muscle_group": [{"muscle_group": row["label"], "count": row["count"]} for row in series["muscle_group"]],
+            "weight_history": [{"date": row["date"], "weight": row["weight"]} for row in weights],
+            "frequency": frequency,
+        }
+
+    return await cached_stats(user_id, ("dashboard", start_date, end_date, granularity, max_points), compute)
+
+# Endpoint 7: Training Volume
+@router.get("/volume", response_model=VolumeStats)
+async def get_training_volume(
+    start_date: str,
+    end_date: str,
+    exercise_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """Fetch total and per-exercise training volume, best estimated one-rep maxes and volume per day within a time range."""
+    start_date, end_date = parse_date_range(start_date, end_date)
+
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        return await db.run(get_volume, user_id, start_date, end_date, exercise_id)
+
+    return await cached_stats(user_id, ("volume", start_date, end_date, exercise_id), compute)
+
+# Endpoint 8: Personal Records
+@router.get("/records", response_model=List[PersonalRecord])
+async def get_personal_records(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    exercise_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    Fetch the user's personal records per exercise: heaviest weight, best estimated one-rep max and largest
+    single-log volume. Without dates these are all-time records; with start_date and end_date, the bests
+    within that range.
+    """
+    if (start_date is None) != (end_date is None):
+        raise HTTPException(status_code=400, detail="Provide both start_date and end_date, or neither")
+    if start_date is not None:
+        start_date, end_date = parse_date_range(start_date, end_date)
+
+    user_id = await get_user_id_from_uid(db, current_user["uid"])
+
+    async def compute():
+        return await db.run(get_records, user_id, start_date, end_date, exercise_id)
+
+    return await cached_stats(user_id, ("records", start_date, end_date, exercise_id), compute)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.dependencies import get_current_user
+from app.async_database import AsyncDatabase, get_async_database
+from app.services.sync_service import changes_since, snapshot
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# GET /sync: Rows changed since the client's last sync
+@router.get("")
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    Offline sync for workout logs, weight entries, plans, plan days and plan exercises.
+    Without `since` returns every row (`full: true`). With the `cursor` of a previous response returns the
+    current state of the rows created or updated since in `changes` and the ids of deleted rows in `deleted`,
+    at most `limit` changes at a time; call again with the new cursor while `has_more` is true.
+    Deleting a plan or day also lists its days and exercises as deleted and its logs as changed.
+    """
+    user_id = await db.get_user_id_by_firebase_uid(current_user.get("uid"))
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if since is None:
+        return await db.run(snapshot, user_id)
+    try:
+        cursor = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return await db.run(changes_since, user_id, cursor, limit)
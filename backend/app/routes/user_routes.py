@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.dependencies import get_current_user
-from app.database import get_database, Database
+from app.async_database import AsyncDatabase, get_async_database
 from pydantic import BaseModel
-from app.services.streak_service import update_streak
+from app.services.streak_service import get_streak
 from typing import Dict, Any, Optional
 
 router = APIRouter(prefix="/user", tags=["user"])
@@ -20,30 +20,24 @@ class UserProfileUpdate(BaseModel):
 
 
 @router.get("/profile")
-async def get_user_profile(decoded_token: dict = Depends(get_current_user)):
+async def get_user_profile(decoded_token: dict = Depends(get_current_user), db: AsyncDatabase = Depends(get_async_database)):
     """Fetch the authenticated user's profile data."""
     firebase_uid = decoded_token.get("uid")
-    db = get_database()
-    try:
-        user = db.get_user_by_firebase_uid(firebase_uid)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        # Exclude sensitive fields like firebase_uid from the response
-        return {k: v for k, v in user.items() if k != "firebase_uid"}
-    finally:
-        db.close()
+    user = await db.get_user_by_firebase_uid(firebase_uid)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    # Exclude sensitive fields like firebase_uid from the response
+    return {k: v for k, v in user.items() if k != "firebase_uid"}
 
 
 @router.post("/profile")
-async def update_user_profile(profile: UserProfileUpdate, decoded_token: dict = Depends(get_current_user)):
+async def update_user_profile(profile: UserProfileUpdate, decoded_token: dict = Depends(get_current_user), db: AsyncDatabase = Depends(get_async_database)):
     firebase_uid = decoded_token.get("uid")
-    db = get_database()
     try:
-        user = db.get_user_by_firebase_uid(firebase_uid)
-        if not user:
+        user_id = await db.get_user_id_by_firebase_uid(firebase_uid)
+        if user_id is None:
             raise ValueError("User not found")
-        user_id = user["user_id"]  
-        db.update_user_profile(
+        await db.update_user_profile(
             user_id=user_id,
             username=profile.username,
             date_of_birth=profile.date_of_birth,
@@ -57,20 +51,16 @@ async def update_user_profile(profile: UserProfileUpdate, decoded_token: dict =
         return {"message": "Profile updated", "user_id": user_id}
     except Exception as e:
         raise Exception(f"Failed to update profile: {str(e)}")
-    finally:
-        db.close()
 
 
 # Streaks feature:
 @router.get("/streak", response_model=Dict[str, Any])
-async def get_user_streak(decoded_token: dict = Depends(get_current_user), db: Database = Depends(get_database)):
-    """Retrieve the user's current streak."""
+async def get_user_streak(decoded_token: dict = Depends(get_current_user), db: AsyncDatabase = Depends(get_async_database)):
+    """Retrieve the user's current and longest streak."""
     firebase_uid = decoded_token.get("uid")
-    user = db.get_user_by_firebase_uid(firebase_uid)
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(firebase_uid)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]  
 
-    # Update and return the streak
-    streak = update_streak(db, user_id)
-    return {"current_streak": streak}
\ No newline at end of file
+    # Maintained when workouts are logged or deleted, so this is a single read
+    return await db.run(get_streak, user_id)
\ No newline at end of file
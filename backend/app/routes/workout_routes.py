@@ -1,41 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from datetime import date, datetime
+from typing import Optional
+import base64
+import json
+import logging
 from app.dependencies import get_current_user
-from app.database import get_database, Database
-from app.models.workout import WorkoutLogCreate, WorkoutLogUpdate
+from app.async_database import AsyncDatabase, get_async_database
+from app.database import Database
+from app.services.idempotency import IdempotentRequest, idempotent_request
+from app.models.workout import WorkoutLogBatch, WorkoutLogCreate, WorkoutLogUpdate
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/workouts", tags=["workouts"])
 
 # GET /workouts: Retrieve all available exercises
 @router.get("/")
-async def get_workouts(current_user: dict = Depends(get_current_user)):
+async def get_workouts(
+    compact: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
     """
     Retrieve a list of all available exercises from the Workout_Exercises table.
     Returns a list of exercises with their details (e.g., name, muscle groups, difficulty).
+    The body comes pre-serialized from the in-process catalog cache. `compact=true` leaves out
+    the instructions and injury prevention tips; a matching If-None-Match gets a 304.
     """
-    db = get_database()
-    try:
-        db.cursor.execute("SELECT * FROM Workout_Exercises")
-        workouts = db.cursor.fetchall()
-        return [
-            {
-                "id": row["exercise_id"],
-                "exercise_name": row["exercise_name"],
-                "primary_muscle": row["primary_muscle"],
-                "secondary_muscle": row["secondary_muscle"],
-                "difficulty": row["difficulty"],
-                "category": row["category"],
-                "equipment": row["equipment"],
-                "initial_recommended_sets": row["initial_recommended_sets"],
-                "initial_recommended_reps": row["initial_recommended_reps"],
-                "initial_recommended_time": row["initial_recommended_time"],
-                "instructions": row["instructions"],
-                "injury_prevention_tips": row["injury_prevention_tips"],
-                "image_url": row["image_url"]
-            }
-            for row in workouts
-        ]
-    finally:
-        db.close()
+    catalog = await db.get_exercise_catalog()
+    body, etag = (catalog.compact_json, catalog.compact_etag) if compact else (catalog.full_json, catalog.full_etag)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # POST /workouts/log: Log a workout for the user
 
@@ -44,24 +42,23 @@ async def log_workout(
     workout: WorkoutLogCreate,
     exercise_id: int = Query(...),
     current_user: dict = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
-    """Log a workout for the authenticated user."""
-    print(f"Received workout data: {workout.dict()}")
+    """Log a workout for the authenticated user. Retries with the same Idempotency-Key are not logged twice."""
+    if idempotency.replay is not None:
+        return idempotency.replay
     firebase_uid = current_user.get("uid")
-    db.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
-    user = db.cursor.fetchone()
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(firebase_uid)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Verify the exercise exists
-    db.cursor.execute("SELECT exercise_id FROM Workout_Exercises WHERE exercise_id = %s", (exercise_id,))
-    if not db.cursor.fetchone():
+    if not await db.get_exercise(exercise_id):
         raise HTTPException(status_code=404, detail="Exercise not found")
 
     # Insert the workout log
-    workout_log_id = db.log_workout(
+    workout_log_id = await db.log_workout(
         user_id=user_id,
         plan_exercise_id=None,  # General logging, not tied to a plan
         exercise_id=exercise_id,
@@ -71,48 +68,119 @@ async def log_workout(
         weight=workout.weight,
         notes=workout.notes
     )
-    print(f"Inserted log_id: {workout_log_id}")
-    return {"message": "Workout logged successfully", "log_id": workout_log_id}
+    logger.debug(f"Logged workout {workout_log_id} for user {user_id}")
+    return await idempotency.save({"message": "Workout logged successfully", "log_id": workout_log_id})
+
+
+# POST /workouts/log/batch: Log a whole session at once
+
+# Checked per entry, so one bad entry is reported instead of failing the schema's CHECK constraints for the batch
+NON_NEGATIVE_LOG_FIELDS = ("sets", "reps", "duration_minutes", "weight")
+
+@router.post("/log/batch")
+async def log_workout_batch(
+    batch: WorkoutLogBatch,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    Log several workouts for the authenticated user in one request. Exercise and plan exercise IDs are
+    checked with one query each and the valid entries are inserted in one transaction. Invalid entries are
+    skipped and reported in `errors` by their index; `log_ids` has the new ID of each entry, or null.
+    """
+    user_id = await db.get_user_id_by_firebase_uid(current_user.get("uid"))
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    entries = batch.entries
+    known_exercises = await db.find_exercise_ids([entry.exercise_id for entry in entries])
+    owned_plan_exercises = await db.get_owned_plan_exercises(
+        user_id, list({entry.plan_exercise_id for entry in entries if entry.plan_exercise_id is not None})
+    )
 
+    errors = []
+    valid = []
+    for index, entry in enumerate(entries):
+        negative = [name for name in NON_NEGATIVE_LOG_FIELDS if (getattr(entry, name) or 0) < 0]
+        if entry.exercise_id not in known_exercises:
+            detail = "Exercise not found"
+        elif entry.plan_exercise_id is not None and entry.plan_exercise_id not in owned_plan_exercises:
+            detail = "Plan exercise not found"
+        elif entry.plan_exercise_id is not None and owned_plan_exercises[entry.plan_exercise_id] != entry.exercise_id:
+            detail = "Exercise ID does not match the plan exercise"
+        elif negative:
+            detail = f"{', '.join(negative)} must be non-negative"
+        else:
+            valid.append((index, entry))
+            continue
+        errors.append({"index": index, "detail": detail})
+
+    new_ids = await db.log_workouts(user_id, [entry.model_dump() for _, entry in valid])
+    log_ids = [None] * len(entries)
+    for (index, _), log_id in zip(valid, new_ids):
+        log_ids[index] = log_id
+    return {"message": f"Logged {len(new_ids)} of {len(entries)} workouts", "log_ids": log_ids, "errors": errors}
+
+
+# GET /workouts/logs: Retrieve the user's workout logs, one page at a time
+def encode_log_cursor(row: dict) -> str:
+    """Opaque cursor pointing just past a log row in (date_logged, log_id) DESC order."""
+    raw = json.dumps([row["date_logged"].isoformat(), row["log_id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_log_cursor(cursor: str) -> tuple:
+    try:
+        date_logged, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(date_logged), int(log_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-# GET /workouts/logs: Retrieve the user's workout logs
 @router.get("/logs")
 async def get_workout_logs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    exercise_id: Optional[int] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """
-    Retrieve all workout logs for the authenticated user.
-    Joins Workout_Logs with Workout_Exercises and Users to include exercise names.
-    Orders logs by date_logged DESC, with a secondary sort by log_id DESC for consistent ordering.
+    Retrieve the authenticated user's workout logs, newest first (date_logged DESC, log_id DESC).
+    Returns at most `limit` logs; when more exist, the X-Next-Cursor response header holds the
+    cursor for the next page. Optional filters: start_date/end_date (inclusive days) and exercise_id.
+    `fields` is a comma-separated list of the log fields to return (default: all).
     """
-    firebase_uid = current_user.get("uid")
-    db.cursor.execute(
-        """
-        SELECT wl.log_id, wl.user_id, wl.exercise_id, we.exercise_name, wl.date_logged,
-               wl.sets, wl.reps, wl.duration_minutes, wl.weight, wl.notes
-        FROM Workout_Logs wl
-        JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
-        JOIN Users u ON wl.user_id = u.user_id
-        WHERE u.firebase_uid = %s
-        ORDER BY wl.date_logged DESC, wl.log_id DESC
-        """,
-        (firebase_uid,)
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    selected = None
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in Database.WORKOUT_LOG_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    before = decode_log_cursor(cursor) if cursor else None
+
+    user_id = await db.get_user_id_by_firebase_uid(current_user.get("uid"))
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Fetch one extra row to know whether there is a next page
+    logs = await db.get_workout_logs(
+        user_id, limit + 1, before=before, start_date=start_date, end_date=end_date,
+        exercise_id=exercise_id, fields=selected
     )
-    logs = db.cursor.fetchall()
-    print(f"Fetched logs: {logs}")  # Debug print
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = encode_log_cursor(logs[-1])
+
+    output_fields = selected or list(Database.WORKOUT_LOG_FIELDS)
     return [
         {
-            "log_id": row["log_id"],
-            "user_id": row["user_id"],
-            "exercise_id": row["exercise_id"],
-            "exercise_name": row["exercise_name"],
-            "date_logged": str(row["date_logged"]),
-            "sets": row["sets"],
-            "reps": row["reps"],
-            "duration_minutes": row["duration_minutes"],
-            "weight": row["weight"],
-            "notes": row["notes"]
+            name: str(row[name]) if name == "date_logged" else row[name]
+            for name in output_fields
         }
         for row in logs
     ]
@@ -124,34 +192,25 @@ async def update_workout_log(
     log_id: int,
     workout: WorkoutLogUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """
     Update an existing workout log for the authenticated user.
     Accepts a partial update via WorkoutLogUpdate model and applies only the provided fields.
     Validates that updated fields are non-negative where applicable.
     """
-    print(f"Received update data: {workout.dict()}")  # Debug print
     # Get user_id from Firebase UID
     firebase_uid = current_user.get("uid")
-    db.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
-    user = db.cursor.fetchone()
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(firebase_uid)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Verify the log exists and belongs to the user
-    db.cursor.execute(
-        "SELECT log_id FROM Workout_Logs WHERE log_id = %s AND user_id = %s",
-        (log_id, user_id)
-    )
-    log = db.cursor.fetchone()
-    if not log:
+    if not await db.workout_log_exists(log_id, user_id):
         raise HTTPException(status_code=404, detail="Workout log not found or not owned by user")
 
     # Build dynamic update query using exclude_unset=True
     updates = workout.dict(exclude_unset=True)
-    print(f"Updates to apply: {updates}")  # Debug print
     if not updates:
         raise HTTPException(status_code=400, detail="No fields to update")
 
@@ -165,18 +224,8 @@ async def update_workout_log(
     if "weight" in updates and updates["weight"] < 0:
         raise HTTPException(status_code=400, detail="Weight must be non-negative")
 
-    # Build the update query
-    update_fields = [f"{key} = %s" for key in updates.keys()]
-    update_values = list(updates.values())
-    update_values.extend([log_id, user_id])
-    update_query = f"""
-    UPDATE Workout_Logs
-    SET {', '.join(update_fields)}
-    WHERE log_id = %s AND user_id = %s
-    """
-    print(f"Update query: {update_query}, Values: {update_values}")  # Debug print
-    db.cursor.execute(update_query, update_values)
-    db.conn.commit()
+    await db.update_workout_log(log_id, user_id, updates)
+    logger.debug(f"Updated workout log {log_id} for user {user_id}: {sorted(updates)}")
     return {"message": "Workout log updated successfully"}
 
 # DELETE /workouts/logs/{log_id}: Delete a workout log
@@ -184,37 +233,25 @@ async def update_workout_log(
 async def delete_workout_log(
     log_id: int,
     current_user: dict = Depends(get_current_user),
-    db: Database = Depends(get_database)
+    db: AsyncDatabase = Depends(get_async_database)
 ):
     """
     Delete a workout log for the authenticated user.
     Verifies that the log exists and belongs to the user before deletion.
     """
     firebase_uid = current_user.get("uid")
-    db.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
-    user = db.cursor.fetchone()
-    if not user:
+    user_id = await db.get_user_id_by_firebase_uid(firebase_uid)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_id = user["user_id"]
 
     # Verify the log exists and belongs to the user
-    db.cursor.execute(
-        "SELECT log_id FROM Workout_Logs WHERE log_id = %s AND user_id = %s",
-        (log_id, user_id)
-    )
-    log = db.cursor.fetchone()
-    if not log:
+    if not await db.workout_log_exists(log_id, user_id):
         raise HTTPException(status_code=404, detail="Workout log not found or not owned by user")
 
     # Delete the workout log
-    db.cursor.execute("DELETE FROM Workout_Logs WHERE log_id = %s AND user_id = %s", (log_id, user_id))
-    db.conn.commit()
+    await db.delete_workout_log(log_id, user_id)
     return {"message": "Workout log deleted successfully"}
 
 
 
-# TODO: Add pagination to GET /workouts/logs to handle large datasets
-# TODO: Add logging for database errors and failed operations
-# Future improvement: Add validation for exercise_id in POST /workouts/log to ensure it corresponds to a valid exercise
-
 # Logging a workout for a specific plan exercise is implemented in the plans_routes file.
\ No newline at end of file
@@ -1,7 +1,7 @@
-from app.database import get_db_connection
+from app.database import open_database
 
 def sync_user(uid: str, email: str):
-    db = get_db_connection()
+    db = open_database()
     try:
         db.sync_user(uid, email)
         db.commit()
@@ -0,0 +1,77 @@
+"""
+Shape-preserving downsampling for chart series, so a multi-year range fits a phone chart (`max_points`).
+
+- lttb: Largest-Triangle-Three-Buckets. Keeps the first and last points and, from each bucket in between,
+  the point forming the largest triangle with the previous pick and the next bucket's average. Suits
+  continuous lines such as weight; peaks and dips survive because they make large triangles.
+- min_max_buckets: the lowest and the highest point of each bucket. Suits spiky counts such as workouts
+  per day, where every local peak should stay visible.
+
+Both return the indices of the points to keep, in order; the stats routes use downsample_rows().
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of at most max_points points of the series (x increasing) chosen by LTTB."""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # max_points - 2 buckets over the points between the first and the last, each at least one point wide
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    edges = np.append(edges, n)  # the last "next bucket" is the final point alone
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end, following = edges[bucket], edges[bucket + 1], edges[bucket + 2]
+        next_x, next_y = x[end:following].mean(), y[end:following].mean()
+        # Twice the triangle areas; the factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max_buckets(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of max_points // 2 equal buckets, in order."""
+    n = len(y)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max_points // 2
+    bucket_of = np.arange(n) * buckets // n
+    # Sorted by bucket, then value: each bucket's first entry is its minimum and its last its maximum
+    order = np.lexsort((y, bucket_of))
+    starts = np.searchsorted(bucket_of[order], np.arange(buckets), side="left")
+    ends = np.searchsorted(bucket_of[order], np.arange(buckets), side="right") - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+
+def downsample_rows(rows: List[Dict[str, Any]], max_points: Optional[int], value_key: str,
+                    method: str = "lttb", x_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Keep at most max_points of the rows (all of them if max_points is None). lttb spaces the rows by x_key,
+    a date column, or evenly by position without one; min_max only needs the values.
+    """
+    if max_points is None or len(rows) <= max_points:
+        return rows
+    values = np.fromiter((row[value_key] for row in rows), dtype=np.float64, count=len(rows))
+    if method == "min_max":
+        keep = min_max_buckets(values, max_points)
+    elif method == "lttb":
+        if x_key is None:
+            positions = np.arange(len(rows), dtype=np.float64)
+        else:
+            positions = np.fromiter((row[x_key].toordinal() for row in rows), dtype=np.float64, count=len(rows))
+        keep = lttb(positions, values, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return [rows[index] for index in keep.tolist()]
@@ -0,0 +1,126 @@
+"""
+In-process cache of the Workout_Exercises catalog.
+
+The catalog is small and almost never changes, so each worker keeps a snapshot of it: the rows indexed
+by id plus the GET /workouts responses pre-serialized to JSON bytes with their ETags. Freshness comes
+from Catalog_Versions, a counter that triggers bump on every insert/update/delete of Workout_Exercises.
+A worker re-reads the counter at most every EXERCISE_CATALOG_CHECK_INTERVAL seconds and reloads the
+snapshot only when it moved.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields of a GET /workouts item, in order. The response calls exercise_id "id".
+EXERCISE_FIELDS = [
+    "exercise_name", "primary_muscle", "secondary_muscle", "difficulty", "category", "equipment",
+    "initial_recommended_sets", "initial_recommended_reps", "initial_recommended_time",
+    "instructions", "injury_prevention_tips", "image_url",
+]
+# The compact list leaves out the long TEXT columns
+COMPACT_EXCLUDED_FIELDS = {"instructions", "injury_prevention_tips"}
+
+
+def _serialize(items: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(items, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class CatalogSnapshot:
+    """One immutable version of the catalog and its serialized responses."""
+
+    def __init__(self, version: Optional[int], rows: List[Dict[str, Any]]):
+        self.version = version
+        self.rows = rows
+        self.by_id = {row["exercise_id"]: row for row in rows}
+        full = [{"id": row["exercise_id"], **{name: row.get(name) for name in EXERCISE_FIELDS}} for row in rows]
+        compact = [
+            {key: value for key, value in item.items() if key not in COMPACT_EXCLUDED_FIELDS}
+            for item in full
+        ]
+        self.full_json = _serialize(full)
+        self.compact_json = _serialize(compact)
+        self.full_etag = _etag(self.full_json)
+        self.compact_etag = _etag(self.compact_json)
+
+
+class ExerciseCatalog:
+    """Process-wide catalog cache; every method takes the Database to use on a reload or a miss."""
+
+    def __init__(self, check_interval: float = settings.EXERCISE_CATALOG_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.hits = 0  # snapshots served without a reload
+
+    def snapshot(self, db) -> CatalogSnapshot:
+        """Return the current snapshot, reloading it if the catalog version changed."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            # Another thread may have checked while we waited for the lock
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                self.hits += 1
+                return self._snapshot
+            version = self._read_version(db)
+            if self._snapshot is None or version is None or version != self._snapshot.version:
+                db.cursor.execute("SELECT * FROM Workout_Exercises ORDER BY exercise_id")
+                self._snapshot = CatalogSnapshot(version, db.cursor.fetchall())
+                self.reloads += 1
+                logger.info(f"Loaded exercise catalog version {version} ({len(self._snapshot.rows)} exercises)")
+            else:
+                self.hits += 1
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def get(self, db, exercise_id: int) -> Optional[Dict[str, Any]]:
+        """Look up one exercise. An id the snapshot does not know yet is checked in the database."""
+        row = self.snapshot(db).by_id.get(exercise_id)
+        if row is None:
+            db.cursor.execute("SELECT * FROM Workout_Exercises WHERE exercise_id = %s", (exercise_id,))
+            row = db.cursor.fetchone()
+            if row is not None:
+                # Added since the last version check; pick it up on the next access
+                self.invalidate()
+        return dict(row) if row is not None else None
+
+    def existing_ids(self, db, exercise_ids) -> set:
+        """The subset of exercise_ids that exist; ids the snapshot does not know are checked in one query."""
+        by_id = self.snapshot(db).by_id
+        found = {exercise_id for exercise_id in exercise_ids if exercise_id in by_id}
+        missing = list(set(exercise_ids) - found)
+        if missing:
+            placeholders = ", ".join(["%s"] * len(missing))
+            db.cursor.execute(f"SELECT exercise_id FROM Workout_Exercises WHERE exercise_id IN ({placeholders})", missing)
+            rows = db.cursor.fetchall()
+            if rows:
+                self.invalidate()
+            found.update(row["exercise_id"] for row in rows)
+        return found
+
+    def invalidate(self):
+        """Force a version check on the next access, e.g. after this process changed the catalog."""
+        self._checked_at = float("-inf")
+
+    @staticmethod
+    def _read_version(db) -> Optional[int]:
+        db.cursor.execute("SELECT version FROM Catalog_Versions WHERE name = 'Workout_Exercises'")
+        row = db.cursor.fetchone()
+        return row["version"] if row else None
+
+
+exercise_catalog = ExerciseCatalog()
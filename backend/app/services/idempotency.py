@@ -0,0 +1,247 @@
+"""
+Idempotency-Key support for write endpoints the app retries on flaky connections.
+
+A client sends the same `Idempotency-Key` header with every retry of one write. The first request
+reserves the key and runs; once its transaction commits its response is stored, and later requests with that key get the stored
+response back (with `Idempotent-Replayed: true`) without running the write again. A retry that arrives
+while the first is still running gets a 409; reusing a key for a different body gets a 422. Error
+responses are not stored, so a request that failed can be retried with the same key.
+
+Keys are scoped to the user, method and path, and expire after IDEMPOTENCY_KEY_TTL seconds. The default
+store is an in-process LRU; with several workers set IDEMPOTENCY_STORE=database to share the keys
+through the Idempotency_Keys table.
+
+    @router.post("/log")
+    async def log_workout(..., idempotency: IdempotentRequest = Depends(idempotent_request)):
+        if idempotency.replay is not None:
+            return idempotency.replay
+        ...
+        return await idempotency.save(result)
+"""
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from config.settings import settings
+from app.async_database import AsyncDatabase, get_async_database
+from app.cache import TTLCache
+from app.database import Database
+from app.dependencies import get_current_user
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyRecord:
+    """A reserved key: the hash of the request that reserved it and, once it finished, its response."""
+
+    def __init__(self, request_hash: str, status_code: Optional[int] = None, body: Any = None):
+        self.request_hash = request_hash
+        self.status_code = status_code  # None while the first request is still running
+        self.body = body
+
+
+class MemoryIdempotencyStore:
+    """
+    Keys held in this process. Completed responses are bounded by IDEMPOTENCY_STORE_MAXSIZE with LRU eviction;
+    reservations of requests still running are kept apart and never evicted, only expired after
+    IDEMPOTENCY_IN_FLIGHT_TTL, so a burst of new keys cannot free a running request's key for a duplicate.
+    """
+
+    blocking = False
+
+    def __init__(self, maxsize: int = settings.IDEMPOTENCY_STORE_MAXSIZE, ttl: float = settings.IDEMPOTENCY_KEY_TTL,
+                 in_flight_ttl: float = settings.IDEMPOTENCY_IN_FLIGHT_TTL):
+        self._cache = TTLCache("idempotency_keys", maxsize=maxsize, ttl=ttl)
+        self._in_flight: Dict[str, Tuple[float, IdempotencyRecord]] = {}  # key -> (expires_at, record)
+        self.in_flight_ttl = in_flight_ttl
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, request_hash: str) -> Optional[IdempotencyRecord]:
+        """Reserve the key and return None, or return the existing record if it is already taken."""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._in_flight.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    return entry[1]
+                del self._in_flight[key]
+            record = self._cache.get(key)
+            if record is None:
+                self._in_flight[key] = (now + self.in_flight_ttl, IdempotencyRecord(request_hash))
+            return record
+
+    def complete(self, key: str, request_hash: str, status_code: int, body: Any):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._cache.set(key, IdempotencyRecord(request_hash, status_code, body))
+
+    def release(self, key: str):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+
+class DatabaseIdempotencyStore:
+    """
+    Keys in the Idempotency_Keys table, shared by every worker. Each method runs on the request's own
+    connection (passed as db), so an idempotent request never waits on the pool for a second one.
+    reserve() commits at once, before the route has written anything, so the reservation is visible to
+    other workers before the write runs; complete() and release() run after the request's commit or rollback.
+    """
+
+    blocking = True
+    PURGE_INTERVAL = 60.0  # seconds between deletes of expired rows, per process
+
+    def __init__(self, ttl: float = settings.IDEMPOTENCY_KEY_TTL, in_flight_ttl: float = settings.IDEMPOTENCY_IN_FLIGHT_TTL):
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self._purged_at = float("-inf")
+
+    def reserve(self, db: Database, key: str, request_hash: str) -> Optional[IdempotencyRecord]:
+        if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            db.cursor.execute("DELETE FROM Idempotency_Keys WHERE expires_at < NOW() LIMIT 1000")
+        db.cursor.execute("DELETE FROM Idempotency_Keys WHERE idempotency_key = %s AND expires_at < NOW()", (key,))
+        # A concurrent reservation of the same key waits on the primary key lock, then is ignored
+        db.cursor.execute(
+            """
+            INSERT IGNORE INTO Idempotency_Keys (idempotency_key, request_hash, expires_at)
+            VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+            """,
+            (key, request_hash, int(self.in_flight_ttl))
+        )
+        if db.cursor.rowcount == 1:
+            db.commit()
+            return None
+        db.cursor.execute(
+            "SELECT request_hash, status_code, response_body FROM Idempotency_Keys WHERE idempotency_key = %s",
+            (key,)
+        )
+        row = db.cursor.fetchone()
+        db.commit()
+        if row is None:
+            # Released between our INSERT and SELECT; report it as in flight and let the client retry
+            return IdempotencyRecord(request_hash)
+        body = json.loads(row["response_body"]) if row["response_body"] is not None else None
+        return IdempotencyRecord(row["request_hash"], row["status_code"], body)
+
+    def complete(self, db: Database, key: str, request_hash: str, status_code: int, body: Any):
+        db.cursor.execute(
+            """
+            UPDATE Idempotency_Keys
+            SET status_code = %s, response_body = %s, expires_at = NOW() + INTERVAL %s SECOND
+            WHERE idempotency_key = %s AND request_hash = %s
+            """,
+            (status_code, json.dumps(body), int(self.ttl), key, request_hash)
+        )
+        db.commit()
+
+    def release(self, db: Database, key: str):
+        db.cursor.execute("DELETE FROM Idempotency_Keys WHERE idempotency_key = %s AND status_code IS NULL", (key,))
+        db.commit()
+
+
+_store = None
+
+
+def get_idempotency_store():
+    """Process-wide store chosen by IDEMPOTENCY_STORE ("memory" or "database"), created on first use."""
+    global _store
+    if _store is None:
+        if settings.IDEMPOTENCY_STORE == "database":
+            _store = DatabaseIdempotencyStore()
+        elif settings.IDEMPOTENCY_STORE == "memory":
+            _store = MemoryIdempotencyStore()
+        else:
+            raise ValueError(f"Unknown IDEMPOTENCY_STORE: {settings.IDEMPOTENCY_STORE}")
+    return _store
+
+
+async def _call(store, method: str, db: AsyncDatabase, *args):
+    fn = getattr(store, method)
+    if store.blocking:
+        # On the request's own connection, never a second one from the pool
+        return await db.run(fn, *args)
+    return fn(*args)
+
+
+class IdempotentRequest:
+    """Handle a route gets from idempotent_request: a stored response to replay, or save() for its own."""
+
+    def __init__(self, store=None, key: Optional[str] = None, request_hash: Optional[str] = None,
+                 db: Optional[AsyncDatabase] = None):
+        self.store = store
+        self.key = key
+        self.request_hash = request_hash
+        self.db = db
+        self.replay: Optional[JSONResponse] = None
+        self.saved = False
+
+    async def save(self, result: Any, status_code: int = 200) -> Any:
+        """
+        Store the route's result for replays of this key and return it unchanged. The result is stored only
+        once the request's database work is committed; if the commit fails the key is released instead.
+        """
+        if self.key is not None and self.replay is None:
+            self.db.on_commit(
+                functools.partial(
+                    _call, self.store, "complete", self.db, self.key, self.request_hash, status_code,
+                    jsonable_encoder(result)
+                ),
+                on_rollback=functools.partial(_call, self.store, "release", self.db, self.key),
+            )
+            self.saved = True
+        return result
+
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_async_database)
+):
+    """
+    FastAPI dependency for write endpoints. Without an Idempotency-Key header the route runs as usual.
+    With one, the key is reserved before the route runs and released again if the route fails.
+    """
+    if idempotency_key is None:
+        yield IdempotentRequest()
+        return
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+    store = get_idempotency_store()
+    scope = "\n".join([current_user["uid"], request.method, request.url.path, idempotency_key])
+    key = hashlib.sha256(scope.encode("utf-8")).hexdigest()
+    request_hash = hashlib.sha256(request.url.query.encode("utf-8") + b"\n" + await request.body()).hexdigest()
+
+    record = await _call(store, "reserve", db, key, request_hash)
+    handle = IdempotentRequest(store, key, request_hash, db)
+    if record is not None:
+        if record.request_hash != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if record.status_code is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        logger.info(f"Replaying stored response for {request.method} {request.url.path}")
+        handle.replay = JSONResponse(
+            content=record.body, status_code=record.status_code, headers={"Idempotent-Replayed": "true"}
+        )
+        yield handle
+        return
+
+    try:
+        yield handle
+    finally:
+        if not handle.saved:
+            # Once the request's own commit or rollback is done, so the release never commits a failed route's work
+            release = functools.partial(_call, store, "release", db, key)
+            db.on_commit(release, on_rollback=release)
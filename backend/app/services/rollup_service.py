@@ -0,0 +1,46 @@
+"""
+Rebuilds Workout_Daily_Rollup from the raw Workout_Logs, if the table ever drifts from the logs (the
+migration that creates it fills it from the logs already there).
+
+    python -m app.services.rollup_service             # every user
+    python -m app.services.rollup_service --user-id 42
+"""
+import argparse
+import logging
+from typing import Optional
+
+from app.database import Database, open_database
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_rollup(db: Database, user_id: Optional[int] = None) -> int:
+    """Rebuild one user's rollup, or every user's (one transaction per user); returns the rows written."""
+    if user_id is not None:
+        return db.rebuild_workout_rollup(user_id)
+
+    db.cursor.execute("SELECT DISTINCT user_id FROM Workout_Logs")
+    user_ids = [row["user_id"] for row in db.cursor.fetchall()]
+    # Rows left over for users who no longer have any logs
+    db.cursor.execute("DELETE FROM Workout_Daily_Rollup WHERE user_id NOT IN (SELECT user_id FROM Workout_Logs)")
+    db.commit()
+
+    total = 0
+    for uid in user_ids:
+        total += db.rebuild_workout_rollup(uid)
+    logger.info(f"Rebuilt workout rollup for {len(user_ids)} users ({total} rows)")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild Workout_Daily_Rollup from Workout_Logs")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's rows")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = open_database()
+    try:
+        rows = rebuild_rollup(db, args.user_id)
+        print(f"Wrote {rows} rollup rows")
+    finally:
+        db.close()
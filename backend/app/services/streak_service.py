@@ -1,61 +1,54 @@
+"""
+Workout streaks. The stored streak is maintained by the Database write methods: logging a workout extends
+or restarts it, deleting a day's last workout recomputes it. Reading it is a single primary key fetch.
+Days are the app server's: new logs are dated by its clock (not the database's CURRENT_TIMESTAMP), so
+extending the streak on a log, recomputing it from the logs on a delete and reading it all agree.
+
+Its migration fills the streaks from the existing logs; repair every user's streaks in one statement:
+
+    python -m app.services.streak_service             # every user
+    python -m app.services.streak_service --user-id 42
+"""
+import argparse
+import logging
 from datetime import date, timedelta
-from app.database import Database
-from freezegun import freeze_time
+from typing import Dict, Optional
 
-def update_streak(db: Database, user_id: int) -> int:
+from app.database import Database, open_database
+
+logger = logging.getLogger(__name__)
+
+
+def get_streak(db: Database, user_id: int, today: Optional[date] = None) -> Dict[str, int]:
     """
-    Update the user's streak based on workout logs.
-    Returns the current streak value.
+    The user's current and longest streak. The current streak counts consecutive days with a workout up to
+    today; a run that ended yesterday is still alive because today can continue it.
     """
-    # Get today's date 
-    today = date.today()
-    yesterday = today - timedelta(days=1)
-
-    # Convert dates to strings for SQL queries
-    today_str = today.strftime('%Y-%m-%d')
-    yesterday_str = yesterday.strftime('%Y-%m-%d')
-
-    # Get current streak and last update
-    streak_data = db.get_user_streak(user_id)
-    current_streak = streak_data["current_streak"]
-    last_update = streak_data["last_streak_update"]
-
-    # Check if the user logged a workout today
-    db.cursor.execute(
-        "SELECT COUNT(*) AS count FROM Workout_Logs WHERE user_id = %s AND DATE(date_logged) = %s",
-        (user_id, today_str)
-    )
-    today_workout_count = db.cursor.fetchone()["count"]
-
-    # If no update has happened yet, initialize the streak
-    if last_update is None:
-        current_streak = 1 if today_workout_count > 0 else 0
-        db.update_user_streak(user_id, current_streak, today)
-        return current_streak
-
-    # Convert last_update to a FakeDate for comparison 
-    # This ensures consistent comparison with today and yesterday
-    with freeze_time(last_update):
-        last_update_faked = date.today()
-
-    # If the last update was today, no further action needed
-    if last_update_faked == today:
-        return current_streak
-
-    # Check if the user missed a day
-    if last_update_faked < yesterday:
-        # Missed a day or more, reset streak
-        current_streak = 1 if today_workout_count > 0 else 0
-    elif last_update_faked == yesterday:
-        # Last update was yesterday
-        if today_workout_count > 0:
-            current_streak += 1
-        else:
-            current_streak = 0
-    else:
-        # Shouldn't happen (future date), but reset to be safe
-        current_streak = 1 if today_workout_count > 0 else 0
-
-    # Update the streak and last update date
-    db.update_user_streak(user_id, current_streak, today)
-    return current_streak
\ No newline at end of file
+    today = today or date.today()
+    streak = db.get_user_streak(user_id)
+    last_workout = streak["last_streak_update"]
+    alive = last_workout is not None and last_workout >= today - timedelta(days=1)
+    return {
+        "current_streak": streak["current_streak"] if alive else 0,
+        "longest_streak": streak["longest_streak"],
+    }
+
+
+def rebuild_streaks(db: Database, user_id: Optional[int] = None) -> int:
+    """Recompute one user's streaks, or every user's; returns the number of users updated."""
+    updated = db.rebuild_streaks(user_id)
+    logger.info(f"Rebuilt streaks for {updated} users")
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute current and longest streaks from Workout_Logs")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's streaks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = open_database()
+    try:
+        print(f"Updated {rebuild_streaks(db, args.user_id)} users")
+    finally:
+        db.close()
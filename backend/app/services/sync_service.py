@@ -0,0 +1,170 @@
+"""
+Delta sync for the mobile client's offline copy of its logs, weight entries and plans.
+
+A client without a cursor gets a full snapshot of its rows and a cursor. Afterwards it sends that cursor
+and gets only the rows created or changed since (their current state) plus the ids of deleted rows, read
+from the trigger-maintained Change_Log (see migrations/0005_change_log.sql).
+
+The cursor is the newest change_id the client has seen. That is only safe because a user's change ids
+follow commit order: the change log serializes transactions writing the same user's changes (see the
+migration), so no change at or below a visible id can become visible later, however long its
+transaction stays open.
+
+    python -m app.services.sync_service --older-than-days 90   # prune the change log
+"""
+import argparse
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.database import Database, open_database
+
+logger = logging.getLogger(__name__)
+
+# Response key -> (table, id column, the id column as the query names it, query for a user's rows).
+# Each query ends in a WHERE clause that an id filter can be appended to.
+SYNC_TABLES = {
+    "workout_logs": ("Workout_Logs", "log_id", "log_id", """
+        SELECT log_id, exercise_id, plan_exercise_id, date_logged, sets, reps, duration_minutes, weight, notes
+        FROM Workout_Logs
+        WHERE user_id = %s
+    """),
+    "weight_history": ("Weight_History", "weight_id", "weight_id", """
+        SELECT weight_id, date_logged, weight_kg
+        FROM Weight_History
+        WHERE user_id = %s
+    """),
+    "plans": ("Plans", "plan_id", "plan_id", """
+        SELECT plan_id, name, description, days_per_week, preferred_days, is_active, created_at, updated_at
+        FROM Plans
+        WHERE user_id = %s
+    """),
+    "plan_days": ("Plan_Days", "plan_day_id", "pd.plan_day_id", """
+        SELECT pd.plan_day_id, pd.plan_id, pd.day_number, pd.description, pd.created_at, pd.updated_at
+        FROM Plan_Days pd
+        JOIN Plans p ON pd.plan_id = p.plan_id
+        WHERE p.user_id = %s
+    """),
+    "plan_exercises": ("Plan_Exercises", "plan_exercise_id", "pe.plan_exercise_id", """
+        SELECT pe.plan_exercise_id, pe.plan_day_id, pe.exercise_id, pe.created_at, pe.updated_at
+        FROM Plan_Exercises pe
+        JOIN Plan_Days pd ON pe.plan_day_id = pd.plan_day_id
+        JOIN Plans p ON pd.plan_id = p.plan_id
+        WHERE p.user_id = %s
+    """),
+}
+_KEY_BY_TABLE = {table: key for key, (table, _, _, _) in SYNC_TABLES.items()}
+
+
+def _read_rows(db: Database, key: str, user_id: int, row_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    _, _, id_expr, query = SYNC_TABLES[key]
+    params = [user_id]
+    if row_ids is not None:
+        if not row_ids:
+            return []
+        query += f" AND {id_expr} IN ({', '.join(['%s'] * len(row_ids))})"
+        params += row_ids
+    db.cursor.execute(query, params)
+    return db.cursor.fetchall()
+
+
+def _cursor_at(db: Database, user_id: int) -> int:
+    """The user's newest committed change."""
+    db.cursor.execute(
+        "SELECT COALESCE(MAX(change_id), 0) AS cursor FROM Change_Log WHERE user_id = %s",
+        (user_id,)
+    )
+    return db.cursor.fetchone()["cursor"]
+
+
+def _cursor_expired(db: Database, since: int) -> bool:
+    """True if changes after `since` may have been pruned from the log."""
+    db.cursor.execute("SELECT MIN(change_id) AS oldest FROM Change_Log")
+    oldest = db.cursor.fetchone()["oldest"]
+    return oldest is not None and since < oldest - 1
+
+
+def snapshot(db: Database, user_id: int) -> Dict[str, Any]:
+    """Every synced row of the user, with the cursor to continue from."""
+    # Read the cursor first: changes that land while the snapshot is read are sent again next time
+    cursor = _cursor_at(db, user_id)
+    return {
+        "cursor": str(cursor),
+        "full": True,
+        "has_more": False,
+        "changes": {key: _read_rows(db, key, user_id) for key in SYNC_TABLES},
+        "deleted": {key: [] for key in SYNC_TABLES},
+    }
+
+
+def changes_since(db: Database, user_id: int, since: int, limit: int = 1000) -> Dict[str, Any]:
+    """
+    Rows changed after the `since` cursor, at most `limit` change log entries at a time (`has_more` tells
+    the client to call again with the returned cursor). Falls back to a snapshot if the cursor was pruned.
+    """
+    if _cursor_expired(db, since):
+        return snapshot(db, user_id)
+
+    db.cursor.execute(
+        """
+        SELECT change_id, table_name, row_id
+        FROM Change_Log
+        WHERE user_id = %s AND change_id > %s
+        ORDER BY change_id
+        LIMIT %s
+        """,
+        (user_id, since, limit)
+    )
+    entries = db.cursor.fetchall()
+
+    changed: Dict[str, set] = {key: set() for key in SYNC_TABLES}
+    for entry in entries:
+        key = _KEY_BY_TABLE.get(entry["table_name"])
+        if key is not None:
+            changed[key].add(entry["row_id"])
+
+    changes: Dict[str, List[Dict[str, Any]]] = {}
+    deleted: Dict[str, List[int]] = {}
+    for key, row_ids in changed.items():
+        id_column = SYNC_TABLES[key][1]
+        rows = _read_rows(db, key, user_id, sorted(row_ids))
+        changes[key] = rows
+        # Anything changed that is no longer there (or no longer the user's) was deleted
+        deleted[key] = sorted(row_ids - {row[id_column] for row in rows})
+
+    return {
+        "cursor": str(entries[-1]["change_id"] if entries else since),
+        "full": False,
+        "has_more": len(entries) == limit,
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+
+def prune_change_log(db: Database, older_than_days: int, batch_size: int = 10000) -> int:
+    """Delete change log entries older than the given age; clients with older cursors get a snapshot."""
+    total = 0
+    while True:
+        db.cursor.execute(
+            "DELETE FROM Change_Log WHERE changed_at < NOW() - INTERVAL %s DAY LIMIT %s",
+            (older_than_days, batch_size)
+        )
+        deleted = db.cursor.rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            break
+    logger.info(f"Pruned {total} change log entries older than {older_than_days} days")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune old Change_Log entries")
+    parser.add_argument("--older-than-days", type=int, default=90, help="Keep this many days of changes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = open_database()
+    try:
+        print(f"Deleted {prune_change_log(db, args.older_than_days)} change log entries")
+    finally:
+        db.close()
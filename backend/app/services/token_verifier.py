@@ -0,0 +1,170 @@
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import jwt
+from cryptography.x509 import load_pem_x509_certificate
+
+from config.settings import settings
+from app.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVerificationError(Exception):
+    """Raised when an ID token is malformed, badly signed, expired, revoked or for another project."""
+
+
+class SigningKeyCache:
+    """
+    Caches Firebase's signing certificates (settings.FIREBASE_CERTS_URL) in memory and refetches them when
+    the Cache-Control max-age of the last response runs out. An unknown key id triggers an early refresh
+    (keys rotate), at most once per min_refresh_interval so forged kids cannot make us hammer the certificate
+    endpoint. If a refetch fails, the keys already fetched stay in use and the next attempt backs off
+    exponentially from retry_backoff up to max_retry_backoff seconds.
+    """
+
+    def __init__(self, url: Optional[str] = None, fetch_timeout: float = 5.0,
+                 default_max_age: float = 3600.0, min_refresh_interval: float = 30.0,
+                 retry_backoff: float = 5.0, max_retry_backoff: float = 300.0):
+        self.url = url or settings.FIREBASE_CERTS_URL
+        self.fetch_timeout = fetch_timeout
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._retry_at = float("-inf")  # no fetch before this after a failed one
+        self._failures = 0
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _needs_refresh(self, kid: str, now: float) -> bool:
+        if now < self._retry_at:
+            return False
+        return now >= self._expires_at or (kid not in self._keys and now - self._last_fetch >= self.min_refresh_interval)
+
+    def get_key(self, kid: str):
+        """Return the public key for a key id, refreshing the certificate set if needed."""
+        if self._needs_refresh(kid, time.monotonic()):
+            with self._lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self._needs_refresh(kid, time.monotonic()):
+                    self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            if not self._keys:
+                raise TokenVerificationError("Token signing keys are unavailable")
+            raise TokenVerificationError(f"ID token signed with unknown key id '{kid}'")
+        return key
+
+    def _refresh(self):
+        self._last_fetch = time.monotonic()
+        try:
+            with urllib.request.urlopen(self.url, timeout=self.fetch_timeout) as response:
+                certs = json.loads(response.read().decode("utf-8"))
+                max_age = self._max_age(response.headers.get("Cache-Control"))
+            keys = {
+                kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+                for kid, pem in certs.items()
+            }
+        except Exception as e:
+            self._failures += 1
+            backoff = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+            self._retry_at = time.monotonic() + backoff
+            logger.error(
+                f"Fetching token signing keys failed ({self._failures} in a row), keeping the "
+                f"{len(self._keys)} cached keys and retrying in {backoff:.0f}s: {e}"
+            )
+            return
+        self.fetches += 1
+        self._failures = 0
+        self._retry_at = float("-inf")
+        self._keys = keys
+        self._expires_at = time.monotonic() + max_age
+        logger.info(f"Fetched {len(self._keys)} token signing keys, cached for {max_age:.0f}s")
+
+    def _max_age(self, cache_control: Optional[str]) -> float:
+        match = re.search(r"max-age=(\d+)", cache_control or "")
+        return float(match.group(1)) if match else self.default_max_age
+
+
+def lookup_revocation_state(uid: str) -> Tuple[bool, float]:
+    """Fetch (disabled, tokens_valid_after in epoch seconds) for a user from Firebase Auth."""
+    from app.firebase_config import firebase_auth
+
+    user = firebase_auth().get_user(uid)
+    valid_after_ms = user.tokens_valid_after_timestamp or 0
+    return user.disabled, valid_after_ms / 1000
+
+
+class TokenVerifier:
+    """
+    Verifies Firebase ID tokens locally: RS256 signature against cached signing keys, then the
+    exp/iat/aud/iss/sub claims, then revocation through a short-TTL per-uid cache. A revoked or
+    disabled user is therefore rejected at most revocation_ttl seconds after the change.
+    """
+
+    def __init__(self, project_id: str, key_cache: Optional[SigningKeyCache] = None,
+                 revocation_lookup: Callable[[str], Tuple[bool, float]] = lookup_revocation_state,
+                 revocation_ttl: float = 60.0, clock_skew: float = 5.0):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.key_cache = key_cache or SigningKeyCache()
+        self.revocation_lookup = revocation_lookup
+        self.revocation_cache = TTLCache("token_revocation", maxsize=100000, ttl=revocation_ttl)
+        self.clock_skew = clock_skew
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the decoded claims (with 'uid' set) or raise TokenVerificationError."""
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed ID token: {e}")
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError(f"Unexpected token algorithm '{header.get('alg')}'")
+
+        key = self.key_cache.get_key(header.get("kid"))
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+                leeway=self.clock_skew,
+                options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e))
+
+        uid = claims["sub"]
+        if not isinstance(uid, str) or not uid or len(uid) > 128:
+            raise TokenVerificationError("ID token has an invalid subject")
+        if claims.get("auth_time", 0) > time.time() + self.clock_skew:
+            raise TokenVerificationError("ID token has an auth_time in the future")
+        claims["uid"] = uid
+
+        self._check_revoked(uid, claims["iat"])
+        return claims
+
+    def _check_revoked(self, uid: str, issued_at: float):
+        state = self.revocation_cache.get(uid)
+        if state is None:
+            state = self.revocation_lookup(uid)
+            self.revocation_cache.set(uid, state)
+        disabled, valid_after = state
+        if disabled:
+            raise TokenVerificationError("The user account has been disabled")
+        if issued_at < valid_after:
+            raise TokenVerificationError("The ID token has been revoked")
+
+    def invalidate(self, uid: str):
+        """Forget the cached revocation state of a user, e.g. right after revoking their tokens."""
+        self.revocation_cache.pop(uid)
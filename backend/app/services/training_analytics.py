@@ -0,0 +1,154 @@
+"""
+Training volume and personal records, computed on the server so the client never downloads its whole log.
+
+Volume (tonnage) is sets * reps * weight, matching Workout_Daily_Rollup.total_volume. The estimated one-rep
+max uses Epley's formula, weight * (1 + reps / 30), and is the weight itself for a single rep. Only logs with
+both a weight and reps count towards the one-rep max and records.
+
+summarize_logs() makes one pass over Database.stream_workout_logs(), which fetches the rows in batches, and
+keeps only per-exercise and per-day totals in memory. All-time records are not recomputed at all: they are
+kept in Personal_Records by the workout write methods (see migrations/0007_personal_records.sql).
+
+Repair Personal_Records from the logs (its migration fills it from the logs already there):
+
+    python -m app.services.training_analytics             # every user
+    python -m app.services.training_analytics --user-id 42
+"""
+import argparse
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.database import Database, open_database
+
+logger = logging.getLogger(__name__)
+
+
+def estimated_one_rep_max(weight: float, reps: int) -> float:
+    """Epley's estimate of the weight that could be lifted once."""
+    return weight if reps == 1 else weight * (1 + reps / 30)
+
+
+def _new_exercise(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "exercise_id": row["exercise_id"],
+        "exercise_name": row["exercise_name"],
+        "workouts": 0,
+        "sets": 0,
+        "reps": 0,
+        "volume": 0.0,
+        "best_weight": None,
+        "best_weight_at": None,
+        "best_e1rm": None,
+        "best_e1rm_at": None,
+        "best_volume": None,
+        "best_volume_at": None,
+    }
+
+
+def _raise(record: Dict[str, Any], name: str, value: float, achieved):
+    # Strictly greater, so a tie keeps the earlier log (the rows arrive in date order)
+    if record[name] is None or value > record[name]:
+        record[name] = value
+        record[f"{name}_at"] = achieved
+
+
+def summarize_logs(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-exercise totals and bests and the volume per day, in one pass over logs in date order."""
+    exercises: Dict[int, Dict[str, Any]] = {}
+    daily: Dict[date, float] = {}
+    for row in rows:
+        exercise = exercises.get(row["exercise_id"])
+        if exercise is None:
+            exercise = exercises[row["exercise_id"]] = _new_exercise(row)
+        sets, reps, weight = row["sets"], row["reps"], row["weight"]
+        exercise["workouts"] += 1
+        exercise["sets"] += sets or 0
+        exercise["reps"] += reps or 0
+        volume = sets * reps * weight if sets is not None and reps is not None and weight is not None else 0.0
+        exercise["volume"] += volume
+        day = row["date_logged"].date()
+        daily[day] = daily.get(day, 0.0) + volume
+        if weight and reps:
+            achieved = row["date_logged"]
+            _raise(exercise, "best_weight", weight, achieved)
+            _raise(exercise, "best_e1rm", estimated_one_rep_max(weight, reps), achieved)
+            _raise(exercise, "best_volume", volume, achieved)
+    return {
+        "exercises": sorted(exercises.values(), key=lambda exercise: exercise["exercise_name"]),
+        "daily": [{"date": day, "volume": volume} for day, volume in sorted(daily.items())],
+    }
+
+
+def _record(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "exercise_id": row["exercise_id"],
+        "exercise_name": row["exercise_name"],
+        "best_weight": row["best_weight"],
+        "best_weight_date": row["best_weight_at"].date(),
+        "best_e1rm": round(row["best_e1rm"], 2),
+        "best_e1rm_date": row["best_e1rm_at"].date(),
+        "best_volume": row["best_volume"],
+        "best_volume_date": row["best_volume_at"].date(),
+    }
+
+
+def get_volume(db: Database, user_id: int, start_date: date, end_date: date,
+               exercise_id: Optional[int] = None) -> Dict[str, Any]:
+    """Total volume, per-exercise totals with the best estimated one-rep max, and volume per day for a range."""
+    summary = summarize_logs(db.stream_workout_logs(user_id, start_date, end_date, exercise_id))
+    return {
+        "total_volume": sum(exercise["volume"] for exercise in summary["exercises"]),
+        "by_exercise": [
+            {
+                "exercise_id": exercise["exercise_id"],
+                "exercise_name": exercise["exercise_name"],
+                "workouts": exercise["workouts"],
+                "sets": exercise["sets"],
+                "reps": exercise["reps"],
+                "volume": exercise["volume"],
+                "best_e1rm": round(exercise["best_e1rm"], 2) if exercise["best_e1rm"] is not None else None,
+            }
+            for exercise in summary["exercises"]
+        ],
+        "daily": summary["daily"],
+    }
+
+
+def get_records(db: Database, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                exercise_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Personal records per exercise. All-time records come straight from Personal_Records; with a date range,
+    the bests within that range are computed from the logs.
+    """
+    if start_date is None and end_date is None:
+        return [_record(row) for row in db.get_personal_records(user_id, exercise_id)]
+    summary = summarize_logs(db.stream_workout_logs(user_id, start_date, end_date, exercise_id))
+    return [_record(exercise) for exercise in summary["exercises"] if exercise["best_weight"] is not None]
+
+
+def rebuild_personal_records(db: Database, user_id: Optional[int] = None) -> int:
+    """Rebuild one user's records, or every user's (one transaction per user); returns the exercises with records."""
+    if user_id is not None:
+        return db.rebuild_personal_records(user_id)
+
+    db.cursor.execute("SELECT DISTINCT user_id FROM Workout_Logs")
+    user_ids = [row["user_id"] for row in db.cursor.fetchall()]
+    total = 0
+    for uid in user_ids:
+        total += db.rebuild_personal_records(uid)
+    logger.info(f"Rebuilt personal records for {len(user_ids)} users ({total} exercises)")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild Personal_Records from Workout_Logs")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's records")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = open_database()
+    try:
+        print(f"Wrote records for {rebuild_personal_records(db, args.user_id)} exercises")
+    finally:
+        db.close()
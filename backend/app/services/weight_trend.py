@@ -0,0 +1,108 @@
+"""
+Weight trend analytics for GET /stats/weight/trend, computed with NumPy over a user's daily average weights.
+
+- trend: exponentially smoothed weight. Days without an entry are filled by linear interpolation first, so
+  the smoothing advances one step per calendar day however irregularly the user weighs in.
+- ma_7 / ma_30: mean of the entries within the trailing 7 or 30 calendar days (entries only, no filling).
+- weekly_rate: change of the trend over the previous 7 days, in kg per week.
+- slope_kg_per_week, r_squared and projection: a least-squares line through the last REGRESSION_WINDOW_DAYS
+  days of entries, extended weekly for projection_days past the last entry.
+
+Every step is an array operation, so multi-year histories take milliseconds (benchmarks/weight_trend.py).
+"""
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_SMOOTHING = 0.1  # weight of each new day in the trend
+REGRESSION_WINDOW_DAYS = 90
+
+
+def exponential_smoothing(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    s[0] = x[0], s[i] = alpha * x[i] + (1 - alpha) * s[i - 1], without a Python loop per element.
+
+    Within a block, s[i] = d^(i+1) * s_prev + alpha * d^i * cumsum(x[k] * d^-k)[i] with d = 1 - alpha.
+    Blocks are sized so that d^-k stays far from overflowing; only the blocks are looped over.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha must be in (0, 1]")
+    values = np.asarray(values, dtype=np.float64)
+    if alpha == 1 or values.size == 0:
+        return values.copy()
+    decay = 1.0 - alpha
+    block = int(min(4096, max(1, 200 * np.log(10) / -np.log(decay))))
+    powers = decay ** np.arange(block + 1)  # d^0 .. d^block
+    out = np.empty_like(values)
+    previous = values[0]
+    for start in range(0, values.size, block):
+        chunk = values[start:start + block]
+        n = chunk.size
+        scaled = np.cumsum(chunk / powers[:n])
+        out[start:start + n] = powers[1:n + 1] * previous + alpha * powers[:n] * scaled
+        previous = out[start + n - 1]
+    return out
+
+
+def trailing_means(days: np.ndarray, values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the values whose day lies within the `window` days ending on each day (days sorted, distinct)."""
+    starts = np.searchsorted(days, days - (window - 1), side="left")
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, days.size + 1)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def _round(values: np.ndarray) -> List[Optional[float]]:
+    """Values rounded to 3 decimals as Python floats, with NaN as None."""
+    rounded = np.round(values, 3).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+def compute_weight_trend(rows: List[Dict[str, Any]], projection_days: int = 28,
+                         smoothing: float = DEFAULT_SMOOTHING) -> Dict[str, Any]:
+    """The trend of daily average weights, given as rows of {"date", "weight"} in date order."""
+    if not rows:
+        return {"points": [], "slope_kg_per_week": None, "r_squared": None, "projection": []}
+
+    ordinals = np.fromiter((row["date"].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    weights = np.fromiter((row["weight"] for row in rows), dtype=np.float64, count=len(rows))
+    days = ordinals - ordinals[0]
+
+    # The smoothed trend and its weekly change run on a gap-free daily grid
+    daily = np.interp(np.arange(days[-1] + 1), days, weights)
+    daily_trend = exponential_smoothing(daily, smoothing)
+    daily_rate = np.full(daily_trend.size, np.nan)
+    daily_rate[7:] = daily_trend[7:] - daily_trend[:-7]
+
+    points = [
+        {"date": day, "weight": weight, "trend": trend, "ma_7": ma_7, "ma_30": ma_30, "weekly_rate": rate}
+        for day, weight, trend, ma_7, ma_30, rate in zip(
+            [row["date"] for row in rows],
+            _round(weights),
+            _round(daily_trend[days]),
+            _round(trailing_means(days, weights, 7)),
+            _round(trailing_means(days, weights, 30)),
+            _round(daily_rate[days]),
+        )
+    ]
+
+    slope = r_squared = None
+    projection = []
+    recent = days >= days[-1] - (REGRESSION_WINDOW_DAYS - 1)
+    if recent.sum() >= 2:
+        x, y = days[recent], weights[recent]
+        slope, intercept = np.polyfit(x, y, 1)
+        residual = float(np.sum((y - (slope * x + intercept)) ** 2))
+        total = float(np.sum((y - y.mean()) ** 2))
+        r_squared = round(1.0 - residual / total, 4) if total > 0 else 1.0
+        ahead = np.arange(7, projection_days + 1, 7)
+        last_date = rows[-1]["date"]
+        projection = [
+            {"date": last_date + timedelta(days=int(offset)), "weight": weight}
+            for offset, weight in zip(ahead.tolist(), _round(slope * (days[-1] + ahead) + intercept))
+        ]
+        slope = round(float(slope) * 7, 4)
+
+    return {"points": points, "slope_kg_per_week": slope, "r_squared": r_squared, "projection": projection}
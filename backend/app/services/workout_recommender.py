@@ -1,6 +1,7 @@
 from app.database import Database
 from typing import List, Dict, Any, Union, Optional
 from datetime import date, timedelta
+import threading
 
 # Dictionary to map leg exercises to their primary focus (since database doesn't specify)
 leg_exercise_focus = {
@@ -55,6 +56,89 @@ def define_day_structure(split: str) -> Dict[str, Any]:
         raise ValueError(f"Unknown split: {split}")
 
 
+# Catalog ordering used by the recommender: ENUM order of difficulty, then exercise_id
+DIFFICULTY_RANK = {"Beginner": 0, "Intermediate": 1, "Advanced": 2}
+
+
+def _fold(value: Optional[str]) -> Optional[str]:
+    """Case-insensitive comparison key, matching MySQL's default collation for these columns."""
+    return value.casefold() if value is not None else None
+
+
+class ExerciseIndex:
+    """
+    The exercise catalog indexed for plan generation: rows by primary/secondary muscle and by
+    (primary muscle, name), each list already in recommendation order (easiest first, then id).
+    Built once per catalog snapshot, so generating a plan runs no catalog queries.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        ordered = sorted(rows, key=lambda row: (DIFFICULTY_RANK.get(row["difficulty"], len(DIFFICULTY_RANK)), row["exercise_id"]))
+        self.by_muscle: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_primary_and_name: Dict[tuple, Dict[str, Any]] = {}
+        for row in ordered:
+            muscles = {_fold(row["primary_muscle"]), _fold(row.get("secondary_muscle"))} - {None}
+            for muscle in muscles:
+                self.by_muscle.setdefault(muscle, []).append(row)
+            self.by_primary_and_name[(_fold(row["primary_muscle"]), _fold(row["exercise_name"]))] = row
+
+    def select(self, candidates, allowed_difficulties, excluded_exercises, excluded_equipment, selected_ids, limit):
+        """First `limit` candidates passing the difficulty, exclusion and already-selected filters."""
+        allowed = set(allowed_difficulties)
+        excluded_names = {_fold(name) for name in excluded_exercises}
+        excluded_kit = {_fold(kit) for kit in excluded_equipment}
+        chosen = []
+        for row in candidates:
+            if len(chosen) >= limit:
+                break
+            if (row["difficulty"] in allowed
+                    and _fold(row["exercise_name"]) not in excluded_names
+                    and (row.get("equipment") is None or _fold(row["equipment"]) not in excluded_kit)
+                    and row["exercise_id"] not in selected_ids):
+                chosen.append(row)
+        return chosen
+
+    def for_muscle(self, muscle: str) -> List[Dict[str, Any]]:
+        """Exercises whose primary or secondary muscle is `muscle`, in recommendation order."""
+        return self.by_muscle.get(_fold(muscle), [])
+
+    def named(self, primary_muscle: str, names: List[str]) -> List[Dict[str, Any]]:
+        """Exercises with the given names and primary muscle, in recommendation order."""
+        rows = [self.by_primary_and_name.get((_fold(primary_muscle), _fold(name))) for name in names]
+        rows = {row["exercise_id"]: row for row in rows if row is not None}.values()
+        return sorted(rows, key=lambda row: (DIFFICULTY_RANK.get(row["difficulty"], len(DIFFICULTY_RANK)), row["exercise_id"]))
+
+
+_index_lock = threading.Lock()
+_index_for_snapshot = (None, None)  # (CatalogSnapshot, ExerciseIndex)
+
+
+def get_exercise_index(db: Database) -> ExerciseIndex:
+    """The ExerciseIndex for the current catalog snapshot, rebuilt only when the catalog changes."""
+    global _index_for_snapshot
+    snapshot = db.get_exercise_catalog()
+    cached_snapshot, index = _index_for_snapshot
+    if cached_snapshot is not snapshot:
+        with _index_lock:
+            cached_snapshot, index = _index_for_snapshot
+            if cached_snapshot is not snapshot:
+                index = ExerciseIndex(snapshot.rows)
+                _index_for_snapshot = (snapshot, index)
+    return index
+
+
+def _recommendation(ex: Dict[str, Any], sets: int, reps: int) -> Dict[str, Any]:
+    return {
+        "exercise_id": ex["exercise_id"],
+        "exercise_name": ex["exercise_name"],
+        "primary_muscle": ex["primary_muscle"],
+        "secondary_muscle": ex["secondary_muscle"],
+        "recommended_sets": sets,
+        "recommended_reps": reps,
+        "recommended_duration": ex["initial_recommended_time"]
+    }
+
+
 def select_exercises(
     db: Database,
     muscles: List[str],
@@ -66,10 +150,12 @@ def select_exercises(
     """
     Select exercises for the given muscle groups, respecting preferences and user profile.
     Adjusts sets and reps based on experience level and goal.
+    Selection runs against the in-memory ExerciseIndex; the catalog is only read on a cache refresh.
     """
     exercises = []
     excluded_equipment = preferences.get("equipment", [])
     excluded_exercises = preferences.get("exercises", [])
+    index = get_exercise_index(db)
 
     # Determine difficulty levels based on experience level
     difficulty_levels = ["Beginner", "Intermediate", "Advanced"]
@@ -104,108 +190,26 @@ def select_exercises(
                 if not focus_exercises:
                     continue
 
-                # Generate placeholders for focus_exercises
-                exercise_placeholders = ", ".join(["%s"] * len(focus_exercises))
-                query = f"""
-                    SELECT *
-                    FROM Workout_Exercises
-                    WHERE primary_muscle = 'Legs'
-                    AND exercise_name IN ({exercise_placeholders})
-                """
-                params = list(focus_exercises)  # Flatten the list into individual parameters
-
-                # Add difficulty condition
-                if allowed_difficulties:
-                    difficulty_placeholders = ", ".join(["%s"] * len(allowed_difficulties))
-                    query += f" AND difficulty IN ({difficulty_placeholders})"
-                    params.extend(allowed_difficulties)
-
-                # Add excluded exercises condition
-                if excluded_exercises:
-                    ex_placeholders = ", ".join(["%s"] * len(excluded_exercises))
-                    query += f" AND exercise_name NOT IN ({ex_placeholders})"
-                    params.extend(excluded_exercises)
-
-                # Add excluded equipment condition
-                if excluded_equipment:
-                    eq_placeholders = ", ".join(["%s"] * len(excluded_equipment))
-                    query += f" AND (equipment IS NULL OR equipment NOT IN ({eq_placeholders}))"
-                    params.extend(excluded_equipment)
-
-                # Add selected exercise IDs condition
-                if selected_exercise_ids:
-                    ids_placeholders = ", ".join(["%s"] * len(selected_exercise_ids))
-                    query += f" AND exercise_id NOT IN ({ids_placeholders})"
-                    params.extend(list(selected_exercise_ids))
-                else:
-                    query += " AND 1=1"  # Safe placeholder to avoid errors
-
-                query += " ORDER BY difficulty ASC LIMIT %s"
-                params.append(count)
-
-                # Execute the query
-                db.cursor.execute(query, params)
-                available_exercises = db.cursor.fetchall()
+                available_exercises = index.select(
+                    index.named("Legs", focus_exercises), allowed_difficulties,
+                    excluded_exercises, excluded_equipment, selected_exercise_ids, count
+                )
                 for ex in available_exercises:
-                    exercises.append({
-                        "exercise_id": ex["exercise_id"],
-                        "exercise_name": ex["exercise_name"],
-                        "primary_muscle": ex["primary_muscle"],
-                        "secondary_muscle": ex["secondary_muscle"],
-                        "recommended_sets": base_sets,
-                        "recommended_reps": base_reps,
-                        "recommended_duration": ex["initial_recommended_time"]
-                    })
+                    exercises.append(_recommendation(ex, base_sets, base_reps))
                     selected_exercise_ids.add(ex["exercise_id"])
         else:
-            # Regular selection for other muscles
-            count = exercise_count if isinstance(exercise_count, int) else exercise_count.get(muscle, 1)
+            # Regular selection for other muscles, one exercise at a time
+            candidates = index.for_muscle(muscle)
             while remaining_counts.get(muscle, 0) > 0:
-                query = """
-                    SELECT *
-                    FROM Workout_Exercises
-                    WHERE (primary_muscle = %s OR secondary_muscle = %s)
-                """
-                params = [muscle, muscle]
-
-                if allowed_difficulties:
-                    difficulty_placeholders = ", ".join(["%s"] * len(allowed_difficulties))
-                    query += f" AND difficulty IN ({difficulty_placeholders})"
-                    params.extend(allowed_difficulties)
-
-                if excluded_exercises:
-                    ex_placeholders = ", ".join(["%s"] * len(excluded_exercises))
-                    query += f" AND exercise_name NOT IN ({ex_placeholders})"
-                    params.extend(excluded_exercises)
-
-                if excluded_equipment:
-                    eq_placeholders = ", ".join(["%s"] * len(excluded_equipment))
-                    query += f" AND (equipment IS NULL OR equipment NOT IN ({eq_placeholders}))"
-                    params.extend(excluded_equipment)
-
-                if selected_exercise_ids:
-                    ids_placeholders = ", ".join(["%s"] * len(selected_exercise_ids))
-                    query += f" AND exercise_id NOT IN ({ids_placeholders})"
-                    params.extend(list(selected_exercise_ids))
-                else:
-                    query += " AND 1=1"
-
-                query += " ORDER BY difficulty ASC LIMIT 1"
+                found = index.select(
+                    candidates, allowed_difficulties, excluded_exercises,
+                    excluded_equipment, selected_exercise_ids, 1
+                )
 
-                db.cursor.execute(query, params)
-                exercise = db.cursor.fetchone()
-
-                if exercise:
+                if found:
+                    exercise = found[0]
                     selected_exercise_ids.add(exercise["exercise_id"])
-                    exercises.append({
-                        "exercise_id": exercise["exercise_id"],
-                        "exercise_name": exercise["exercise_name"],
-                        "primary_muscle": exercise["primary_muscle"],
-                        "secondary_muscle": exercise["secondary_muscle"],
-                        "recommended_sets": base_sets,
-                        "recommended_reps": base_reps,
-                        "recommended_duration": exercise["initial_recommended_time"]
-                    })
+                    exercises.append(_recommendation(exercise, base_sets, base_reps))
                     if exercise["primary_muscle"] in remaining_counts:
                         remaining_counts[exercise["primary_muscle"]] -= 1
                     if exercise["secondary_muscle"] in remaining_counts and exercise["secondary_muscle"] != "N/A":
@@ -251,17 +255,9 @@ def generate_workout_plan(
     # Determine split
     split = determine_split(days_per_week)
 
-    # Create the plan
-    plan_id = db.create_plan(
-        user_id=user_id,
-        name=plan_name or f"AI-Generated {days_per_week}-Day Plan",
-        description=description or f"AI-generated plan for {user_profile.get('fitness_goal', 'general fitness')}",
-        days_per_week=days_per_week,
-        preferred_days=None
-    )
-
-    days = []
+    # Pick every day's exercises first (in memory), then write the whole plan in one transaction
     preferences = preferences or {}
+    selections = []
     for day_number, split_day in enumerate(split, start=1):
         day_structure = define_day_structure(split_day)
         exercises = select_exercises(
@@ -276,17 +272,27 @@ def generate_workout_plan(
         # Adjust volume based on frequency
         for ex in exercises:
             ex["recommended_sets"] = int(ex["recommended_sets"] * volume_factor)
-
-        # Store in database
-        plan_day_id = db.create_plan_day(plan_id, day_number, f"{split_day} Day")
-        for exercise in exercises:
-            db.add_exercise_to_day(plan_day_id, exercise["exercise_id"])
-
-        days.append(GeneratedPlanDay(
-            day_number=day_number,
-            description=f"{split_day} Day",
-            exercises=exercises
-        ))
+        selections.append((day_number, f"{split_day} Day", exercises))
+
+    with db.transaction():
+        plan_id = db.create_plan(
+            user_id=user_id,
+            name=plan_name or f"AI-Generated {days_per_week}-Day Plan",
+            description=description or f"AI-generated plan for {user_profile.get('fitness_goal', 'general fitness')}",
+            days_per_week=days_per_week,
+            preferred_days=None
+        )
+        day_ids = db.create_plan_days(plan_id, [(day_number, day_description) for day_number, day_description, _ in selections])
+        db.add_exercises_to_days([
+            (day_ids[day_number], exercise["exercise_id"])
+            for day_number, _, exercises in selections
+            for exercise in exercises
+        ])
+
+    days = [
+        GeneratedPlanDay(day_number=day_number, description=day_description, exercises=exercises)
+        for day_number, day_description, exercises in selections
+    ]
 
     return GeneratedPlan(
         plan_id=plan_id,
@@ -0,0 +1,222 @@
+"""
+Short-lived cache of the stats endpoints' responses, per user.
+
+Entries are keyed by user and (endpoint, start_date, end_date, granularity) and live for STATS_CACHE_TTL
+seconds. Every write that changes a user's stats (workout logs, weight entries, a rollup rebuild) calls
+invalidate_user() once it is committed, which drops that user's entries and nobody else's.
+
+Backends, chosen by STATS_CACHE_BACKEND:
+
+- "memory": an LRU in each process, capped at STATS_CACHE_MAX_BYTES of serialized responses. A write only
+  invalidates the worker that handled it, so with several workers the others may serve that user the old
+  figures, even right after their own write, until the TTL runs out.
+- "redis": shared by every worker through STATS_CACHE_REDIS_URL (Redis or any server speaking its protocol,
+  e.g. a local Valkey or KeyDB). Invalidation replaces the user's generation token, so their old entries are
+  no longer looked up and expire on their own; cap memory on the server with maxmemory and an LRU policy.
+- "auto" (default): "memory" when the server runs a single worker (WEB_CONCURRENCY, which gunicorn.conf.py
+  sets to its worker count), otherwise no cache. Use "redis" to cache with several workers.
+- "off": no cache.
+
+A response computed while a write is committing must not be stored after that write's invalidation. The
+memory backend refuses results of lookups that started before the user's last invalidation; the Redis
+backend stores them under the generation the lookup saw, which the invalidation has already replaced.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# How long the memory backend remembers an invalidation. A lookup older than this is not stored, since an
+# invalidation after it may already be forgotten; it is longer than any request computing stats takes.
+INVALIDATION_WINDOW = 60.0
+
+
+class MemoryStatsCache:
+    """Per-process LRU of JSON-ready responses, bounded by their serialized size."""
+
+    blocking = False
+
+    def __init__(self, max_bytes: int = settings.STATS_CACHE_MAX_BYTES, ttl: float = settings.STATS_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, Hashable], tuple]" = OrderedDict()  # -> (expires_at, size, value)
+        self._keys_by_user: Dict[int, Set[Hashable]] = {}
+        self._invalidated: Dict[int, float] = {}  # user_id -> time of their last invalidation, within the window
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, user_id: int, key: Hashable) -> Tuple[float, Any]:
+        """(token for store(), cached value or None)."""
+        token = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None:
+                if entry[0] > token:
+                    self._entries.move_to_end((user_id, key))
+                    self.hits += 1
+                    return token, entry[2]
+                self._remove(user_id, key)
+            self.misses += 1
+        return token, None
+
+    def store(self, user_id: int, key: Hashable, token: float, value: Any):
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if time.monotonic() - token > INVALIDATION_WINDOW or self._invalidated.get(user_id, float("-inf")) >= token:
+                return  # computed from data read before the user's latest write, or too long ago to tell
+            self._remove(user_id, key)
+            self._entries[(user_id, key)] = (time.monotonic() + self.ttl, size, value)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            self.size += size
+            while self.size > self.max_bytes:
+                (old_user, old_key) = next(iter(self._entries))
+                self._remove(old_user, old_key)
+
+    def invalidate(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            self._invalidated[user_id] = now
+            if now - self._pruned_at >= INVALIDATION_WINDOW:
+                # Only invalidations older than any lookup store() still accepts are dropped
+                self._pruned_at = now
+                self._invalidated = {
+                    uid: at for uid, at in self._invalidated.items() if now - at <= INVALIDATION_WINDOW
+                }
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(user_id, key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._invalidated.clear()
+            self.size = 0
+
+    def _remove(self, user_id: int, key: Hashable):
+        entry = self._entries.pop((user_id, key), None)
+        if entry is None:
+            return
+        self.size -= entry[1]
+        keys = self._keys_by_user[user_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_user[user_id]
+
+
+class RedisStatsCache:
+    """Entries in Redis, shared by every worker. Errors are logged and treated as misses."""
+
+    blocking = True
+    PREFIX = "stats:"
+
+    def __init__(self, url: str = settings.STATS_CACHE_REDIS_URL, ttl: float = settings.STATS_CACHE_TTL,
+                 max_entry_bytes: int = settings.STATS_CACHE_MAX_BYTES, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("STATS_CACHE_BACKEND=redis needs the redis package (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.PREFIX}gen:{user_id}"
+
+    def _entry_key(self, user_id: int, generation: str, key: Hashable) -> str:
+        return f"{self.PREFIX}{user_id}:{generation}:{json.dumps(key, default=str)}"
+
+    def lookup(self, user_id: int, key: Hashable) -> Tuple[Optional[str], Any]:
+        try:
+            generation = self.client.get(self._generation_key(user_id))
+            generation = generation.decode() if generation is not None else "0"
+            payload = self.client.get(self._entry_key(user_id, generation, key))
+        except Exception as e:
+            logger.warning(f"Stats cache lookup failed: {e}")
+            return None, None
+        if payload is None:
+            self.misses += 1
+            return generation, None
+        self.hits += 1
+        return generation, json.loads(payload)
+
+    def store(self, user_id: int, key: Hashable, token: Optional[str], value: Any):
+        if token is None:
+            return
+        payload = json.dumps(value)
+        if len(payload) > self.max_entry_bytes:
+            return
+        try:
+            self.client.set(self._entry_key(user_id, token, key), payload, px=int(self.ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Stats cache store failed: {e}")
+
+    def invalidate(self, user_id: int):
+        # Outlives every entry stored under the old generation, so a lapsed token cannot bring one back
+        try:
+            self.client.set(self._generation_key(user_id), uuid.uuid4().hex, px=int(self.ttl * 2000))
+        except Exception as e:
+            logger.error(f"Stats cache invalidation for user {user_id} failed; entries may be stale for {self.ttl}s: {e}")
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f"{self.PREFIX}*"):
+            self.client.delete(key)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _backend() -> str:
+    """STATS_CACHE_BACKEND with "auto" resolved: a per-process cache is only kept precise with one worker."""
+    if settings.STATS_CACHE_BACKEND == "auto":
+        return "memory" if settings.SERVER_WORKERS <= 1 else "off"
+    return settings.STATS_CACHE_BACKEND
+
+
+def get_stats_cache():
+    """Process-wide cache chosen by STATS_CACHE_BACKEND, or None when it is off or STATS_CACHE_TTL is 0."""
+    global _cache
+    backend = _backend()
+    if settings.STATS_CACHE_TTL <= 0 or backend == "off":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if backend == "redis":
+                    _cache = RedisStatsCache()
+                elif backend == "memory":
+                    _cache = MemoryStatsCache()
+                else:
+                    raise ValueError(f"Unknown STATS_CACHE_BACKEND: {settings.STATS_CACHE_BACKEND}")
+    return _cache
+
+
+def invalidate_user(user_id: int):
+    """Drop a user's cached stats. Call it after the write is committed (Database.on_commit)."""
+    cache = get_stats_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
+
+
+def clear():
+    """Drop every cached response this backend holds."""
+    cache = get_stats_cache()
+    if cache is not None:
+        cache.clear()
+
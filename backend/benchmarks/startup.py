@@ -0,0 +1,101 @@
+"""
+Worker startup benchmark: how long `import app.main` takes in a fresh interpreter, which modules it pulls in
+that belong in the startup phase instead (or in tests only), and the time from launching a server to its
+first successful response.
+
+    python -m benchmarks.startup                      # import time and time to first request
+    python -m benchmarks.startup --skip-server        # import time only, no database needed
+    python -m benchmarks.startup --budget 1.0         # exit with status 1 if the import takes longer
+
+The server run goes through the normal lifespan (Firebase init, pool prefill), so it needs the same
+environment as the app itself.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported by `import app.main`
+DEFERRED_MODULES = ["firebase_REMOVED", "freezegun", "google.cloud"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def measure_import(runs: int) -> dict:
+    """Median seconds to import app.main in a fresh interpreter, and any deferred modules it loaded."""
+    timings, loaded = [], set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        loaded.update(probe["loaded"])
+    return {"median": statistics.median(timings), "max": max(timings), "loaded": sorted(loaded)}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(timeout: float) -> float:
+    """Seconds from starting uvicorn to the first 200 from GET /."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with status {server.returncode} before answering")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"No response within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure worker import time and time to first request")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time the import in")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the median import takes longer (seconds)")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure the import")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the first response")
+    args = parser.parse_args()
+
+    imported = measure_import(args.runs)
+    print(f"import app.main: median {imported['median'] * 1000:.0f} ms, max {imported['max'] * 1000:.0f} ms "
+          f"over {args.runs} runs")
+    failed = False
+    if imported["loaded"]:
+        print(f"  imported modules that should be deferred: {', '.join(imported['loaded'])}")
+        failed = True
+    if args.budget is not None and imported["median"] > args.budget:
+        print(f"  over the {args.budget * 1000:.0f} ms budget")
+        failed = True
+
+    if not args.skip_server:
+        print(f"time to first request: {measure_first_request(args.timeout) * 1000:.0f} ms")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,54 @@
+"""
+Weight trend benchmark: time compute_weight_trend over synthetic daily weight histories, from a few months up
+to 10k points (about 27 years of daily entries). No database needed.
+
+    python -m benchmarks.weight_trend                    # the default series sizes
+    python -m benchmarks.weight_trend --sizes 10000      # one size
+    python -m benchmarks.weight_trend --budget 50        # exit with status 1 if 10k points take longer (ms)
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.weight_trend import compute_weight_trend
+
+
+def synthetic_history(points: int, seed: int = 0) -> list:
+    """Daily average weights with a slow drift, a yearly cycle and noise; roughly one day in six skipped."""
+    rng = np.random.default_rng(seed)
+    days = np.cumsum(rng.choice([1, 1, 1, 1, 1, 2], size=points))
+    weights = 85 - 0.002 * days + 1.5 * np.sin(days * 2 * np.pi / 365) + rng.normal(0, 0.4, size=points)
+    start = date(2000, 1, 1)
+    return [{"date": start + timedelta(days=int(day)), "weight": float(weight)} for day, weight in zip(days, weights)]
+
+
+def measure(points: int, runs: int) -> dict:
+    """Median and max milliseconds for one compute_weight_trend call over `points` entries."""
+    rows = synthetic_history(points)
+    compute_weight_trend(rows)  # warm up
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        compute_weight_trend(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median": statistics.median(timings), "max": max(timings)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the weight trend computation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Series lengths to time")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per size")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the largest size's median exceeds this (ms)")
+    args = parser.parse_args()
+
+    result = None
+    for size in args.sizes:
+        result = measure(size, args.runs)
+        print(f"{size:>6} points: median {result['median']:.1f} ms, max {result['max']:.1f} ms over {args.runs} runs")
+    if args.budget is not None and result["median"] > args.budget:
+        print(f"  over the {args.budget:.0f} ms budget")
+        sys.exit(1)
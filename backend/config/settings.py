@@ -11,6 +11,58 @@ class Settings:
     DB_PASSWORD = os.getenv("DB_PASSWORD")
     DB_NAME = os.getenv("DB_NAME")
     FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+    # "firebase" calls verify_id_token(check_revoked=True) per request; "local" verifies signatures
+    # against cached keys and checks revocation through a cache (see app/services/token_verifier.py)
+    FIREBASE_TOKEN_VERIFICATION = os.getenv("FIREBASE_TOKEN_VERIFICATION", "firebase")
+    FIREBASE_CERTS_URL = os.getenv(
+        "FIREBASE_CERTS_URL",
+        "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+    )
+    TOKEN_REVOCATION_CACHE_TTL = float(os.getenv("TOKEN_REVOCATION_CACHE_TTL", "60"))
+
+    # Connection pool (see app/db_pool.py)
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+    DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "50"))  # keep below the session wait_timeout
+    DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "10"))  # ping connections idle longer than this
+    # Worker processes serving the app; gunicorn.conf.py sets WEB_CONCURRENCY to its worker count
+    SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Threads running blocking database calls for async handlers (see app/async_database.py)
+    DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", os.getenv("DB_POOL_MAX_SIZE", "10")))
+
+    # In-process user caches (see app/database.py). A TTL of 0 disables a cache.
+    USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+    USER_ID_CACHE_TTL = float(os.getenv("USER_ID_CACHE_TTL", "600"))
+    # Off by default: with several workers a profile edit is only invalidated in the worker that handled it
+    USER_PROFILE_CACHE_TTL = float(os.getenv("USER_PROFILE_CACHE_TTL", "0"))
+
+    # Exercise catalog cache (see app/services/exercise_catalog.py): how often a worker checks the catalog version
+    EXERCISE_CATALOG_CHECK_INTERVAL = float(os.getenv("EXERCISE_CATALOG_CHECK_INTERVAL", "5"))
+
+    # Idempotency-Key support (see app/services/idempotency.py). "memory" keeps keys per process;
+    # use "database" when several workers serve the same clients.
+    IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory")
+    IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))  # how long a response is replayed
+    IDEMPOTENCY_IN_FLIGHT_TTL = float(os.getenv("IDEMPOTENCY_IN_FLIGHT_TTL", "60"))  # a reservation left by a crashed request expires after this
+    IDEMPOTENCY_STORE_MAXSIZE = int(os.getenv("IDEMPOTENCY_STORE_MAXSIZE", "10000"))
+
+    # Stats response cache (see app/stats_cache.py). A TTL of 0 disables it. "memory" is per process, so a
+    # write is not seen by the other workers until the TTL runs out; "auto" uses it only with one worker.
+    # Use "redis" when several workers serve the same clients.
+    STATS_CACHE_BACKEND = os.getenv("STATS_CACHE_BACKEND", "auto")
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "30"))
+    STATS_CACHE_MAX_BYTES = int(os.getenv("STATS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))  # per process; the largest entry for redis
+    STATS_CACHE_REDIS_URL = os.getenv("STATS_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Query instrumentation (see app/query_stats.py)
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))  # log any statement slower than this
+    REQUEST_QUERY_WARNING_COUNT = int(os.getenv("REQUEST_QUERY_WARNING_COUNT", "25"))  # log requests running more statements
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+    # Prometheus metrics (see app/metrics.py): how often each worker copies its pool and cache counters
+    # into the gauges when PROMETHEUS_MULTIPROC_DIR is set; the worker answering a scrape also does on the spot
+    METRICS_GAUGE_REFRESH_INTERVAL = float(os.getenv("METRICS_GAUGE_REFRESH_INTERVAL", "15"))
 
     def __post_init__(self):
         # Validate that all required environment variables are set
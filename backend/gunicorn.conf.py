@@ -0,0 +1,27 @@
+# Gunicorn settings for the production image (see Dockerfile).
+#
+# With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to files in that directory and
+# GET /metrics aggregates them (app/metrics.py). The directory is emptied when the master starts, and a
+# worker's live gauges are removed when it exits so they stop counting towards the totals.
+import glob
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+# Tells the app how many workers share the clients (settings.SERVER_WORKERS), e.g. to skip per-process caches
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,4 @@
+-- Composite indexes for per-user date range queries (stats, weight history, streaks).
+-- Queries filter with `user_id = ? AND date_logged >= ? AND date_logged < ?`, which these serve as a range scan.
+CREATE INDEX idx_logs_user_date ON Workout_Logs(user_id, date_logged);
+CREATE INDEX idx_weight_user_date ON Weight_History(user_id, date_logged);
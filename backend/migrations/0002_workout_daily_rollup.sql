@@ -0,0 +1,24 @@
+-- Per-user, per-day workout totals by exercise category and primary muscle, read by the /stats endpoints.
+-- Filled from the existing logs below, then maintained incrementally by Database.log_workout /
+-- update_workout_log / delete_workout_log; rebuild from the raw logs with `python -m app.services.rollup_service`.
+CREATE TABLE Workout_Daily_Rollup (
+    user_id INT NOT NULL,
+    day DATE NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    primary_muscle VARCHAR(50) NOT NULL,
+    workout_count INT NOT NULL DEFAULT 0,
+    total_sets INT NOT NULL DEFAULT 0,
+    total_reps INT NOT NULL DEFAULT 0,
+    total_volume DOUBLE NOT NULL DEFAULT 0, -- SUM(sets * reps * weight)
+    PRIMARY KEY (user_id, day, category, primary_muscle),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO Workout_Daily_Rollup
+    (user_id, day, category, primary_muscle, workout_count, total_sets, total_reps, total_volume)
+SELECT wl.user_id, DATE(wl.date_logged), we.category, we.primary_muscle,
+       COUNT(*), COALESCE(SUM(wl.sets), 0), COALESCE(SUM(wl.reps), 0),
+       COALESCE(SUM(wl.sets * wl.reps * wl.weight), 0)
+FROM Workout_Logs wl
+JOIN Workout_Exercises we ON wl.exercise_id = we.exercise_id
+GROUP BY wl.user_id, DATE(wl.date_logged), we.category, we.primary_muscle;
@@ -0,0 +1,14 @@
+-- Version counters for cached reference tables. Every change to Workout_Exercises bumps its counter,
+-- so each worker's in-memory exercise catalog can tell it is stale with a single primary key lookup.
+CREATE TABLE Catalog_Versions (
+    name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO Catalog_Versions (name, version) VALUES ('Workout_Exercises', 1);
+
+CREATE TRIGGER trg_exercises_version_insert AFTER INSERT ON Workout_Exercises FOR EACH ROW
+    UPDATE Catalog_Versions SET version = version + 1 WHERE name = 'Workout_Exercises';
+CREATE TRIGGER trg_exercises_version_update AFTER UPDATE ON Workout_Exercises FOR EACH ROW
+    UPDATE Catalog_Versions SET version = version + 1 WHERE name = 'Workout_Exercises';
+CREATE TRIGGER trg_exercises_version_delete AFTER DELETE ON Workout_Exercises FOR EACH ROW
+    UPDATE Catalog_Versions SET version = version + 1 WHERE name = 'Workout_Exercises';
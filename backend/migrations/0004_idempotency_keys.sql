@@ -0,0 +1,12 @@
+-- Idempotency-Key reservations and stored responses for IDEMPOTENCY_STORE=database.
+-- idempotency_key is a SHA-256 of (firebase uid, method, path, client key); status_code is NULL while
+-- the first request is still running.
+CREATE TABLE Idempotency_Keys (
+    idempotency_key CHAR(64) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT NULL,
+    response_body MEDIUMTEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at DATETIME NOT NULL,
+    INDEX idx_idempotency_expires (expires_at)
+);
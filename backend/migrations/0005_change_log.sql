@@ -0,0 +1,104 @@
+-- Change feed for GET /sync. Triggers append (user_id, table, row id) for every insert, update and delete of
+-- the synced tables; change_id is the client's cursor. Only ids are recorded: /sync reads each changed row's
+-- current state and reports rows that no longer exist as deleted.
+--
+-- A cursor is only safe if no change at or below it can still become visible. change_id is taken when the
+-- change is written, not when its transaction commits, so two transactions writing the same user's changes
+-- could commit out of id order and a sync between the two commits would skip the earlier id for good. To
+-- rule that out, every Change_Log insert first upserts the user's row in Change_Log_Locks, which holds that
+-- row's lock until the transaction ends: a user's changes are written by one transaction at a time, however
+-- long it runs, and their ids follow commit order.
+--
+-- Foreign key cascades do not fire triggers, so the BEFORE DELETE triggers also record the children a delete
+-- is about to remove (days and exercises) or detach (logs whose plan_exercise_id is set to NULL).
+-- Old entries can be pruned with `python -m app.services.sync_service --older-than-days N`.
+CREATE TABLE Change_Log (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    table_name VARCHAR(32) NOT NULL,
+    row_id INT NOT NULL,
+    changed_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_change_log_user (user_id, change_id),
+    INDEX idx_change_log_changed_at (changed_at)
+);
+
+CREATE TABLE Change_Log_Locks (
+    user_id INT PRIMARY KEY,
+    change_count BIGINT NOT NULL DEFAULT 0
+);
+
+-- Runs before the auto-increment id is assigned, so the id is taken under the user's lock
+CREATE TRIGGER trg_change_log_lock BEFORE INSERT ON Change_Log FOR EACH ROW
+    INSERT INTO Change_Log_Locks (user_id, change_count) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE change_count = change_count + 1;
+
+CREATE TRIGGER trg_logs_change_insert AFTER INSERT ON Workout_Logs FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Workout_Logs', NEW.log_id);
+CREATE TRIGGER trg_logs_change_update AFTER UPDATE ON Workout_Logs FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Workout_Logs', NEW.log_id);
+CREATE TRIGGER trg_logs_change_delete AFTER DELETE ON Workout_Logs FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (OLD.user_id, 'Workout_Logs', OLD.log_id);
+
+CREATE TRIGGER trg_weight_change_insert AFTER INSERT ON Weight_History FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Weight_History', NEW.weight_id);
+CREATE TRIGGER trg_weight_change_update AFTER UPDATE ON Weight_History FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Weight_History', NEW.weight_id);
+CREATE TRIGGER trg_weight_change_delete AFTER DELETE ON Weight_History FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (OLD.user_id, 'Weight_History', OLD.weight_id);
+
+CREATE TRIGGER trg_plans_change_insert AFTER INSERT ON Plans FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Plans', NEW.plan_id);
+CREATE TRIGGER trg_plans_change_update AFTER UPDATE ON Plans FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id) VALUES (NEW.user_id, 'Plans', NEW.plan_id);
+CREATE TRIGGER trg_plans_change_delete BEFORE DELETE ON Plans FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT OLD.user_id, 'Plans', OLD.plan_id
+    UNION ALL
+    SELECT OLD.user_id, 'Plan_Days', pd.plan_day_id FROM Plan_Days pd WHERE pd.plan_id = OLD.plan_id
+    UNION ALL
+    SELECT OLD.user_id, 'Plan_Exercises', pe.plan_exercise_id
+    FROM Plan_Exercises pe JOIN Plan_Days pd ON pe.plan_day_id = pd.plan_day_id
+    WHERE pd.plan_id = OLD.plan_id
+    UNION ALL
+    SELECT wl.user_id, 'Workout_Logs', wl.log_id
+    FROM Workout_Logs wl
+    JOIN Plan_Exercises pe ON wl.plan_exercise_id = pe.plan_exercise_id
+    JOIN Plan_Days pd ON pe.plan_day_id = pd.plan_day_id
+    WHERE pd.plan_id = OLD.plan_id;
+
+CREATE TRIGGER trg_days_change_insert AFTER INSERT ON Plan_Days FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Days', NEW.plan_day_id FROM Plans p WHERE p.plan_id = NEW.plan_id;
+CREATE TRIGGER trg_days_change_update AFTER UPDATE ON Plan_Days FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Days', NEW.plan_day_id FROM Plans p WHERE p.plan_id = NEW.plan_id;
+CREATE TRIGGER trg_days_change_delete BEFORE DELETE ON Plan_Days FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Days', OLD.plan_day_id FROM Plans p WHERE p.plan_id = OLD.plan_id
+    UNION ALL
+    SELECT p.user_id, 'Plan_Exercises', pe.plan_exercise_id
+    FROM Plan_Exercises pe JOIN Plans p ON p.plan_id = OLD.plan_id
+    WHERE pe.plan_day_id = OLD.plan_day_id
+    UNION ALL
+    SELECT wl.user_id, 'Workout_Logs', wl.log_id
+    FROM Workout_Logs wl JOIN Plan_Exercises pe ON wl.plan_exercise_id = pe.plan_exercise_id
+    WHERE pe.plan_day_id = OLD.plan_day_id;
+
+CREATE TRIGGER trg_plan_exercises_change_insert AFTER INSERT ON Plan_Exercises FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Exercises', NEW.plan_exercise_id
+    FROM Plan_Days pd JOIN Plans p ON pd.plan_id = p.plan_id
+    WHERE pd.plan_day_id = NEW.plan_day_id;
+CREATE TRIGGER trg_plan_exercises_change_update AFTER UPDATE ON Plan_Exercises FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Exercises', NEW.plan_exercise_id
+    FROM Plan_Days pd JOIN Plans p ON pd.plan_id = p.plan_id
+    WHERE pd.plan_day_id = NEW.plan_day_id;
+CREATE TRIGGER trg_plan_exercises_change_delete BEFORE DELETE ON Plan_Exercises FOR EACH ROW
+    INSERT INTO Change_Log (user_id, table_name, row_id)
+    SELECT p.user_id, 'Plan_Exercises', OLD.plan_exercise_id
+    FROM Plan_Days pd JOIN Plans p ON pd.plan_id = p.plan_id
+    WHERE pd.plan_day_id = OLD.plan_day_id
+    UNION ALL
+    SELECT wl.user_id, 'Workout_Logs', wl.log_id
+    FROM Workout_Logs wl WHERE wl.plan_exercise_id = OLD.plan_exercise_id;
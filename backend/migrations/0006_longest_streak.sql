@@ -0,0 +1,31 @@
+-- Streaks are maintained when logs are written instead of on every GET /user/streak. last_streak_update now
+-- holds the day of the user's latest workout and current_streak the length of the run of workout days
+-- ending on it. All three are filled from the existing logs below (the same statement as
+-- database._STREAK_REBUILD); repair them with `python -m app.services.streak_service`.
+ALTER TABLE Users ADD COLUMN longest_streak INT NOT NULL DEFAULT 0;
+
+UPDATE Users u
+LEFT JOIN (
+    WITH days AS (
+        SELECT DISTINCT user_id, DATE(date_logged) AS day FROM Workout_Logs
+    ), runs AS (
+        SELECT user_id, COUNT(*) AS length, MAX(day) AS last_day
+        FROM (
+            SELECT user_id, day,
+                   DATE_SUB(day, INTERVAL ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) DAY) AS run
+            FROM days
+        ) islands
+        GROUP BY user_id, run
+    )
+    SELECT user_id, length, last_day, longest
+    FROM (
+        SELECT user_id, length, last_day,
+               MAX(length) OVER (PARTITION BY user_id) AS longest,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS latest
+        FROM runs
+    ) ranked
+    WHERE latest = 1
+) s ON s.user_id = u.user_id
+SET u.current_streak = COALESCE(s.length, 0),
+    u.longest_streak = COALESCE(s.longest, 0),
+    u.last_streak_update = s.last_day;
@@ -0,0 +1,39 @@
+-- Each user's personal records per exercise: heaviest weight, best estimated one-rep max (Epley:
+-- weight * (1 + reps / 30), the weight itself for single reps) and largest single-log volume
+-- (sets * reps * weight), each with when it was set. Only logs with a weight and reps count.
+-- Filled from the existing logs below, then raised incrementally by Database.log_workout / log_workouts and
+-- recomputed for the exercise when one of its logs is edited or deleted; repair with
+-- `python -m app.services.training_analytics`.
+CREATE TABLE Personal_Records (
+    user_id INT NOT NULL,
+    exercise_id INT NOT NULL,
+    best_weight FLOAT NOT NULL,
+    best_weight_at DATETIME NOT NULL,
+    best_e1rm DOUBLE NOT NULL,
+    best_e1rm_at DATETIME NOT NULL,
+    best_volume DOUBLE NOT NULL,
+    best_volume_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, exercise_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (exercise_id) REFERENCES Workout_Exercises(exercise_id) ON DELETE CASCADE
+);
+
+-- One user's logs of one exercise in date order: record recomputation and /stats/volume?exercise_id=
+CREATE INDEX idx_logs_user_exercise_date ON Workout_Logs(user_id, exercise_id, date_logged);
+
+-- The same ordered upsert as database._RECORDS_UPSERT, over every log
+INSERT INTO Personal_Records
+    (user_id, exercise_id, best_weight, best_weight_at, best_e1rm, best_e1rm_at, best_volume, best_volume_at)
+SELECT wl.user_id, wl.exercise_id, wl.weight, wl.date_logged,
+       IF(wl.reps = 1, wl.weight, wl.weight * (1 + wl.reps / 30e0)), wl.date_logged,
+       COALESCE(wl.sets * wl.reps * wl.weight, 0), wl.date_logged
+FROM Workout_Logs wl
+WHERE wl.weight > 0 AND wl.reps > 0
+ORDER BY wl.date_logged, wl.log_id
+ON DUPLICATE KEY UPDATE
+    best_weight_at = IF(VALUES(best_weight) > best_weight, VALUES(best_weight_at), best_weight_at),
+    best_weight = GREATEST(best_weight, VALUES(best_weight)),
+    best_e1rm_at = IF(VALUES(best_e1rm) > best_e1rm, VALUES(best_e1rm_at), best_e1rm_at),
+    best_e1rm = GREATEST(best_e1rm, VALUES(best_e1rm)),
+    best_volume_at = IF(VALUES(best_volume) > best_volume, VALUES(best_volume_at), best_volume_at),
+    best_volume = GREATEST(best_volume, VALUES(best_volume));
@@ -2,7 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from fastapi import Header
 from app.main import app
-from app.database import get_database
+from app.database import open_database
+from app.migrations import apply_migrations
 from tests.test_data import REAL_FIREBASE_TOKEN
 from app.dependencies import get_current_user  # Import the dependency to override
 import os
@@ -36,7 +37,7 @@ def firebase_token(request):
 @pytest.fixture
 def db():
     """Provide a database connection and clean up after each test."""
-    db = get_database()
+    db = open_database()
     yield db
     # Teardown: Delete from Users (cascades to dependent tables)
     db.cursor.execute("DELETE FROM Users")
@@ -65,8 +66,9 @@ def firebase_token():
 @pytest.fixture(scope="session")
 def db():
     print("Creating database connection for test session")
-    db = get_database()
+    db = open_database()
     try:
+        print(f"Applied migrations: {apply_migrations(db)}")
         print("Clearing tables before test session")
         db.clear_all_tables()
     except Exception as e:
@@ -86,8 +88,11 @@ def db():
             print(f"Error closing database connection: {e}")
 
 @pytest.fixture(autouse=True)
-def clear_tables(db):
-    """Clear all tables before each test to ensure isolation."""
+def clear_tables(request):
+    """Clear all tables before each test that uses the database, to ensure isolation. Offline tests skip MySQL."""
+    if not {"db", "client"} & set(request.fixturenames):
+        return
+    db = request.getfixturevalue("db")
     try:
         db.clear_all_tables()
     except Exception as e:
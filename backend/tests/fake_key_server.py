@@ -0,0 +1,100 @@
+"""
+Local stand-in for Google's securetoken certificate endpoint, so local token verification can be tested offline.
+Serves {kid: PEM certificate} with a Cache-Control header and signs ID tokens with the matching private keys.
+"""
+import datetime
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+
+def _make_key_pair():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(private_key, hashes.SHA256())
+    )
+    return private_key, cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+
+class FakeKeyServer:
+    """Use as a context manager; `url` points at the certificate endpoint."""
+
+    def __init__(self, project_id: str = "fittrack-test", max_age: int = 3600):
+        self.project_id = project_id
+        self.max_age = max_age
+        self.requests = 0
+        self.failing = False  # answer 503, as during an outage
+        self._keys = {}  # kid -> (private_key, pem)
+        self.current_kid = self.rotate()
+
+    def rotate(self) -> str:
+        """Add a new signing key and make it the one used by sign()."""
+        kid = uuid.uuid4().hex
+        self._keys[kid] = _make_key_pair()
+        self.current_kid = kid
+        return kid
+
+    def sign(self, uid: str = "testuser1", kid: str = None, **overrides) -> str:
+        """Mint an ID token shaped like a Firebase one; keyword arguments override claims."""
+        now = int(time.time())
+        claims = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "sub": uid,
+            "user_id": uid,
+            "auth_time": now,
+            "iat": now,
+            "exp": now + 3600,
+            "email": f"{uid}@example.com",
+        }
+        claims.update(overrides)
+        kid = kid or self.current_kid
+        private_key, _ = self._keys[kid]
+        return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+    def __enter__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.failing:
+                    self.send_error(503)
+                    return
+                body = json.dumps({kid: pem for kid, (_, pem) in server._keys.items()}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}, must-revalidate")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,52 @@
+import asyncio
+import time
+import pytest
+from app.async_database import AsyncDatabase, run_in_db_executor
+from app.database import Database, open_database
+
+
+async def open_async_database() -> AsyncDatabase:
+    return AsyncDatabase(await run_in_db_executor(open_database))
+
+
+def test_async_methods_match_database(db: Database):
+    """AsyncDatabase exposes the Database methods as coroutines."""
+    user_id = db.sync_user("testuser1", "test1@example.com")
+
+    async def scenario():
+        adb = await open_async_database()
+        try:
+            plan_id = await adb.create_plan(user_id, "Async Plan", None, 3, None)
+            plans = await adb.get_plans(user_id)
+            return plan_id, plans
+        finally:
+            await adb.close()
+
+    plan_id, plans = asyncio.run(scenario())
+    assert [p["plan_id"] for p in plans] == [plan_id]
+
+
+def test_cursor_is_not_exposed(db: Database):
+    """Direct cursor access would block the event loop, so the facade refuses it."""
+    adb = AsyncDatabase(db)
+    with pytest.raises(AttributeError):
+        adb.cursor
+
+
+def test_slow_queries_do_not_block_each_other(db: Database):
+    """Two slow queries on separate connections overlap instead of running back to back."""
+    def sleep_query(sync_db: Database):
+        sync_db.cursor.execute("SELECT SLEEP(0.5) AS slept")
+        return sync_db.cursor.fetchone()
+
+    async def scenario():
+        first, second = await open_async_database(), await open_async_database()
+        try:
+            start = time.monotonic()
+            await asyncio.gather(first.run(sleep_query), second.run(sleep_query))
+            return time.monotonic() - start
+        finally:
+            await first.close()
+            await second.close()
+
+    assert asyncio.run(scenario()) < 0.9
@@ -0,0 +1,43 @@
+import time
+from app.cache import TTLCache
+from app.database import Database, user_id_cache, user_profile_cache
+
+
+def test_ttl_cache_expiry_and_lru(db: Database):
+    """Entries expire after their TTL and the least recently used entry is evicted first."""
+    cache = TTLCache("test", maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_user_id_lookup_is_cached(db: Database):
+    """A resolved uid is served from the cache on the next lookup."""
+    user_id = db.sync_user("testuser1", "test1@example.com")
+    hits = user_id_cache.hits
+    assert db.get_user_id_by_firebase_uid("testuser1") == user_id
+    assert user_id_cache.hits == hits + 1
+
+
+def test_unknown_uid_is_not_cached(db: Database):
+    """A miss for an unsynced user must not hide the user once it is synced."""
+    assert db.get_user_id_by_firebase_uid("testuser1") is None
+    user_id = db.sync_user("testuser1", "test1@example.com")
+    assert db.get_user_id_by_firebase_uid("testuser1") == user_id
+
+
+def test_profile_cache_invalidated_on_update(db: Database, monkeypatch):
+    """Profile writes drop the cached row so the next read sees the change."""
+    monkeypatch.setattr(user_profile_cache, "ttl", 60.0)
+    user_id = db.sync_user("testuser1", "test1@example.com")
+    db.get_user_by_firebase_uid("testuser1")
+    db.update_user_profile(user_id, "cachedUser", "1990-01-01", "Male", 75.0, 175.0, "Muscle Gain", "Intermediate")
+    assert db.get_user_by_firebase_uid("testuser1")["username"] == "cachedUser"
+
+    db.log_weight(user_id, 74.0)
+    assert db.get_user_by_firebase_uid("testuser1")["weight_kg"] == 74.0
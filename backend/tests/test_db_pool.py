@@ -0,0 +1,90 @@
+import pytest
+from app.database import Database, open_database, get_db_connection, get_pool
+from app.db_pool import ConnectionPool, PoolTimeoutError
+
+
+def connection_id(db: Database) -> int:
+    db.cursor.execute("SELECT CONNECTION_ID() AS id")
+    return db.cursor.fetchone()["id"]
+
+
+def test_connection_is_reused(db: Database):
+    """A released connection should be handed out again instead of opening a new one."""
+    first = open_database()
+    first_id = connection_id(first)
+    first.close()
+
+    second = open_database()
+    try:
+        assert connection_id(second) == first_id
+    finally:
+        second.close()
+
+
+def test_session_variables_applied(db: Database):
+    """Session variables are set once when the physical connection is opened."""
+    pooled = open_database()
+    try:
+        pooled.cursor.execute("SELECT @@session.wait_timeout AS wait_timeout")
+        assert pooled.cursor.fetchone()["wait_timeout"] == 60
+    finally:
+        pooled.close()
+
+
+def test_release_rolls_back_uncommitted_work(db: Database):
+    """Uncommitted changes must not leak to the next request that leases the connection."""
+    pooled = open_database()
+    pooled.cursor.execute(
+        "INSERT INTO Users (firebase_uid, email) VALUES (%s, %s)",
+        ("uncommitted_uid", "uncommitted@example.com")
+    )
+    pooled.close()
+
+    pooled = open_database()
+    try:
+        pooled.cursor.execute("SELECT user_id FROM Users WHERE firebase_uid = %s", ("uncommitted_uid",))
+        assert pooled.cursor.fetchone() is None
+    finally:
+        pooled.close()
+
+
+def test_pool_stats(db: Database):
+    """Stats report leased connections and checkout wait times."""
+    before = get_pool().stats()
+    pooled = open_database()
+    try:
+        during = get_pool().stats()
+        assert during["in_use"] == before["in_use"] + 1
+        assert during["checkouts"] == before["checkouts"] + 1
+        assert 0 < during["utilization"] <= 1
+        assert during["wait_time_max_ms"] >= 0
+    finally:
+        pooled.close()
+
+
+def test_pool_timeout_when_exhausted(db: Database):
+    """Checkout fails with PoolTimeoutError once max_size connections are leased."""
+    pool = ConnectionPool(get_db_connection, min_size=0, max_size=1, timeout=0.1)
+    conn = pool.acquire()
+    try:
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        conn.close()
+        pool.close()
+
+
+def test_requests_return_connections(client, db: Database):
+    """The request-scoped dependency must release its connection on success and on error."""
+    in_use = get_pool().stats()["in_use"]
+
+    # No user exists, so this request ends in a 404 raised inside the handler
+    response = client.get("/plans")
+    assert response.status_code == 404
+    assert get_pool().stats()["in_use"] == in_use
+
+    db.sync_user("testuser1", "test1@example.com")
+    response = client.get("/plans")
+    assert response.status_code == 200
+    assert get_pool().stats()["in_use"] == in_use
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+import numpy as np
+from app.services.downsampling import downsample_rows, lttb, min_max_buckets
+
+
+def test_lttb_keeps_ends_and_spikes():
+    """The first and last points and isolated peaks and dips survive a 50x reduction."""
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 300)
+    y[4321], y[777] = 9.0, -9.0
+    keep = lttb(x, y, 200)
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == 9999
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep and 777 in keep
+
+
+def test_min_max_buckets_keep_each_buckets_extremes():
+    y = np.array([1, 5, 2, 0, 3, 3, 7, 4], dtype=float)
+    assert min_max_buckets(y, 4).tolist() == [1, 3, 4, 6]
+    assert min_max_buckets(y, 8).tolist() == list(range(8))  # nothing to reduce
+
+
+def test_downsample_rows_leaves_short_series_alone():
+    rows = [{"date": date(2023, 1, 1) + timedelta(days=day), "weight": 80.0} for day in range(5)]
+    assert downsample_rows(rows, None, "weight", x_key="date") is rows
+    assert downsample_rows(rows, 10, "weight", x_key="date") is rows
+    assert len(downsample_rows(rows, 3, "weight", x_key="date")) == 3
+
+
+def test_weight_history_max_points(client, db):
+    """A long weight history is cut to max_points entries that still include its lowest point."""
+    client.post("/auth/sync-user")
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    start = date(2021, 1, 1)
+    entries = [(user_id, f"{start + timedelta(days=day)} 08:00:00", 80.0 + (day % 10) / 10) for day in range(400)]
+    entries[123] = (user_id, f"{start + timedelta(days=123)} 08:00:00", 70.0)
+    db.cursor.executemany("INSERT INTO Weight_History (user_id, date_logged, weight_kg) VALUES (%s, %s, %s)", entries)
+    db.conn.commit()
+
+    url = "/stats/weight/history?start_date=2021-01-01&end_date=2022-12-31"
+    assert len(client.get(url).json()) == 400
+    reduced = client.get(f"{url}&max_points=50").json()
+    assert len(reduced) == 50
+    assert {"date": str(start + timedelta(days=123)), "weight": 70.0} in reduced
+    assert client.get(f"{url}&max_points=2").status_code == 422
@@ -0,0 +1,116 @@
+import pytest
+from app import database
+from app.async_database import AsyncDatabase
+from app.database import get_db_connection
+from app.db_pool import ConnectionPool
+from app.services import idempotency
+from app.services.idempotency import DatabaseIdempotencyStore, MemoryIdempotencyStore
+from tests.test_workouts import create_test_exercises
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request, monkeypatch):
+    """Run each test against a fresh store of both kinds."""
+    if request.param == "database":
+        request.getfixturevalue("db").clear_all_tables()  # migrated and empty, also for tests without `db`
+    store = MemoryIdempotencyStore() if request.param == "memory" else DatabaseIdempotencyStore()
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+def count_logs(db):
+    db.cursor.execute("SELECT COUNT(*) AS count FROM Workout_Logs")
+    return db.cursor.fetchone()["count"]
+
+
+def test_retried_workout_log_is_replayed(client, db, store):
+    """A retry with the same key gets the first response back and does not log the workout again."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    create_test_exercises(db)
+    headers = {"Idempotency-Key": "session-1-set-1"}
+    workout = {"sets": 3, "reps": 10, "weight": 50.0}
+
+    first = client.post("/workouts/log?exercise_id=1", json=workout, headers=headers)
+    retry = client.post("/workouts/log?exercise_id=1", json=workout, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert count_logs(db) == 1
+
+    # The same key with another body is refused; without a key every request is logged
+    response = client.post("/workouts/log?exercise_id=2", json=workout, headers=headers)
+    assert response.status_code == 422
+    client.post("/workouts/log?exercise_id=1", json=workout)
+    assert count_logs(db) == 2
+
+
+def test_failed_request_can_be_retried(client, db, store):
+    """Error responses are not stored, so the key is free again for the next attempt."""
+    headers = {"Idempotency-Key": "weight-1"}
+    entry = {"weight_kg": 80.5, "date_logged": "2024-03-01T08:00:00"}
+
+    # Not synced yet
+    assert client.post("/stats/weight", json=entry, headers=headers).status_code == 404
+
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    response = client.post("/stats/weight", json=entry, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["weight"] == 80.5
+
+
+def test_in_flight_key_is_reported(request, store):
+    """A second reservation while the first request runs sees it in progress, then its stored response."""
+    conn = (request.getfixturevalue("db"),) if store.blocking else ()  # the database store uses the request's connection
+    assert store.reserve(*conn, "key", "hash") is None
+    assert store.reserve(*conn, "key", "hash").status_code is None
+    store.complete(*conn, "key", "hash", 201, {"plan_id": 7})
+    record = store.reserve(*conn, "key", "hash")
+    assert (record.status_code, record.body) == (201, {"plan_id": 7})
+
+
+def test_running_key_is_not_evicted_by_newer_keys():
+    """A full memory store evicts old responses, never the reservation of a request still running."""
+    store = MemoryIdempotencyStore(maxsize=2)
+    assert store.reserve("running", "hash") is None
+    for i in range(5):
+        store.reserve(f"done-{i}", "hash")
+        store.complete(f"done-{i}", "hash", 200, {})
+    assert store.reserve("running", "hash").status_code is None
+    assert store.reserve("done-0", "hash") is None  # evicted, so free again
+
+
+def test_response_not_stored_when_the_commit_fails(client, db, store, monkeypatch):
+    """If the request's final commit fails, the key is released and a retry runs instead of replaying a lost write."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    create_test_exercises(db)
+    headers = {"Idempotency-Key": "commit-fails"}
+    workout = {"sets": 3, "reps": 10, "weight": 50.0}
+
+    async def failing_commit(self):
+        monkeypatch.delattr(AsyncDatabase, "commit")  # only the first one
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(AsyncDatabase, "commit", failing_commit, raising=False)
+    with pytest.raises(RuntimeError):
+        client.post("/workouts/log?exercise_id=1", json=workout, headers=headers)
+
+    retry = client.post("/workouts/log?exercise_id=1", json=workout, headers=headers)
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_idempotent_request_needs_one_connection(client, db, store, monkeypatch):
+    """The key is reserved and stored on the request's own connection, so a pool of one is enough."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    create_test_exercises(db)
+    headers = {"Idempotency-Key": "one-connection"}
+    workout = {"sets": 3, "reps": 10, "weight": 50.0}
+
+    pool = ConnectionPool(get_db_connection, min_size=0, max_size=1, timeout=1.0)
+    monkeypatch.setattr(database, "_pool", pool)
+    try:
+        assert client.post("/workouts/log?exercise_id=1", json=workout, headers=headers).status_code == 200
+        retry = client.post("/workouts/log?exercise_id=1", json=workout, headers=headers)
+        assert retry.headers["Idempotent-Replayed"] == "true"
+    finally:
+        pool.close()
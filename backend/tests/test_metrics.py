@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+from app import metrics
+from app.main import app
+
+
+def test_metrics_labels_requests_by_route(client):
+    """Requests are counted under their route template, not the raw path."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    client.get("/plans/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/plans/{plan_id}",status="404"}' in body
+    assert "/plans/999999" not in body
+    assert 'cache_hits{cache="user_id"}' in body
+    assert 'db_pool_connections{state="in_use"}' in body
+
+
+def test_process_gauges_refresh_on_scrape_not_per_request(monkeypatch):
+    """Pool and cache gauges are copied when /metrics is scraped; other requests only update request metrics."""
+    refreshes = []
+    monkeypatch.setattr(metrics, "refresh_process_gauges", lambda: refreshes.append(1))
+    client = TestClient(app)  # no database needed
+
+    assert client.get("/").status_code == 200
+    assert refreshes == []
+    body = client.get("/metrics").text
+    assert refreshes == [1]
+    assert 'http_request_db_queries_count{route="/"}' in body
@@ -168,6 +168,59 @@ def test_set_plan_active_not_found(client: TestClient, db: Database):
     assert response.json() == {"detail": "Plan not found"}
 
 # Days Endpoints Tests
+def test_get_plan_full(client: TestClient, db: Database):
+    """Test fetching a plan with its days and exercises nested, in day and insertion order."""
+    create_user(db, "testuser1", "test1@example.com")
+    bench = create_exercise(db, "Bench Press", "Strength", "Chest")
+    squat = create_exercise(db, "Squat", "Strength", "Legs")
+    plan_id = client.post("/plans", json={"name": "Full Plan", "days_per_week": 3}, follow_redirects=False).json()["plan_id"]
+    day2 = client.post(f"/plans/{plan_id}/days", json={"day_number": 2, "description": "Legs"}, follow_redirects=False).json()["plan_day_id"]
+    day1 = client.post(f"/plans/{plan_id}/days", json={"day_number": 1, "description": "Push"}, follow_redirects=False).json()["plan_day_id"]
+    client.post(f"/plans/{plan_id}/days/{day1}/exercises", json={"exercise_id": bench}, follow_redirects=False)
+    client.post(f"/plans/{plan_id}/days/{day1}/exercises", json={"exercise_id": squat}, follow_redirects=False)
+
+    response = client.get(f"/plans/{plan_id}/full")
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["name"] == "Full Plan"
+    assert [day["plan_day_id"] for day in plan["days"]] == [day1, day2]
+    assert [ex["exercise_name"] for ex in plan["days"][0]["exercises"]] == ["Bench Press", "Squat"]
+    assert plan["days"][1]["exercises"] == []
+
+    # Same shape as the per-day endpoint
+    day_exercises = client.get(f"/plans/{plan_id}/days/{day1}/exercises").json()
+    assert plan["days"][0]["exercises"] == day_exercises
+
+def test_get_plan_full_not_owned(client: TestClient, db: Database):
+    """Test that another user's plan is reported as not found."""
+    create_user(db, "testuser1", "test1@example.com")
+    other_id = create_user(db, "testuser2", "test2@example.com")
+    plan_id = db.create_plan(other_id, "Not Yours", None, 3, None)
+    response = client.get(f"/plans/{plan_id}/full")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Plan not found"
+
+def test_get_plans_expanded(client: TestClient, db: Database):
+    """Test the expand option of the plan list."""
+    create_user(db, "testuser1", "test1@example.com")
+    bench = create_exercise(db, "Bench Press", "Strength", "Chest")
+    plan_id = client.post("/plans", json={"name": "Plan 1", "days_per_week": 3}, follow_redirects=False).json()["plan_id"]
+    client.post("/plans", json={"name": "Plan 2", "days_per_week": 4}, follow_redirects=False)
+    day_id = client.post(f"/plans/{plan_id}/days", json={"day_number": 1, "description": "Day 1"}, follow_redirects=False).json()["plan_day_id"]
+    client.post(f"/plans/{plan_id}/days/{day_id}/exercises", json={"exercise_id": bench}, follow_redirects=False)
+
+    plans = client.get("/plans").json()
+    assert all("days" not in plan for plan in plans)
+
+    plans = client.get("/plans?expand=days").json()
+    assert [len(plan["days"]) for plan in plans] == [1, 0]
+    assert "exercises" not in plans[0]["days"][0]
+
+    plans = client.get("/plans?expand=days,exercises").json()
+    assert plans[0]["days"][0]["exercises"][0]["exercise_name"] == "Bench Press"
+
+    assert client.get("/plans?expand=owner").status_code == 400
+
 def test_create_day_valid(client: TestClient, db: Database):
     """Test adding a day to a plan."""
     create_user(db, "testuser1", "test1@example.com")
@@ -309,6 +362,32 @@ def test_remove_exercise_from_day(client: TestClient, db: Database):
     response = client.get(f"/plans/{plan_id}/days/{day_id}/exercises", follow_redirects=False)
     assert len(response.json()) == 0
 
+def test_nested_routes_check_ownership(client: TestClient, db: Database):
+    """Days and exercises are only reachable through the plan and day that own them."""
+    create_user(db, "testuser1", "test1@example.com")
+    other_id = create_user(db, "testuser2", "test2@example.com")
+    exercise_id = create_exercise(db, "Squat", "Strength", "Legs")
+    plan_id = db.create_plan(other_id, "Not Yours", None, 3, None)
+    day_id = db.create_plan_day(plan_id, 1, "Leg Day")
+    plan_exercise_id = db.add_exercise_to_day(day_id, exercise_id)
+    response = client.delete(f"/plans/{plan_id}/days/{day_id}/exercises/{plan_exercise_id}")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Plan not found"
+
+    own_plan = client.post("/plans", json={"name": "Mine", "days_per_week": 3}).json()["plan_id"]
+    response = client.get(f"/plans/{own_plan}/days/{day_id}/exercises")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Day not found"
+
+    own_day = client.post(f"/plans/{own_plan}/days", json={"day_number": 1}).json()["plan_day_id"]
+    response = client.delete(f"/plans/{own_plan}/days/{own_day}/exercises/{plan_exercise_id}")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Exercise not found in this day"
+    log = {"exercise_id": exercise_id, "sets": 3, "reps": 10}
+    response = client.post(f"/plans/{own_plan}/days/{own_day}/exercises/{plan_exercise_id}/log", json=log)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Plan exercise not found"
+
 # Workout Logging Tests
 def test_log_workout_valid(client: TestClient, db: Database):
     """Test logging a workout with valid data."""
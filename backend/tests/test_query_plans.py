@@ -0,0 +1,137 @@
+import os
+import pytest
+from datetime import date, datetime, timedelta
+from app.database import Database
+from app.migrations import MIGRATIONS_DIR, split_statements
+
+# Tables whose per-user date range queries must be served by an index rather than a scan, and the index to use
+RANGE_INDEXES = {
+    "Workout_Logs": "idx_logs_user_date",
+    "Weight_History": "idx_weight_user_date",
+    "Workout_Daily_Rollup": "PRIMARY",
+}
+
+
+class RecordingCursor:
+    """Wraps a cursor and keeps every statement it executes, so the queries can be EXPLAINed afterwards."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.statements = []
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self.statements.append((operation, params))
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def seed(db: Database, users: int = 5, days: int = 120):
+    """A few users with a workout and a weight entry most days, so the optimizer has a reason to use indexes."""
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (1, "Bench Press", "Strength", "Chest")
+    )
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (2, "Treadmill Run", "Cardio", "Full Body")
+    )
+    start = datetime(2023, 1, 1, 18, 0)
+    for user_id in range(1, users + 1):
+        db.cursor.execute(
+            "INSERT INTO Users (user_id, username, firebase_uid, email) VALUES (%s, %s, %s, %s)",
+            (user_id, f"planuser{user_id}", f"testuser{user_id}", f"test{user_id}@example.com")
+        )
+        logs = [(user_id, 1 + day % 2, start + timedelta(days=day), 3, 10) for day in range(days)]
+        db.cursor.executemany(
+            "INSERT INTO Workout_Logs (user_id, exercise_id, date_logged, sets, reps) VALUES (%s, %s, %s, %s, %s)",
+            logs
+        )
+        weights = [(user_id, start + timedelta(days=day), 80.0 - day * 0.05) for day in range(days)]
+        db.cursor.executemany(
+            "INSERT INTO Weight_History (user_id, date_logged, weight_kg) VALUES (%s, %s, %s)",
+            weights
+        )
+    db.conn.commit()
+    db.rebuild_workout_rollup()
+    db.cursor.execute("ANALYZE TABLE Workout_Logs, Weight_History, Workout_Daily_Rollup")
+    db.cursor.fetchall()
+
+
+def record_queries(db: Database, calls) -> list:
+    """Run the given Database calls and return the SELECT statements they executed."""
+    recorder = RecordingCursor(db.cursor)
+    db.cursor = recorder
+    try:
+        for call in calls:
+            call()
+    finally:
+        db.cursor = recorder._cursor
+    return [(sql, params) for sql, params in recorder.statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def run_migration_backfill(db: Database, name: str):
+    """Run the data statements (INSERT, UPDATE) of an already applied migration again, e.g. after clearing a table."""
+    with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    for statement in statements:
+        if statement.upper().startswith(("INSERT", "UPDATE")):
+            db.cursor.execute(statement)
+    db.conn.commit()
+
+
+def test_migrations_are_split_into_statements(db):
+    """Comments are dropped and each `;`-terminated statement is run separately."""
+    sql = "-- indexes\nCREATE INDEX a ON T(x);\nCREATE INDEX b\n  ON T(y);\n"
+    assert split_statements(sql) == ["CREATE INDEX a ON T(x)", "CREATE INDEX b\n  ON T(y)"]
+
+
+def test_date_range_queries_use_indexes(db):
+    """Every per-user date range query is an index range scan, never a full table or index scan."""
+    seed(db)
+    start, end = date(2023, 2, 1), date(2023, 2, 28)
+    statements = record_queries(db, [
+        lambda: db.get_category_distribution(1, start, end),
+        lambda: db.get_muscle_group_distribution(1, start, end),
+        lambda: db.get_workout_frequency(1, start, end, "weekly"),
+        lambda: db.get_workout_frequency(1, start, end, "daily"),
+        lambda: db.get_weight_history(1, start, end),
+        lambda: db.count_workouts_on(1, date(2023, 2, 14)),
+        lambda: db.log_weight(1, 75.0, datetime(2023, 3, 1, 8, 0)),
+    ])
+    assert len(statements) == 7
+
+    for sql, params in statements:
+        db.cursor.execute("EXPLAIN " + sql, params)
+        for row in db.cursor.fetchall():
+            if row["table"] in RANGE_INDEXES:
+                assert row["type"] not in ("ALL", "index"), f"Full scan ({row['type']}) of {row['table']} for:\n{sql}"
+                assert row["key"] == RANGE_INDEXES[row["table"]], f"Unexpected index {row['key']} for:\n{sql}"
+
+
+def test_workout_log_pages_read_the_index_in_order(db):
+    """Log pages come straight off idx_logs_user_date in (date_logged, log_id) DESC order, without a filesort."""
+    seed(db)
+    statements = record_queries(db, [
+        lambda: db.get_workout_logs(1, 51),
+        lambda: db.get_workout_logs(1, 51, before=(datetime(2023, 3, 1, 18, 0), 500), fields=["sets", "reps"]),
+        lambda: db.get_workout_logs(1, 51, start_date=date(2023, 2, 1), end_date=date(2023, 2, 28), exercise_id=1),
+    ])
+    for sql, params in statements:
+        db.cursor.execute("EXPLAIN " + sql, params)
+        logs = next(row for row in db.cursor.fetchall() if row["table"] == "wl")
+        assert logs["key"] == "idx_logs_user_date", f"Unexpected index {logs['key']} for:\n{sql}"
+        assert "filesort" not in (logs["Extra"] or ""), f"Sorted in memory:\n{sql}"
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (date(2023, 1, 1), date(2023, 1, 1), 1),    # a single day includes its evening workout
+    (date(2023, 1, 1), date(2023, 1, 7), 7),    # the end date is inclusive
+    (date(2022, 12, 31), date(2022, 12, 31), 0),
+])
+def test_half_open_ranges_match_whole_days(db, start, end, expected):
+    """The half-open bounds select the same rows as DATE(date_logged) BETWEEN start AND end."""
+    seed(db, users=1, days=10)
+    counts = db.get_workout_frequency(1, start, end, "daily")
+    assert sum(row["count"] for row in counts) == expected
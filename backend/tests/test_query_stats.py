@@ -0,0 +1,27 @@
+import logging
+from app.query_stats import InstrumentedCursor, redact_params, start_request
+from config.settings import settings
+
+
+def test_server_timing_counts_request_queries(client, db):
+    """Each response reports the statements its request ran, including those on the executor threads."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    response = client.get("/plans")
+    assert response.status_code == 200
+    db_timing = response.headers["Server-Timing"].split(",")[0]
+    assert db_timing.startswith("db;dur=")
+    assert db_timing.endswith('desc="1 query"')  # the user id is cached by the sync, so only the plans query
+
+
+def test_slow_statement_logged_without_values(db, caplog, monkeypatch):
+    """Statements over SLOW_QUERY_MS are logged with their parameters reduced to types."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    stats = start_request()
+    cursor = InstrumentedCursor(db.conn.cursor(dictionary=True))
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        cursor.execute("SELECT %s AS secret", ("hunter2",))
+        cursor.fetchall()
+    assert stats.count == 1
+    assert "hunter2" not in caplog.text
+    assert "('<str>',)" in caplog.text
+    assert redact_params({"email": "a@b.c", "age": 3}) == {"email": "<str>", "age": "<int>"}
@@ -122,6 +122,7 @@ def test_generate_plan_volume_adjustment(client: TestClient, db: Database):
         (1, exercise_id, date.today() - timedelta(days=7))
     )
     db.conn.commit()
+    db.rebuild_workout_rollup(1)  # frequency is read from the rollup
     plan_data = {
         "days_per_week": 3,
         "preferences": {},
@@ -133,4 +134,55 @@ def test_generate_plan_volume_adjustment(client: TestClient, db: Database):
     plan = response.json()
     for day in plan["days"]:
         for exercise in day["exercises"]:
-            assert int(exercise["recommended_sets"]) < 4, "Volume should be reduced for low frequency"
\ No newline at end of file
+            assert int(exercise["recommended_sets"]) < 4, "Volume should be reduced for low frequency"
+
+
+def test_generate_plan_selects_in_memory(client: TestClient, db: Database):
+    """
+    Test that plan generation selects from the cached exercise index with the same rules as before:
+    exclusions are case-insensitive, exercises without equipment are allowed, easiest exercises come first,
+    and a second plan does not reload the catalog.
+    """
+    from app.services.exercise_catalog import exercise_catalog
+    create_user(db, "testuser1", "test1@example.com")
+    create_exercise(db, "Dumbbell Press", "Strength", "Chest", equipment="Dumbbells")
+    create_exercise(db, "Push-Ups", "Strength", "Chest", secondary_muscle="Triceps")
+    create_exercise(db, "Bench Press", "Strength", "Chest", secondary_muscle="Triceps", equipment="Barbell")
+    db.cursor.execute("UPDATE Workout_Exercises SET difficulty = 'Intermediate' WHERE exercise_name = 'Bench Press'")
+    db.cursor.execute("UPDATE Users SET experience_level = 'Intermediate' WHERE firebase_uid = 'testuser1'")
+    db.conn.commit()
+    plan_data = {
+        "days_per_week": 3,
+        "preferences": {"equipment": ["DUMBBELLS"]},
+        "plan_name": "In-Memory Plan",
+        "description": None
+    }
+
+    response = client.post("/plans/generate", json=plan_data)
+    assert response.status_code == 201
+    push_day = response.json()["days"][0]
+    assert [ex["exercise_name"] for ex in push_day["exercises"]] == ["Push-Ups", "Bench Press"]
+
+    reloads = exercise_catalog.reloads
+    response = client.post("/plans/generate", json=plan_data)
+    assert response.status_code == 201
+    assert response.json()["days"][0]["exercises"] == push_day["exercises"]
+    assert exercise_catalog.reloads == reloads
+
+
+def test_generate_plan_is_atomic(client: TestClient, db: Database, monkeypatch):
+    """Test that a failure while writing a generated plan leaves no partial plan behind."""
+    create_user(db, "testuser1", "test1@example.com")
+    create_exercise(db, "Bench Press", "Strength", "Chest", equipment="Barbell")
+
+    def fail(self, rows):
+        raise RuntimeError("simulated failure while adding exercises")
+    monkeypatch.setattr(Database, "add_exercises_to_days", fail)
+
+    with pytest.raises(RuntimeError):
+        client.post("/plans/generate", json={"days_per_week": 3, "preferences": {}, "plan_name": None, "description": None})
+
+    db.cursor.execute("SELECT COUNT(*) AS count FROM Plans")
+    assert db.cursor.fetchone()["count"] == 0
+    db.cursor.execute("SELECT COUNT(*) AS count FROM Plan_Days")
+    assert db.cursor.fetchone()["count"] == 0
@@ -0,0 +1,6 @@
+from benchmarks.startup import measure_import
+
+
+def test_import_defers_firebase_and_test_libraries():
+    """Importing the app does not load the Firebase SDK (initialised in the lifespan) or test-only libraries."""
+    assert measure_import(runs=1)["loaded"] == []
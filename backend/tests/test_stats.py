@@ -3,6 +3,7 @@ from datetime import date, datetime
 from fastapi.testclient import TestClient
 from app.database import Database
 from unittest.mock import patch
+from tests.test_query_plans import run_migration_backfill
 
 
 def test_get_workouts_by_type(client, db):
@@ -40,6 +41,7 @@ def test_get_workouts_by_type(client, db):
         (user_id, 2, "2023-01-02 12:00:00")
     )
     db.conn.commit()
+    db.rebuild_workout_rollup(user_id)  # raw inserts bypass the incremental rollup
 
     # Make the request to the endpoint
     response = client.get("/stats/workouts/by-type?start_date=2023-01-01&end_date=2023-01-31")
@@ -86,6 +88,7 @@ def test_get_workouts_by_muscle_group(client, db):
         (user_id, 2, "2023-01-02 12:00:00")
     )
     db.conn.commit()
+    db.rebuild_workout_rollup(user_id)  # raw inserts bypass the incremental rollup
 
     # Make the request to the endpoint
     response = client.get("/stats/workouts/by-muscle-group?start_date=2023-01-01&end_date=2023-01-31")
@@ -224,6 +227,7 @@ def test_get_workout_frequency_daily(client, db):
         (user_id, 2, "2023-01-02 12:00:00")
     )
     db.conn.commit()
+    db.rebuild_workout_rollup(user_id)  # raw inserts bypass the incremental rollup
 
     # Make the request to the endpoint
     response = client.get("/stats/workouts/frequency?start_date=2023-01-01&end_date=2023-01-31&granularity=daily")
@@ -269,6 +273,7 @@ def test_get_workout_frequency_weekly(client, db):
         (user_id, 2, "2023-01-01 12:00:00")
     )
     db.conn.commit()
+    db.rebuild_workout_rollup(user_id)  # raw inserts bypass the incremental rollup
 
     # Make the request to the endpoint
     response = client.get("/stats/workouts/frequency?start_date=2023-01-01&end_date=2023-01-31&granularity=weekly")
@@ -297,4 +302,103 @@ def test_get_workouts_by_type_invalid_dates(client, db):
     # Make the request with an invalid date range
     response = client.get("/stats/workouts/by-type?start_date=2023-12-31&end_date=2023-01-01")
     assert response.status_code == 400, f"Expected status code 400, got {response.status_code}"
-    assert response.json() == {"detail": "start_date must be before end_date"}, "Expected invalid date range error message"
\ No newline at end of file
+    assert response.json() == {"detail": "start_date must be before end_date"}, "Expected invalid date range error message"
+
+def read_rollup(db, user_id):
+    db.cursor.execute(
+        """
+        SELECT day, category, primary_muscle, workout_count, total_sets, total_reps, total_volume
+        FROM Workout_Daily_Rollup WHERE user_id = %s ORDER BY day, category, primary_muscle
+        """,
+        (user_id,)
+    )
+    return db.cursor.fetchall()
+
+
+def test_rollup_maintained_on_log_update_and_delete(client, db):
+    """
+    Logging, updating and deleting workouts keeps Workout_Daily_Rollup equal to a full rebuild from the raw logs,
+    and the stats endpoints see the changes straight away.
+    """
+    client.post("/auth/sync-user")
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (1, "Bench Press", "Strength", "Chest")
+    )
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (2, "Treadmill Run", "Cardio", "Full Body")
+    )
+    db.conn.commit()
+
+    workout = {"sets": 3, "reps": 10, "duration_minutes": None, "weight": 50.0, "notes": None}
+    first = client.post("/workouts/log?exercise_id=1", json=workout).json()["log_id"]
+    client.post("/workouts/log?exercise_id=1", json=workout)
+    run = client.post("/workouts/log?exercise_id=2", json={**workout, "weight": None}).json()["log_id"]
+
+    rows = read_rollup(db, user_id)
+    assert [(r["category"], r["workout_count"], r["total_sets"], r["total_volume"]) for r in rows] == [
+        ("Cardio", 1, 3, 0), ("Strength", 2, 6, 3000)
+    ]
+
+    client.put(f"/workouts/logs/{first}", json={"sets": 5})
+    client.delete(f"/workouts/logs/{run}")
+    incremental = read_rollup(db, user_id)
+    assert [(r["category"], r["workout_count"], r["total_sets"], r["total_volume"]) for r in incremental] == [
+        ("Strength", 2, 8, 4000)
+    ]
+
+    db.rebuild_workout_rollup(user_id)
+    assert read_rollup(db, user_id) == incremental
+
+    today = date.today().isoformat()
+    response = client.get(f"/stats/workouts/by-type?start_date={today}&end_date={today}")
+    assert response.json() == [{"type": "Strength", "count": 2}]
+
+    # Logs written before the rollup existed are filled in by its migration
+    db.cursor.execute("DELETE FROM Workout_Daily_Rollup")
+    run_migration_backfill(db, "0002_workout_daily_rollup.sql")
+    assert read_rollup(db, user_id) == incremental
+
+
+def test_dashboard_matches_individual_endpoints(client, db):
+    """GET /stats/dashboard returns the same series as the four separate stats endpoints."""
+    client.post("/auth/sync-user")
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (1, "Bench Press", "Strength", "Chest")
+    )
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (2, "Treadmill Run", "Cardio", "Full Body")
+    )
+    for exercise_id, logged in [(1, "2023-01-01 10:00:00"), (1, "2023-01-02 10:00:00"), (2, "2023-01-09 12:00:00")]:
+        db.cursor.execute(
+            "INSERT INTO Workout_Logs (user_id, exercise_id, date_logged) VALUES (%s, %s, %s)",
+            (user_id, exercise_id, logged)
+        )
+    db.cursor.execute(
+        "INSERT INTO Weight_History (user_id, date_logged, weight_kg) VALUES (%s, %s, %s)",
+        (user_id, "2023-01-03 08:00:00", 71.0)
+    )
+    db.conn.commit()
+    db.rebuild_workout_rollup(user_id)  # raw inserts bypass the incremental rollup
+
+    dates = "start_date=2023-01-01&end_date=2023-01-31"
+    for granularity in ["daily", "weekly"]:
+        response = client.get(f"/stats/dashboard?{dates}&granularity={granularity}")
+        assert response.status_code == 200
+        dashboard = response.json()
+        assert sorted(dashboard["by_type"], key=str) == sorted(client.get(f"/stats/workouts/by-type?{dates}").json(), key=str)
+        assert sorted(dashboard["by_muscle_group"], key=str) == sorted(
+            client.get(f"/stats/workouts/by-muscle-group?{dates}").json(), key=str
+        )
+        assert dashboard["weight_history"] == [{"date": "2023-01-03", "weight": 71.0}]
+        assert sorted(dashboard["frequency"], key=str) == sorted(
+            client.get(f"/stats/workouts/frequency?{dates}&granularity={granularity}").json(), key=str
+        )
+
+    assert client.get(f"/stats/dashboard?{dates}&granularity=monthly").status_code == 400
+    assert client.get("/stats/dashboard?start_date=2023-02-01&end_date=2023-01-01").status_code == 400
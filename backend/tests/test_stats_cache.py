@@ -0,0 +1,86 @@
+import pytest
+from config.settings import settings
+from app import stats_cache
+from app.stats_cache import INVALIDATION_WINDOW, MemoryStatsCache, RedisStatsCache
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        return RedisStatsCache(client=fakeredis.FakeRedis(), ttl=60)
+    return MemoryStatsCache(max_bytes=1024 * 1024, ttl=60)
+
+
+def test_invalidate_drops_only_that_user(cache):
+    """A write by one user leaves other users' cached stats in place."""
+    key = ("by_type", "2023-01-01", "2023-01-31")
+    for user_id in (1, 2):
+        token, value = cache.lookup(user_id, key)
+        assert value is None
+        cache.store(user_id, key, token, [{"type": "Strength", "count": user_id}])
+
+    assert cache.lookup(1, key)[1] == [{"type": "Strength", "count": 1}]
+    cache.invalidate(1)
+    assert cache.lookup(1, key)[1] is None
+    assert cache.lookup(2, key)[1] == [{"type": "Strength", "count": 2}]
+
+
+def test_result_read_before_a_write_is_not_stored(cache):
+    """A response computed from data read before an invalidation is dropped instead of cached."""
+    key = ("weight_history", "2023-01-01", "2023-01-31")
+    token, _ = cache.lookup(1, key)
+    cache.invalidate(1)  # a write commits while the response is being computed
+    cache.store(1, key, token, [{"date": "2023-01-01", "weight": 70.0}])
+    assert cache.lookup(1, key)[1] is None
+
+
+def test_memory_cache_evicts_least_recently_used_over_the_byte_cap():
+    cache = MemoryStatsCache(max_bytes=100, ttl=60)
+    value = ["x" * 30]  # 36 bytes serialized
+    for user_id in (1, 2):
+        cache.store(user_id, ("k",), cache.lookup(user_id, ("k",))[0], value)
+    cache.lookup(1, ("k",))  # user 1 is now the most recently used
+    cache.store(3, ("k",), cache.lookup(3, ("k",))[0], value)
+    assert cache.lookup(2, ("k",))[1] is None
+    assert cache.lookup(1, ("k",))[1] == value
+    assert cache.size <= 100
+
+
+def test_memory_cache_refuses_lookups_older_than_its_invalidation_window():
+    """Invalidations are forgotten after the window, so a result looked up before it is not stored."""
+    cache = MemoryStatsCache(max_bytes=1024, ttl=600)
+    token, _ = cache.lookup(1, ("k",))
+    cache.store(1, ("k",), token - INVALIDATION_WINDOW - 1, ["stale"])
+    assert cache.lookup(1, ("k",))[1] is None
+    cache.store(1, ("k",), token, ["fresh"])
+    assert cache.lookup(1, ("k",))[1] == ["fresh"]
+
+
+def test_auto_backend_caches_only_with_one_worker(monkeypatch):
+    """Per-process invalidation would leave other workers stale, so "auto" turns the cache off for them."""
+    monkeypatch.setattr(settings, "STATS_CACHE_BACKEND", "auto")
+    monkeypatch.setattr(settings, "STATS_CACHE_TTL", 60.0)
+    monkeypatch.setattr(stats_cache, "_cache", None)
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    assert stats_cache.get_stats_cache() is None
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 1)
+    assert isinstance(stats_cache.get_stats_cache(), MemoryStatsCache)
+
+
+def test_stats_endpoint_sees_workout_logged_after_it_was_cached(client, db, monkeypatch):
+    """Cached stats are invalidated when the user logs a workout."""
+    monkeypatch.setattr(settings, "STATS_CACHE_TTL", 60.0)
+    client.post("/auth/sync-user")
+    db.cursor.execute(
+        "INSERT INTO Workout_Exercises (exercise_id, exercise_name, category, primary_muscle) VALUES (%s, %s, %s, %s)",
+        (1, "Bench Press", "Strength", "Chest")
+    )
+    db.conn.commit()
+    url = "/stats/workouts/by-type?start_date=2000-01-01&end_date=2100-12-31"
+
+    assert client.get(url).json() == []
+    client.post("/workouts/log?exercise_id=1", json={"sets": 3, "reps": 10})
+    assert client.get(url).json() == [{"type": "Strength", "count": 1}]
+    client.post("/workouts/log?exercise_id=1", json={"sets": 3, "reps": 10})
+    assert client.get(url).json() == [{"type": "Strength", "count": 2}]
@@ -37,6 +37,8 @@ def log_workout(db: Database, user_id: int, exercise_id: int, log_date: date):
         (user_id, exercise_id, log_date_str)
     )
     db.conn.commit()
+    # Inserted behind the Database methods' back, so recompute the stored streak
+    db.rebuild_streaks(user_id)
 
 # Test Cases
 @freeze_time("2023-01-01")
@@ -45,7 +47,7 @@ def test_get_streak_no_workouts(client: TestClient, db: Database):
     create_user(db, "testuser1", "test1@example.com")
     response = client.get("/user/streak")
     assert response.status_code == 200
-    assert response.json() == {"current_streak": 0}
+    assert response.json() == {"current_streak": 0, "longest_streak": 0}
 
 @freeze_time("2023-01-01")
 def test_get_streak_with_workout_today(client: TestClient, db: Database):
@@ -55,7 +57,7 @@ def test_get_streak_with_workout_today(client: TestClient, db: Database):
     log_workout(db, user_id, exercise_id, date(2023, 1, 1))
     response = client.get("/user/streak")
     assert response.status_code == 200
-    assert response.json() == {"current_streak": 1}
+    assert response.json() == {"current_streak": 1, "longest_streak": 1}
 
 @freeze_time("2023-01-01")
 def test_get_streak_consecutive_days(client: TestClient, db: Database):
@@ -65,14 +67,14 @@ def test_get_streak_consecutive_days(client: TestClient, db: Database):
     
     # Log workout on day 1 and update streak
     log_workout(db, user_id, exercise_id, date(2023, 1, 1))
-    client.get("/user/streak")  # Sets streak to 1 and last_update to 2023-01-01
+    client.get("/user/streak")
 
     # Log workout on day 2 and check streak
     with freeze_time("2023-01-02"):
         log_workout(db, user_id, exercise_id, date(2023, 1, 2))
         response = client.get("/user/streak")
         assert response.status_code == 200
-        assert response.json() == {"current_streak": 2}
+        assert response.json() == {"current_streak": 2, "longest_streak": 2}
 
 @freeze_time("2023-01-01")
 def test_get_streak_missed_day(client: TestClient, db: Database):
@@ -82,10 +84,65 @@ def test_get_streak_missed_day(client: TestClient, db: Database):
     
     # Log workout on day 1 and update streak
     log_workout(db, user_id, exercise_id, date(2023, 1, 1))
-    client.get("/user/streak")  # Sets streak to 1 and last_update to 2023-01-01
+    client.get("/user/streak")
 
     # Check streak on day 3 (missed day 2)
     with freeze_time("2023-01-03"):
         response = client.get("/user/streak")
         assert response.status_code == 200
-        assert response.json() == {"current_streak": 0}
\ No newline at end of file
+        assert response.json() == {"current_streak": 0, "longest_streak": 1}
+
+@freeze_time("2023-01-10")
+def test_get_streak_alive_until_end_of_next_day(client: TestClient, db: Database):
+    """A run that ended yesterday still counts; the longest run is kept after the current one breaks."""
+    user_id = create_user(db, "testuser1", "test1@example.com")
+    exercise_id = create_exercise(db, "Test Exercise", "Test Muscle")
+    for day in (1, 2, 3, 7, 8, 9):
+        log_workout(db, user_id, exercise_id, date(2023, 1, day))
+    response = client.get("/user/streak")
+    assert response.json() == {"current_streak": 3, "longest_streak": 3}
+
+    with freeze_time("2023-01-11"):
+        response = client.get("/user/streak")
+        assert response.json() == {"current_streak": 0, "longest_streak": 3}
+
+def test_streak_maintained_on_log_and_delete(client: TestClient, db: Database):
+    """Logging through the API starts the streak and deleting the only log resets it, without a recompute on read."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    exercise_id = create_exercise(db, "Test Exercise", "Test Muscle")
+    log_id = client.post(f"/workouts/log?exercise_id={exercise_id}", json={"sets": 3, "reps": 10}).json()["log_id"]
+    assert client.get("/user/streak").json() == {"current_streak": 1, "longest_streak": 1}
+
+    client.delete(f"/workouts/logs/{log_id}")
+    assert client.get("/user/streak").json() == {"current_streak": 0, "longest_streak": 0}
+
+def test_streak_advances_by_the_app_servers_date(client: TestClient, db: Database):
+    """Logs are dated by the app's clock, so the streak advanced on logging matches a recompute from the logs."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    exercise_id = create_exercise(db, "Test Exercise", "Test Muscle")
+    for day in ("2023-01-01", "2023-01-02"):
+        with freeze_time(day):
+            client.post(f"/workouts/log?exercise_id={exercise_id}", json={"sets": 3, "reps": 10})
+    with freeze_time("2023-01-02"):
+        assert client.get("/user/streak").json() == {"current_streak": 2, "longest_streak": 2}
+        db.rebuild_streaks(user_id)  # the delete path's recompute, from the logs' own days
+        assert client.get("/user/streak").json() == {"current_streak": 2, "longest_streak": 2}
+
+def test_streak_recomputed_only_when_a_days_last_log_is_deleted(client: TestClient, db: Database):
+    """Deleting one of several logs on a day leaves the stored streak alone; deleting the last one recomputes it."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    exercise_id = create_exercise(db, "Test Exercise", "Test Muscle")
+    first, second = [
+        client.post(f"/workouts/log?exercise_id={exercise_id}", json={"sets": 3, "reps": 10}).json()["log_id"]
+        for _ in range(2)
+    ]
+    # A marker value only a recompute would overwrite
+    db.cursor.execute("UPDATE Users SET current_streak = 5, longest_streak = 5 WHERE user_id = %s", (user_id,))
+    db.conn.commit()
+
+    client.delete(f"/workouts/logs/{first}")
+    assert client.get("/user/streak").json() == {"current_streak": 5, "longest_streak": 5}
+    client.delete(f"/workouts/logs/{second}")
+    assert client.get("/user/streak").json() == {"current_streak": 0, "longest_streak": 0}
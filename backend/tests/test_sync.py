@@ -0,0 +1,111 @@
+import threading
+import time
+from app.database import open_database
+from tests.test_workouts import create_test_exercises
+
+
+def setup_user_data(client, db):
+    """A plan with one day and exercise, a workout logged against it, another logged freely, and a weight entry."""
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    create_test_exercises(db)
+    plan_id = client.post("/plans", json={"name": "Sync Plan", "days_per_week": 3}).json()["plan_id"]
+    day_id = client.post(f"/plans/{plan_id}/days", json={"day_number": 1}).json()["plan_day_id"]
+    plan_exercise_id = client.post(f"/plans/{plan_id}/days/{day_id}/exercises", json={"exercise_id": 1}).json()["plan_exercise_id"]
+    plan_log_id = client.post(
+        f"/plans/{plan_id}/days/{day_id}/exercises/{plan_exercise_id}/log",
+        json={"exercise_id": 1, "sets": 3, "reps": 10}
+    ).json()["workout_log_id"]
+    free_log_id = client.post("/workouts/log?exercise_id=2", json={"sets": 5, "reps": 5}).json()["log_id"]
+    client.post("/stats/weight", json={"weight_kg": 80.0})
+    return plan_id, day_id, plan_exercise_id, plan_log_id, free_log_id
+
+
+def test_sync_snapshot_then_deltas(client, db):
+    """A first sync returns everything; later syncs only what changed, with deletes as tombstones."""
+    plan_id, day_id, plan_exercise_id, plan_log_id, free_log_id = setup_user_data(client, db)
+
+    full = client.get("/sync").json()
+    assert full["full"] is True
+    assert {key: len(rows) for key, rows in full["changes"].items()} == {
+        "workout_logs": 2, "weight_history": 1, "plans": 1, "plan_days": 1, "plan_exercises": 1,
+    }
+
+    unchanged = client.get(f"/sync?since={full['cursor']}").json()
+    assert unchanged["full"] is False
+    assert unchanged["cursor"] == full["cursor"]
+    assert all(rows == [] for rows in unchanged["changes"].values())
+
+    # An edited log, and a deleted plan whose day and exercise go with it
+    client.put(f"/workouts/logs/{free_log_id}", json={"reps": 6})
+    client.delete(f"/plans/{plan_id}")
+    delta = client.get(f"/sync?since={full['cursor']}").json()
+    assert delta["deleted"] == {
+        "workout_logs": [], "weight_history": [],
+        "plans": [plan_id], "plan_days": [day_id], "plan_exercises": [plan_exercise_id],
+    }
+    logs = {row["log_id"]: row for row in delta["changes"]["workout_logs"]}
+    assert logs[free_log_id]["reps"] == 6
+    assert logs[plan_log_id]["plan_exercise_id"] is None  # detached by the cascade
+    assert delta["changes"]["weight_history"] == []
+
+    client.delete(f"/workouts/logs/{free_log_id}")
+    latest = client.get(f"/sync?since={delta['cursor']}").json()
+    assert latest["deleted"]["workout_logs"] == [free_log_id]
+
+
+def test_sync_pages_with_has_more(client, db):
+    """A small limit spreads the changes over several calls that together cover all of them."""
+    setup_user_data(client, db)
+    cursor, seen = "0", set()
+    for _ in range(10):
+        page = client.get(f"/sync?since={cursor}&limit=2").json()
+        seen.update(("plans", row["plan_id"]) for row in page["changes"]["plans"])
+        seen.update(("workout_logs", row["log_id"]) for row in page["changes"]["workout_logs"])
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert len([key for key in seen if key[0] == "workout_logs"]) == 2
+    assert len([key for key in seen if key[0] == "plans"]) == 1
+
+
+def test_sync_rejects_bad_cursor(client, db):
+    client.post("/auth/sync-user", headers={"Authorization": "Bearer mock_firebase_token"})
+    assert client.get("/sync?since=abc").status_code == 400
+
+
+def test_sync_does_not_skip_a_long_transaction(client, db):
+    """
+    A transaction that stays open while a later write for the same user commits must not be skipped: the
+    later write waits for it, so a cursor handed out in between stays below both changes.
+    """
+    setup_user_data(client, db)
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    before = client.get("/sync").json()["cursor"]
+
+    insert = "INSERT INTO Workout_Logs (user_id, exercise_id, sets, reps) VALUES (%s, %s, %s, %s)"
+    slow, quick = open_database(), open_database()
+    try:
+        slow.cursor.execute(insert, (user_id, 1, 1, 1))
+        slow_log_id = slow.cursor.lastrowid
+
+        def quick_write():
+            quick.cursor.execute(insert, (user_id, 2, 2, 2))
+            quick.conn.commit()
+
+        writer = threading.Thread(target=quick_write)
+        writer.start()
+        time.sleep(0.5)
+        assert writer.is_alive()  # waiting for the open transaction
+        between = client.get(f"/sync?since={before}").json()
+        assert between["changes"]["workout_logs"] == []
+
+        slow.conn.commit()
+        writer.join(timeout=10)
+        assert not writer.is_alive()
+        quick_log_id = quick.cursor.lastrowid
+    finally:
+        slow.close()
+        quick.close()
+
+    after = client.get(f"/sync?since={between['cursor']}").json()
+    assert sorted(row["log_id"] for row in after["changes"]["workout_logs"]) == sorted([slow_log_id, quick_log_id])
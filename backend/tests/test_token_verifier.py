@@ -0,0 +1,114 @@
+import time
+import pytest
+from app.services.token_verifier import SigningKeyCache, TokenVerificationError, TokenVerifier
+from tests.fake_key_server import FakeKeyServer
+
+
+def make_verifier(server: FakeKeyServer, revocations=None, lookups=None, **kwargs) -> TokenVerifier:
+    """Verifier against the fake key server; revocation state comes from the `revocations` dict."""
+    revocations = revocations if revocations is not None else {}
+    lookups = lookups if lookups is not None else []
+
+    def lookup(uid):
+        lookups.append(uid)
+        return revocations.get(uid, (False, 0.0))
+
+    return TokenVerifier(
+        server.project_id,
+        key_cache=SigningKeyCache(server.url, min_refresh_interval=0),
+        revocation_lookup=lookup,
+        **kwargs,
+    )
+
+
+def test_valid_token_with_cached_keys():
+    """Keys are fetched once and reused for every token while the max-age holds."""
+    with FakeKeyServer() as server:
+        verifier = make_verifier(server)
+        for _ in range(3):
+            claims = verifier.verify(server.sign("testuser1"))
+            assert claims["uid"] == "testuser1"
+        assert server.requests == 1
+
+
+def test_keys_refetched_after_max_age():
+    """An expired Cache-Control max-age forces a refetch."""
+    with FakeKeyServer(max_age=0) as server:
+        verifier = make_verifier(server)
+        verifier.verify(server.sign())
+        verifier.verify(server.sign())
+        assert server.requests == 2
+
+
+def test_rotated_key_triggers_refresh():
+    """A token signed with a key we have not seen yet refreshes the key set."""
+    with FakeKeyServer() as server:
+        verifier = make_verifier(server)
+        verifier.verify(server.sign())
+        server.rotate()
+        assert verifier.verify(server.sign())["uid"] == "testuser1"
+        assert server.requests == 2
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "another-project"},
+    {"iss": "https://securetoken.google.com/another-project"},
+    {"exp": int(time.time()) - 60},
+    {"sub": ""},
+])
+def test_invalid_claims_rejected(overrides):
+    """Tokens for another project, expired tokens and empty subjects are rejected."""
+    with FakeKeyServer() as server:
+        verifier = make_verifier(server)
+        with pytest.raises(TokenVerificationError):
+            verifier.verify(server.sign(**overrides))
+
+
+def test_revocation_checked_through_cache():
+    """Revocation state is looked up once per uid within the TTL, and revoked tokens are refused."""
+    with FakeKeyServer() as server:
+        lookups = []
+        revocations = {"revoked_user": (False, time.time() + 60)}
+        verifier = make_verifier(server, revocations=revocations, lookups=lookups)
+
+        verifier.verify(server.sign("testuser1"))
+        verifier.verify(server.sign("testuser1"))
+        assert lookups == ["testuser1"]
+
+        with pytest.raises(TokenVerificationError):
+            verifier.verify(server.sign("revoked_user"))
+
+
+def test_disabled_user_rejected():
+    """Disabled accounts are refused even with a correctly signed token."""
+    with FakeKeyServer() as server:
+        verifier = make_verifier(server, revocations={"testuser1": (True, 0.0)})
+        with pytest.raises(TokenVerificationError):
+            verifier.verify(server.sign("testuser1"))
+
+
+def test_cached_keys_survive_a_failed_refetch():
+    """While the key endpoint is down, tokens still verify with the old keys and refetches back off."""
+    with FakeKeyServer(max_age=0) as server:
+        verifier = make_verifier(server)
+        verifier.key_cache.retry_backoff = 60
+        verifier.verify(server.sign())
+
+        server.failing = True
+        for _ in range(3):
+            assert verifier.verify(server.sign())["uid"] == "testuser1"
+        assert server.requests == 2  # one failed refetch, then none until the backoff runs out
+
+        verifier.key_cache._retry_at = 0.0
+        server.failing = False
+        server.rotate()
+        assert verifier.verify(server.sign())["uid"] == "testuser1"
+        assert server.requests == 3
+
+
+def test_no_keys_at_all_is_a_verification_error():
+    with FakeKeyServer() as server:
+        server.failing = True
+        verifier = make_verifier(server)
+        with pytest.raises(TokenVerificationError):
+            verifier.verify(server.sign())
@@ -0,0 +1,95 @@
+from datetime import datetime
+from app.services.training_analytics import estimated_one_rep_max, summarize_logs
+from tests.test_workouts import create_test_exercises
+from tests.test_query_plans import run_migration_backfill
+
+
+def read_records(db, user_id):
+    db.cursor.execute(
+        "SELECT exercise_id, best_weight, best_e1rm, best_volume FROM Personal_Records WHERE user_id = %s ORDER BY exercise_id",
+        (user_id,)
+    )
+    return [(row["exercise_id"], row["best_weight"], round(row["best_e1rm"], 2), row["best_volume"])
+            for row in db.cursor.fetchall()]
+
+
+def test_summarize_logs_in_one_pass():
+    """Tonnage counts only complete logs; bests keep the earliest log on a tie."""
+    rows = [
+        {"exercise_id": 1, "exercise_name": "Bench Press", "date_logged": datetime(2023, 1, 1, 9), "sets": 3, "reps": 10, "weight": 50.0},
+        {"exercise_id": 1, "exercise_name": "Bench Press", "date_logged": datetime(2023, 1, 2, 9), "sets": 5, "reps": 5, "weight": 60.0},
+        {"exercise_id": 1, "exercise_name": "Bench Press", "date_logged": datetime(2023, 1, 3, 9), "sets": 1, "reps": 5, "weight": 60.0},
+        {"exercise_id": 2, "exercise_name": "Treadmill Run", "date_logged": datetime(2023, 1, 3, 18), "sets": None, "reps": None, "weight": None},
+    ]
+    summary = summarize_logs(iter(rows))
+    bench, run = summary["exercises"]
+    assert (bench["workouts"], bench["sets"], bench["reps"], bench["volume"]) == (3, 9, 20, 3300.0)
+    assert bench["best_e1rm"] == estimated_one_rep_max(60.0, 5) == 70.0
+    assert bench["best_e1rm_at"] == datetime(2023, 1, 2, 9)
+    assert (bench["best_volume"], bench["best_volume_at"]) == (1500.0, datetime(2023, 1, 1, 9))  # tied on Jan 2
+    assert run["volume"] == 0.0 and run["best_weight"] is None
+    assert [point["volume"] for point in summary["daily"]] == [1500.0, 1500.0, 300.0]
+
+
+def test_personal_records_follow_log_writes(client, db):
+    """Records rise with new logs and fall back when the record-holding log is edited or deleted."""
+    client.post("/auth/sync-user")
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    create_test_exercises(db)
+
+    first = client.post("/workouts/log?exercise_id=1", json={"sets": 3, "reps": 10, "weight": 50.0}).json()["log_id"]
+    assert read_records(db, user_id) == [(1, 50.0, 66.67, 1500.0)]
+    heavy = client.post("/workouts/log?exercise_id=1", json={"sets": 1, "reps": 3, "weight": 70.0}).json()["log_id"]
+    client.post("/workouts/log?exercise_id=2", json={"sets": 1, "reps": 1, "duration_minutes": 20})  # no weight: no record
+    assert read_records(db, user_id) == [(1, 70.0, 77.0, 1500.0)]
+
+    client.put(f"/workouts/logs/{heavy}", json={"weight": 55.0})
+    assert read_records(db, user_id) == [(1, 55.0, 66.67, 1500.0)]
+    client.delete(f"/workouts/logs/{first}")
+    assert read_records(db, user_id) == [(1, 55.0, 60.5, 165.0)]
+
+    records = client.get("/stats/records").json()
+    assert [(r["exercise_id"], r["best_weight"], r["best_e1rm"]) for r in records] == [(1, 55.0, 60.5)]
+    assert client.get("/stats/records?exercise_id=2").json() == []
+
+    db.cursor.execute("DELETE FROM Personal_Records")
+    db.conn.commit()
+    db.rebuild_personal_records(user_id)
+    assert read_records(db, user_id) == [(1, 55.0, 60.5, 165.0)]
+
+    # Logs written before the table existed are filled in by its migration
+    db.cursor.execute("DELETE FROM Personal_Records")
+    run_migration_backfill(db, "0007_personal_records.sql")
+    assert read_records(db, user_id) == [(1, 55.0, 60.5, 165.0)]
+
+
+def test_volume_and_ranged_records(client, db):
+    client.post("/auth/sync-user")
+    user_id = db.get_user_id_by_firebase_uid("testuser1")
+    create_test_exercises(db)
+    for exercise_id, logged, sets, reps, weight in [
+        (1, "2023-01-01 10:00:00", 3, 10, 50.0),
+        (1, "2023-02-01 10:00:00", 3, 5, 80.0),
+        (2, "2023-01-02 10:00:00", 4, 8, 20.0),
+    ]:
+        db.cursor.execute(
+            "INSERT INTO Workout_Logs (user_id, exercise_id, date_logged, sets, reps, weight) VALUES (%s, %s, %s, %s, %s, %s)",
+            (user_id, exercise_id, logged, sets, reps, weight)
+        )
+    db.conn.commit()
+    db.rebuild_personal_records(user_id)  # raw inserts bypass the incremental records
+
+    january = client.get("/stats/volume?start_date=2023-01-01&end_date=2023-01-31").json()
+    assert january["total_volume"] == 1500.0 + 640.0
+    assert [e["exercise_id"] for e in january["by_exercise"]] == [1, 2]  # by name: Bench Press, Squat
+    assert january["daily"] == [{"date": "2023-01-01", "volume": 1500.0}, {"date": "2023-01-02", "volume": 640.0}]
+
+    bench = client.get("/stats/volume?start_date=2023-01-01&end_date=2023-12-31&exercise_id=1").json()
+    assert bench["total_volume"] == 2700.0
+    assert bench["by_exercise"][0]["best_e1rm"] == round(estimated_one_rep_max(80.0, 5), 2)
+
+    ranged = client.get("/stats/records?start_date=2023-01-01&end_date=2023-01-31&exercise_id=1").json()
+    assert ranged[0]["best_weight"] == 50.0 and ranged[0]["best_weight_date"] == "2023-01-01"
+    all_time = client.get("/stats/records?exercise_id=1").json()
+    assert all_time[0]["best_weight"] == 80.0 and all_time[0]["best_weight_date"] == "2023-02-01"
+    assert client.get("/stats/records?start_date=2023-01-01").status_code == 400
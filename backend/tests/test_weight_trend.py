@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+import numpy as np
+from app.services.weight_trend import compute_weight_trend, exponential_smoothing, trailing_means
+
+
+def test_exponential_smoothing_matches_recurrence():
+    """The blockwise computation equals the element-by-element recurrence, across block boundaries too."""
+    values = np.random.default_rng(1).normal(80, 2, size=10000)
+    for alpha in (0.01, 0.1, 0.9):
+        expected = np.empty_like(values)
+        expected[0] = values[0]
+        for i in range(1, values.size):
+            expected[i] = alpha * values[i] + (1 - alpha) * expected[i - 1]
+        assert np.allclose(exponential_smoothing(values, alpha), expected)
+
+
+def test_trailing_means_use_calendar_windows():
+    """Entries older than the window drop out even when days were skipped."""
+    days = np.array([0, 1, 3, 10, 11])
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert trailing_means(days, values, 7).tolist() == [1.0, 1.5, 2.0, 4.0, 4.5]
+
+
+def test_linear_loss_is_projected():
+    """A steady 0.5 kg/week loss gives that slope, a perfect fit and a projection continuing the line."""
+    start = date(2023, 1, 1)
+    rows = [{"date": start + timedelta(days=day), "weight": 90 - day / 14} for day in range(0, 60, 2)]
+    trend = compute_weight_trend(rows, projection_days=14)
+    assert trend["slope_kg_per_week"] == -0.5
+    assert trend["r_squared"] == 1.0
+    assert trend["projection"] == [
+        {"date": start + timedelta(days=65), "weight": round(90 - 65 / 14, 3)},
+        {"date": start + timedelta(days=72), "weight": round(90 - 72 / 14, 3)},
+    ]
+    assert trend["points"][0]["weekly_rate"] is None
+    assert trend["points"][-1]["weekly_rate"] < 0
+    assert len(trend["points"]) == len(rows)
+
+
+def test_weight_trend_endpoint(client, db):
+    client.post("/auth/sync-user")
+    for day, weight in [("2023-01-01", 80.0), ("2023-01-05", 79.6), ("2023-01-09", 79.2)]:
+        client.post("/stats/weight", json={"weight_kg": weight, "date_logged": f"{day}T08:00:00"})
+
+    response = client.get("/stats/weight/trend?start_date=2023-01-01&end_date=2023-01-31&projection_days=7")
+    assert response.status_code == 200
+    data = response.json()
+    assert [point["date"] for point in data["points"]] == ["2023-01-01", "2023-01-05", "2023-01-09"]
+    assert data["points"][-1]["ma_7"] == 79.4
+    assert data["slope_kg_per_week"] == -0.7
+    assert data["projection"] == [{"date": "2023-01-16", "weight": 78.5}]
+
+    empty = client.get("/stats/weight/trend?start_date=2022-01-01&end_date=2022-01-31").json()
+    assert empty == {"points": [], "slope_kg_per_week": None, "r_squared": None, "projection": []}
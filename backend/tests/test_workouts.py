@@ -43,6 +43,46 @@ def test_get_workouts(client, firebase_token, db):
     assert "initial_recommended_time" in workouts[0]  # Will be None
 
 
+def test_get_workouts_etag_and_compact(client, firebase_token, db):
+    """
+    Test the cached GET /workouts responses.
+    A repeated request with the returned ETag gets a 304, and the compact list drops the long text fields.
+    """
+    create_test_exercises(db)
+    headers = {"Authorization": f"Bearer {firebase_token}"}
+    response = client.get("/workouts", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get("/workouts", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/workouts?compact=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "instructions" not in response.json()[0]
+    assert response.json()[0]["exercise_name"] == "Bench Press"
+
+
+def test_exercise_catalog_picks_up_changes(client, firebase_token, db, monkeypatch):
+    """Catalog changes made directly in the database bump its version and reach the cached list."""
+    from app.services.exercise_catalog import exercise_catalog
+    monkeypatch.setattr(exercise_catalog, "check_interval", 0)
+    create_test_exercises(db)
+    headers = {"Authorization": f"Bearer {firebase_token}"}
+    etag = client.get("/workouts", headers=headers).headers["ETag"]
+
+    reloads = exercise_catalog.reloads
+    client.get("/workouts", headers=headers)
+    assert exercise_catalog.reloads == reloads  # unchanged version, no reload
+
+    db.cursor.execute("UPDATE Workout_Exercises SET equipment = 'Barbell' WHERE exercise_id = 1")
+    db.conn.commit()
+    response = client.get("/workouts", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["equipment"] == "Barbell"
+
+
 # Test POST /workouts/log endpoint
 def test_log_workout(client, firebase_token, db):
     """
@@ -74,6 +114,47 @@ def test_log_workout(client, firebase_token, db):
     assert "log_id" in response.json()
 
 
+# Test POST /workouts/log/batch endpoint
+def test_log_workout_batch(client, firebase_token, db):
+    """
+    Test the POST /workouts/log/batch endpoint with a mix of valid and invalid entries.
+    Valid entries are logged (and counted in the rollup); invalid ones are reported by index.
+    """
+    headers = {"Authorization": f"Bearer {firebase_token}"}
+    client.post("/auth/sync-user", headers=headers)
+    create_test_exercises(db)
+
+    entries = [
+        {"exercise_id": 1, "sets": 3, "reps": 10, "weight": 50.0},
+        {"exercise_id": 999, "sets": 3, "reps": 10},
+        {"exercise_id": 2, "sets": 4, "reps": 8, "weight": 80.0, "notes": "Deep"},
+        {"exercise_id": 3, "sets": -1, "reps": 5},
+        {"exercise_id": 1, "sets": 3, "reps": 10, "plan_exercise_id": 12345},
+        {"exercise_id": 2, "sets": 1, "reps": 1, "duration_minutes": -5, "weight": -1.0},
+    ]
+    response = client.post("/workouts/log/batch", json={"entries": entries}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    log_ids = body["log_ids"]
+    assert log_ids[0] is not None and log_ids[2] is not None and log_ids[0] < log_ids[2]
+    assert log_ids[1] is None and log_ids[3] is None and log_ids[4] is None and log_ids[5] is None
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (1, "Exercise not found"),
+        (3, "sets must be non-negative"),
+        (4, "Plan exercise not found"),
+        (5, "duration_minutes, weight must be non-negative"),
+    ]
+
+    logs = client.get("/workouts/logs", headers=headers).json()
+    assert {log["log_id"]: log["exercise_id"] for log in logs} == {log_ids[0]: 1, log_ids[2]: 2}
+    db.cursor.execute("SELECT CAST(SUM(workout_count) AS SIGNED) AS count FROM Workout_Daily_Rollup")
+    assert db.cursor.fetchone()["count"] == 2
+
+    # Empty batches are rejected by validation
+    response = client.post("/workouts/log/batch", json={"entries": []}, headers=headers)
+    assert response.status_code == 422
+
+
 # Test GET /workouts/logs endpoint
 def test_get_workout_logs(client, firebase_token, db):
     """
@@ -122,6 +203,60 @@ def test_get_workout_logs(client, firebase_token, db):
     assert matching_log["notes"] == "Felt strong today"
 
 
+def test_get_workout_logs_paginated(client, firebase_token, db):
+    """
+    Test keyset pagination of GET /workouts/logs.
+    Follows X-Next-Cursor through every page and checks the logs come back newest first, exactly once,
+    including logs that share the same date_logged (ties are broken by log_id).
+    """
+    headers = {"Authorization": f"Bearer {firebase_token}"}
+    client.post("/auth/sync-user", headers=headers)
+    create_test_exercises(db)
+
+    workout_data = {"sets": 3, "reps": 10, "duration_minutes": None, "weight": 50.0, "notes": None}
+    log_ids = [
+        client.post(f"/workouts/log?exercise_id={1 + i % 2}", json=workout_data, headers=headers).json()["log_id"]
+        for i in range(5)
+    ]
+
+    seen = []
+    url = "/workouts/logs?limit=2"
+    while True:
+        response = client.get(url, headers={**headers, "Origin": "http://localhost:8081"})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(log["log_id"] for log in page)
+        assert "X-Next-Cursor" in response.headers["Access-Control-Expose-Headers"]  # readable by browsers
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        url = f"/workouts/logs?limit=2&cursor={cursor}"
+    assert seen == sorted(log_ids, reverse=True)
+
+    # Filter by exercise and project a subset of fields
+    response = client.get("/workouts/logs?exercise_id=2&fields=log_id,exercise_name", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"log_id": log_ids[3], "exercise_name": "Squat"},
+        {"log_id": log_ids[1], "exercise_name": "Squat"},
+    ]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_workout_logs_rejects_bad_parameters(client, firebase_token, db):
+    """Unknown projection fields and malformed cursors are rejected with 400."""
+    headers = {"Authorization": f"Bearer {firebase_token}"}
+    client.post("/auth/sync-user", headers=headers)
+
+    response = client.get("/workouts/logs?fields=log_id,password", headers=headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: password"}
+
+    response = client.get("/workouts/logs?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+
 # Test PUT /workouts/logs/{log_id} endpoint
 def test_update_workout_log(client, firebase_token, db):
     """
@@ -129,6 +129,7 @@ CREATE INDEX idx_date_recommend ON AI_Recommendations(date_recommended);
 CREATE INDEX idx_plans_user_id ON Plans(user_id);
 CREATE INDEX idx_plan_days_plan_id ON Plan_Days(plan_id);
 CREATE INDEX idx_plan_exercises_plan_day_id ON Plan_Exercises(plan_day_id);
+-- Later schema changes live in backend/migrations; apply them with `python -m app.migrations`
 
 -- Checks:
 SHOW TABLES;
@@ -94,13 +94,14 @@ export const getWorkoutsByMuscleGroup = async (token: string, startDate: string,
   }
 };
 
-// Fetch user weight history (GET /stats/weight/history)
-export const getWeightHistory = async (token: string, startDate: string, endDate: string): Promise<WeightEntry[]> => {
+// Fetch user weight history (GET /stats/weight/history); maxPoints downsamples long ranges on the server
+export const getWeightHistory = async (token: string, startDate: string, endDate: string, maxPoints?: number): Promise<WeightEntry[]> => {
   try {
     const response: AxiosResponse<WeightEntry[]> = await apiClient.get('/stats/weight/history', {
       params: {
         start_date: startDate,
         end_date: endDate,
+        max_points: maxPoints,
       },
       headers: {
         Authorization: `Bearer ${token}`,
@@ -138,14 +139,15 @@ export const logWeight = async (token: string, weightData: WeightCreate): Promis
   }
 };
 
-// Fetch daily workout frequency (GET /stats/workouts/frequency?granularity=daily)
-export const getDailyWorkoutFrequency = async (token: string, startDate: string, endDate: string): Promise<FrequencyEntry[]> => {
+// Fetch daily workout frequency (GET /stats/workouts/frequency?granularity=daily); maxPoints downsamples long ranges
+export const getDailyWorkoutFrequency = async (token: string, startDate: string, endDate: string, maxPoints?: number): Promise<FrequencyEntry[]> => {
   try {
     const response: AxiosResponse<FrequencyEntry[]> = await apiClient.get('/stats/workouts/frequency', {
       params: {
         start_date: startDate,
         end_date: endDate,
         granularity: 'daily',
+        max_points: maxPoints,
       },
       headers: {
         Authorization: `Bearer ${token}`,
@@ -186,4 +188,43 @@ export const getWeeklyWorkoutFrequency = async (token: string, startDate: string
     }
     throw new Error('Failed to fetch weekly workout frequency.');
   }
-};
\ No newline at end of file
+};
+// Interface for the combined stats screen data
+interface DashboardStats {
+  by_type: WorkoutDistribution[];
+  by_muscle_group: MuscleGroupDistribution[];
+  weight_history: WeightEntry[];
+  frequency: FrequencyEntry[] | WeeklyFrequencyEntry[];
+}
+
+// Fetch every stats screen series in one request (GET /stats/dashboard)
+export const getDashboardStats = async (
+  token: string,
+  startDate: string,
+  endDate: string,
+  granularity: 'daily' | 'weekly' = 'daily',
+  maxPoints?: number
+): Promise<DashboardStats> => {
+  try {
+    const response: AxiosResponse<DashboardStats> = await apiClient.get('/stats/dashboard', {
+      params: {
+        start_date: startDate,
+        end_date: endDate,
+        granularity,
+        max_points: maxPoints,
+      },
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    });
+    return response.data;
+  } catch (error: any) {
+    if (error.response?.status === 401) {
+      throw new Error('Unauthorized: Invalid or expired token. Please log in again.');
+    }
+    if (error.response?.status === 400) {
+      throw new Error('Invalid request: Please check the date format (YYYY-MM-DD).');
+    }
+    throw new Error('Failed to fetch stats dashboard.');
+  }
+};
@@ -165,15 +165,28 @@ export const logPlanWorkout = async (
   }
 };
 
-// Retrieve the user's workout logs (GET /workouts/logs)
+// Retrieve the user's workout logs (GET /workouts/logs), newest first.
+// The endpoint returns one page at a time; follow X-Next-Cursor until the last page.
+const WORKOUT_LOGS_PAGE_SIZE = 200;
+
 export const getWorkoutLogs = async (token: string): Promise<WorkoutLog[]> => {
   try {
-    const response: AxiosResponse<WorkoutLog[]> = await apiClient.get('/workouts/logs', {
-      headers: {
-        Authorization: `Bearer ${token}`,
-      },
-    });
-    return response.data;
+    const logs: WorkoutLog[] = [];
+    let cursor: string | undefined;
+    do {
+      const response: AxiosResponse<WorkoutLog[]> = await apiClient.get('/workouts/logs', {
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+        params: {
+          limit: WORKOUT_LOGS_PAGE_SIZE,
+          cursor,
+        },
+      });
+      logs.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return logs;
   } catch (error: any) {
     if (error.response?.status === 401) {
       throw new Error('Unauthorized: Invalid or expired token. Please log in again.');